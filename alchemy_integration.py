@@ -1,8 +1,8 @@
 """
 Integração com Alchemy Data APIs para melhorar coleta de informações
 """
-import asyncio
 import aiohttp
+from http_session import shared_session, run_sync
 import os
 from typing import Dict, List, Optional
 from datetime import datetime
@@ -56,7 +56,7 @@ class AlchemyClient:
             url = f"{self.base_url}/accounts/{wallet_address}/portfolio"
             headers = {"X-Alchemy-Token": self.api_key}
             
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -139,7 +139,7 @@ class AlchemyClient:
             if from_block:
                 params['fromBlock'] = from_block
             
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 async with session.get(url, headers=headers, params=params, 
                                      timeout=aiohttp.ClientTimeout(total=10)) as response:
                     if response.status == 200:
@@ -186,7 +186,7 @@ class AlchemyClient:
             url = f"{self.base_url}/prices/token/{token_address}"
             headers = {"X-Alchemy-Token": self.api_key}
             
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=5)) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -257,57 +257,53 @@ async def update_sell_prices_with_alchemy(wallet_address: str, api_key: str = No
         print("ℹ️  Nenhuma venda detectada via Alchemy")
         return 0
     
-    # Carrega trades vendidos
-    import json
-    trades_file = 'trades_history.json'
-    if not os.path.exists(trades_file):
-        return 0
-    
-    with open(trades_file, 'r', encoding='utf-8') as f:
-        trades_data = json.load(f)
-    
-    sold_trades = trades_data.get('sold', [])
-    updated_count = 0
-    
     # Obtém preço do SOL
     sol_price = await client.get_token_price("So11111111111111111111111111111111111111112") or 150.0
     
-    # Atualiza preços
-    for trade in sold_trades:
-        contract_address = trade.get('contract_address', '').upper()
+    # Carrega trades vendidos (banco SQLite do histórico)
+    from trade_store import TradeHistoryEdit
+    history = TradeHistoryEdit()
+    sold_trades = history.trades['sold']
+    updated_count = 0
+    
+    try:
+        # Atualiza preços
+        for trade in sold_trades:
+            contract_address = trade.get('contract_address', '').upper()
         
-        # Procura venda correspondente
-        matching_sell = None
-        for sell in sells:
-            if sell['token_mint'].upper() == contract_address:
-                matching_sell = sell
-                break
+            # Procura venda correspondente
+            matching_sell = None
+            for sell in sells:
+                if sell['token_mint'].upper() == contract_address:
+                    matching_sell = sell
+                    break
         
-        if matching_sell:
-            # Calcula preço de venda em USD
-            # Se temos sol_received, podemos calcular se tivermos quantidade de tokens
-            amount_tokens = trade.get('amount_tokens', 0)
-            if amount_tokens > 0:
-                price_per_token_sol = matching_sell['sol_received'] / amount_tokens
-                price_per_token_usd = price_per_token_sol * sol_price
+            if matching_sell:
+                # Calcula preço de venda em USD
+                # Se temos sol_received, podemos calcular se tivermos quantidade de tokens
+                amount_tokens = trade.get('amount_tokens', 0)
+                if amount_tokens > 0:
+                    price_per_token_sol = matching_sell['sol_received'] / amount_tokens
+                    price_per_token_usd = price_per_token_sol * sol_price
                 
-                trade['final_price'] = price_per_token_usd
-                trade['real_sell_price_calculated'] = True
-                trade['real_sol_received'] = matching_sell['sol_received']
-                trade['sell_tx_signature'] = matching_sell['signature']
+                    trade['final_price'] = price_per_token_usd
+                    trade['real_sell_price_calculated'] = True
+                    trade['real_sol_received'] = matching_sell['sol_received']
+                    trade['sell_tx_signature'] = matching_sell['signature']
                 
-                updated_count += 1
-                print(f"✅ Atualizado {trade.get('symbol', 'UNKNOWN')}: ${price_per_token_usd:.10f}")
+                    updated_count += 1
+                    print(f"✅ Atualizado {trade.get('symbol', 'UNKNOWN')}: ${price_per_token_usd:.10f}")
     
-    # Salva atualizações
-    if updated_count > 0:
-        with open(trades_file, 'w', encoding='utf-8') as f:
-            json.dump(trades_data, f, indent=2, ensure_ascii=False)
-        print(f"\n✅ {updated_count} preços atualizados via Alchemy!")
+        # Salva atualizações
+        if updated_count > 0:
+            history.commit()
+            print(f"\n✅ {updated_count} preços atualizados via Alchemy!")
+    finally:
+        history.close()
     
     return updated_count
 
 def update_sell_prices_with_alchemy_sync(wallet_address: str, api_key: str = None) -> int:
     """Wrapper síncrono"""
-    return asyncio.run(update_sell_prices_with_alchemy(wallet_address, api_key))
+    return run_sync(update_sell_prices_with_alchemy(wallet_address, api_key))
 
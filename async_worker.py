@@ -0,0 +1,125 @@
+"""
+Event loop persistente da interface web (uma thread de fundo)
+As rotas Flask são síncronas: em vez de asyncio.run() por requisição (JupiterClient novo,
+chave decodificada de novo, conexões frias), submetem corrotinas para este loop e esperam o
+resultado com timeout. JupiterClient, PriceMonitor e as sessões HTTP/RPC ficam quentes
+entre requisições - compra/venda manual tem a mesma latência do caminho do bot.
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Optional
+from http_session import close_http_sessions, get_session
+
+DEFAULT_TIMEOUT = 30.0
+
+class AsyncWorker:
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._jupiter = None
+        self._price_monitor = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Inicia a thread do loop e aquece as conexões (chamadas repetidas são ignoradas)"""
+        with self._lock:
+            if self.running:
+                return
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name='async-worker', daemon=True)
+            self._thread.start()
+            ready.wait()
+        self.submit(self.warm())
+
+    def _run(self, ready: threading.Event):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Agenda a corrotina no loop do worker (inicia o worker se preciso)"""
+        if not self.running:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Coroutine, timeout: float = DEFAULT_TIMEOUT, cancel_on_timeout: bool = True) -> Any:
+        """Executa a corrotina no worker e espera o resultado
+        Args:
+            timeout: Segundos de espera (estourou: TimeoutError)
+            cancel_on_timeout: False para operações que não podem ser interrompidas no meio
+                               (ex: swap já enviado) - continuam no worker e registram o resultado sozinhas
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            if cancel_on_timeout:
+                future.cancel()
+            raise TimeoutError(f"Operação não terminou em {timeout:g}s")
+
+    @property
+    def jupiter(self):
+        """JupiterClient do worker (usar só de dentro das corrotinas executadas aqui)"""
+        if self._jupiter is None:
+            from jupiter_client import JupiterClient
+            self._jupiter = JupiterClient()
+        return self._jupiter
+
+    @property
+    def price_monitor(self):
+        """PriceMonitor do worker (usar só de dentro das corrotinas executadas aqui)"""
+        if self._price_monitor is None:
+            from price_monitor import PriceMonitor
+            self._price_monitor = PriceMonitor()
+        return self._price_monitor
+
+    async def warm(self):
+        """Abre as conexões antes da primeira compra/venda (sessão HTTP + RPC)"""
+        get_session()
+        try:
+            await self.jupiter.client.get_latest_blockhash()
+        except Exception as e:
+            print(f"⚠️  Worker assíncrono: não foi possível aquecer a conexão RPC ({e})")
+
+    async def _close_resources(self):
+        if self._jupiter is not None:
+            await self._jupiter.close()
+            self._jupiter = None
+        await close_http_sessions()
+
+    def stop(self, timeout: float = 5.0):
+        """Fecha JupiterClient e sessões HTTP e encerra a thread do loop"""
+        with self._lock:
+            if not self.running:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_resources(), self._loop).result(timeout)
+            except Exception as e:
+                print(f"⚠️  Worker assíncrono: erro ao fechar conexões ({e})")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+            self._loop = None
+
+# Instância global (singleton)
+_worker: Optional[AsyncWorker] = None
+_worker_lock = threading.Lock()
+
+def get_async_worker() -> AsyncWorker:
+    """Retorna o worker do processo (a thread só inicia no primeiro uso)"""
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = AsyncWorker()
+    return _worker
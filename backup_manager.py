@@ -33,6 +33,16 @@ def create_backup():
                 dest = backup_folder / file_name
                 shutil.copy2(source, dest)
         
+        # Banco de trades: cópia consistente mesmo com o bot gravando (WAL)
+        import config
+        if Path(config.TRADES_DB_FILE).exists():
+            from trade_store import TradeStore
+            store = TradeStore()
+            try:
+                store.backup(str(backup_folder / Path(config.TRADES_DB_FILE).name))
+            finally:
+                store.close()
+        
         # Limpa backups antigos (mantém últimos 7 dias)
         cleanup_old_backups(days=7)
         
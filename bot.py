@@ -4,14 +4,19 @@ from message_parser import parse_token_message
 from jupiter_client import JupiterClient
 from take_profit import TakeProfitManager
 import config
-from trade_tracker_integration import log_trade_bought, log_trade_update, log_trade_sold
+from trade_tracker_integration import log_trade_bought, log_trade_update, log_trade_sold, close_tracker
 from bot_control import get_bot_state
-from last_token_detected import save_last_token
-from detected_tokens_tracker import add_detected_token, mark_token_as_bought
+from detection_writer import get_detection_writer
 from logger import log_info, log_warning, log_error, log_success
 from token_blacklist import get_blacklist_cache, is_blacklisted
 from daily_loss_limit import check_daily_loss_limit, add_trade_result
-from wallet_balance import get_wallet_balance
+from wallet_balance import get_wallet_balance_service
+from capital_ledger import CapitalReservationError, get_capital_ledger
+from latency_tracker import LatencyTrace, get_latency_stats
+from http_session import close_http_sessions, get_http_stats
+from price_monitor import get_price_stats
+from event_bus import get_event_bus
+from bot_commands import register_bot_commands
 
 class TradingBot:
     def __init__(self):
@@ -24,6 +29,15 @@ class TradingBot:
         self.tp_manager = TakeProfitManager(self.jupiter)
         self.active_trades = {}
         self.bot_was_enabled = True  # Estado anterior do bot
+        # Registro de tokens detectados é gravado em segundo plano (fora do caminho de compra)
+        self.detection_writer = get_detection_writer()
+        # Canal de eventos com a interface web (eventos saem, comandos chegam)
+        self.event_bus = get_event_bus()
+        register_bot_commands(self.event_bus, self.tp_manager)
+        # Saldo em memória (atualizado em segundo plano e a cada swap confirmado)
+        self.wallet_balance = get_wallet_balance_service()
+        # Reserva de capital das compras em andamento (sinais simultâneos não gastam o mesmo saldo)
+        self.capital = get_capital_ledger()
     
     async def initialize(self):
         """Initialize Telegram client"""
@@ -69,6 +83,21 @@ class TradingBot:
     
     async def on_new_message(self, event):
         """Handle new message from Telegram channel"""
+        # Trace de latência começa no instante em que a mensagem chega ao handler
+        trace = LatencyTrace()
+        try:
+            await self._process_message(event, trace)
+        finally:
+            # Só registra mensagens que eram tokens (parse OK)
+            if trace.stages:
+                stats = get_latency_stats()
+                stats.record(trace)
+                if stats.should_save():
+                    # Grava fora do event loop (não bloqueia próximos sinais)
+                    asyncio.get_running_loop().run_in_executor(None, stats.save)
+    
+    async def _process_message(self, event, trace: LatencyTrace):
+        """Processa mensagem (parse, verificações e compra) marcando cada estágio no trace"""
         message = event.message.text
         
         # Debug: mostra mensagem recebida (apenas se tiver formato de token parcial)
@@ -86,6 +115,19 @@ class TradingBot:
                 log_warning(f"   Mensagem: {message[:300]}")
             return
         
+        trace.label = token_info.symbol
+        trace.mark('parse')
+        
+        # Dispara quote especulativa JÁ (roda em paralelo com as verificações abaixo)
+        # Usa valores atuais em memória; se a config mudar no reload, buy_token descarta e busca outra.
+        # Bot desativado não gasta quote (get_bot_state é leitura em memória; _check_and_buy confere de novo)
+        prefetch = None
+        prefetch_amount = config.get_amount_by_score(token_info.score)
+        if prefetch_amount > 0 and token_info.score <= config.MAX_SCORE and get_bot_state():
+            prefetch = self.jupiter.prefetch_buy_quote(token_info.contract_address, prefetch_amount)
+            # Cede o loop uma vez para a requisição sair antes das verificações síncronas
+            await asyncio.sleep(0)
+        
         # Calcula tempo desde que a mensagem foi enviada no Telegram (timestamp da mensagem)
         # Usa o horário que a mensagem entrou no chat (ex: 18:31, 20:27) e calcula minutos desde então
         from datetime import datetime, timezone
@@ -103,18 +145,9 @@ class TradingBot:
             token_info.minutes_detected = minutes_since_message
             log_info(f"   ⏱️  Mensagem enviada há {minutes_since_message} minutos (timestamp do Telegram: {message_date.strftime('%H:%M')})")
         
-        # Salva último token detectado (SEMPRE, mesmo se bot estiver desativado)
-        save_last_token(
-            token_info.symbol,
-            token_info.score,
-            token_info.price,
-            token_info.contract_address,
-            token_info.minutes_detected,
-            detected_at
-        )
-        
-        # Adiciona ao tracker de tokens detectados (SEMPRE, mesmo se bot estiver desativado)
-        add_detected_token(
+        # Salva último token detectado e adiciona ao tracker de tokens detectados
+        # (SEMPRE, mesmo se bot estiver desativado) - apenas enfileira, gravação é em lote
+        self.detection_writer.submit_detection(
             token_info.symbol,
             token_info.score,
             token_info.price,
@@ -122,15 +155,29 @@ class TradingBot:
             token_info.minutes_detected,
             detected_at
         )
+        trace.mark('bookkeeping')
         
+        try:
+            await self._check_and_buy(token_info, trace, prefetch)
+        finally:
+            # Se alguma verificação barrou a compra, a quote especulativa é descartada
+            if prefetch:
+                prefetch.discard()
+    
+    async def _check_and_buy(self, token_info, trace: LatencyTrace, prefetch=None):
+        """Verificações pré-compra (estado, blacklist, limites, saldo, janela) e compra"""
         # Verifica estado do bot (pode ser alterado via interface web)
-        if not get_bot_state():
+        enabled = get_bot_state()
+        trace.mark('bot_state')
+        if not enabled:
             # Não mostra mensagem para cada token quando desativado
             # A mensagem principal já foi mostrada pelo monitor
             return
         
         # Verifica blacklist (O(1) - muito rápido)
-        if is_blacklisted(token_info.contract_address):
+        blacklisted = is_blacklisted(token_info.contract_address)
+        trace.mark('blacklist')
+        if blacklisted:
             log_warning(f"Token {token_info.symbol} está na blacklist - ignorado")
             return
         
@@ -141,9 +188,11 @@ class TradingBot:
             if limit_reached:
                 log_warning(f"Limite de perda diário atingido! Perda: {stats['total_loss']:.4f} SOL")
                 return
+        trace.mark('daily_loss')
         
         # Recarrega config antes de usar (para pegar valores atualizados via interface web)
         config.reload_config()
+        trace.mark('config_reload')
         
         # Get amount based on score (em SOL)
         amount_sol = config.get_amount_by_score(token_info.score)
@@ -157,17 +206,6 @@ class TradingBot:
             log_info(f"⏭️  Token {token_info.symbol} com score {token_info.score} acima do máximo ({config.MAX_SCORE})")
             return
         
-        # Verifica saldo rapidamente (antes de comprar)
-        try:
-            balance = await get_wallet_balance()
-            required_sol = amount_sol + 0.01  # +0.01 para taxas
-            if balance['sol'] < required_sol:
-                log_warning(f"Saldo insuficiente: {balance['sol']:.4f} SOL (precisa {required_sol:.4f} SOL)")
-                return
-        except Exception as e:
-            log_error(f"Erro ao verificar saldo: {e}")
-            # Continua mesmo assim (não bloqueia)
-        
         # Check time window for buying (regra de timing)
         max_time_minutes = config.get_max_time_by_score(token_info.score)
         if token_info.minutes_detected is not None:
@@ -181,6 +219,19 @@ class TradingBot:
         if token_info.contract_address in self.active_trades:
             log_info(f"⏭️  Token {token_info.symbol} já está sendo negociado")
             return
+        trace.mark('gates')
+        
+        # Reserva amount_sol + taxas no saldo em memória (verificação e reserva atômicas, sem RPC)
+        # Também barra uma segunda compra do mesmo token enquanto esta não termina
+        try:
+            reservation = self.capital.reserve(token_info.contract_address, amount_sol)
+        except CapitalReservationError as e:
+            log_warning(str(e))
+            return
+        if self.wallet_balance.sol is None:
+            log_warning("Saldo da carteira ainda desconhecido - comprando sem verificar")
+            # Continua mesmo assim (não bloqueia)
+        trace.mark('capital')
         
         log_info(f"\n🚀 Novo token detectado!")
         log_info(f"   Símbolo: {token_info.symbol}")
@@ -195,10 +246,15 @@ class TradingBot:
         try:
             tx_signature, quote = await self.jupiter.buy_token(
                 token_info.contract_address,
-                amount_sol
+                amount_sol,
+                trace=trace,
+                prefetched_quote=prefetch
             )
+            # Gasto real já entrou no saldo em memória se a confirmação trouxe os valores da TX
+            self.capital.settle(reservation, balance_updated=quote.get('from_balance', False))
             
             log_success(f"Compra realizada! TX: {tx_signature}")
+            log_info(f"   ⏱️  Latência sinal → envio da TX: {trace.ms_until('send'):.0f} ms (total com confirmação: {trace.total_ms():.0f} ms)")
             
             # Get valores reais da transação Jupiter
             amount_tokens = int(quote.get('outAmount', 0))
@@ -251,12 +307,14 @@ class TradingBot:
                 entry_price,  # Preço real da Jupiter
                 real_amount_sol,  # SOL real gasto
                 token_info.score,
-                tx_signature
+                tx_signature,
+                latency=trace.to_dict()
             )
             
             log_info(f"📊 Posição monitorada: {token_info.symbol} @ ${entry_price:.10f} (preço real Jupiter)")
         
         except Exception as e:
+            self.capital.release(reservation)  # Ignorado se a compra já tinha sido liquidada
             log_error(f"Erro ao comprar token {token_info.symbol}: {e}")
     
     async def _monitor_bot_state(self):
@@ -404,6 +462,11 @@ class TradingBot:
             log_error(f"Erro ao buscar grupo: {e}")
             raise
         
+        # Inicia fila write-behind antes de receber mensagens
+        self.detection_writer.start()
+        await self.event_bus.start()
+        await self.wallet_balance.ensure_started()
+        
         # Register event handler usando o ID do grupo
         @self.client.on(events.NewMessage(chats=target_chat_id))
         async def handler(event):
@@ -439,10 +502,22 @@ class TradingBot:
                 await monitor_task
             except asyncio.CancelledError:
                 pass
+            # Grava detecções pendentes antes de sair
+            await self.detection_writer.stop()
     
     async def stop(self):
         """Stop the bot"""
+        await self.event_bus.stop()
+        await self.detection_writer.stop()
+        await self.tp_manager.stop()
+        await self.wallet_balance.stop()
+        close_tracker()
         await self.jupiter.close()
+        stats = get_http_stats()
+        log_info(f"🌐 HTTP: {stats['requests']} requisições, {stats['connections_reused']} conexões reutilizadas, {stats['connections_created']} novas")
+        price_stats = get_price_stats()['cache']
+        log_info(f"💲 Preços: {price_stats['hits']} do cache, {price_stats['coalesced']} compartilhados, {price_stats['misses']} buscados")
+        await close_http_sessions()
         await self.client.disconnect()
 
 async def main():
@@ -0,0 +1,68 @@
+"""
+Comandos que a interface web envia ao bot pelo canal de eventos (ver event_bus.py)
+Cada comando aplica a mudança no processo do bot na hora (sem esperar polling) e continua
+gravando o arquivo correspondente, que segue sendo a fonte persistente.
+"""
+import asyncio
+import config
+from bot_control import get_bot_state, set_bot_state
+from detected_tokens_tracker import update_token_prices_batch
+from event_bus import EventBusServer
+from state_cache import get_state_cache
+from token_blacklist import add_to_blacklist, remove_from_blacklist
+from trading_config import CONFIG_FILE
+
+def register_bot_commands(bus: EventBusServer, tp_manager):
+    """Registra os comandos do bot no servidor de eventos"""
+
+    def set_state(args):
+        enabled = set_bot_state(bool(args.get('enabled', True)))
+        bus.publish('bot_state', {'enabled': enabled})
+        return {'enabled': enabled}
+
+    def blacklist_add(args):
+        add_to_blacklist(args['contract_address'])
+        return {'contract_address': args['contract_address']}
+
+    def blacklist_remove(args):
+        remove_from_blacklist(args['contract_address'])
+        return {'contract_address': args['contract_address']}
+
+    def config_changed(args):
+        # A interface já gravou .env / trading_config.json: relê agora em vez de esperar a notificação
+        get_state_cache().invalidate(CONFIG_FILE)
+        config.reload_config(force=True)
+        return {'reloaded': True}
+
+    def update_trade_prices(args):
+        # Preços buscados pela interface: aplicados na cópia em memória dos trades ativos do bot
+        # (o banco recebe no próximo flush - a interface não regrava as linhas por conta própria)
+        from trade_tracker_integration import log_trade_update
+        updated = 0
+        for ca, price in (args.get('prices') or {}).items():
+            if price and float(price) > 0 and log_trade_update(ca, current_price=float(price)):
+                updated += 1
+        return {'updated': updated}
+
+    async def update_detected_prices(args):
+        # Preços buscados pela interface: aplicados no registro residente (gravado no próximo snapshot).
+        # Em thread: até MAX_TOKENS tokens + gravação do histórico (e talvez compactação) não travam
+        # o loop que trata os sinais
+        prices = {ca: float(price) for ca, price in (args.get('prices') or {}).items() if price}
+        return {'tokens': await asyncio.to_thread(update_token_prices_batch, prices)}
+
+    async def manual_sell(args):
+        result = await tp_manager.manual_sell(args['contract_address'], float(args.get('sell_percent', 100.0)))
+        if result is None:
+            # Posição não está sendo monitorada (ex: comprada antes de reiniciar) - interface vende sozinha
+            return {'success': False, 'not_monitored': True}
+        return result
+
+    bus.on_command('get_bot_state', lambda args: {'enabled': get_bot_state()})
+    bus.on_command('set_bot_state', set_state)
+    bus.on_command('blacklist_add', blacklist_add)
+    bus.on_command('blacklist_remove', blacklist_remove)
+    bus.on_command('config_changed', config_changed)
+    bus.on_command('update_trade_prices', update_trade_prices)
+    bus.on_command('update_detected_prices', update_detected_prices)
+    bus.on_command('manual_sell', manual_sell)
@@ -3,15 +3,14 @@ Controle de ativação/desativação do bot
 """
 import os
 import json
+from state_cache import get_state_cache, watch_file
 
 BOT_STATE_FILE = 'bot_state.json'
 
-def get_bot_state():
-    """Retorna estado atual do bot"""
-    if os.path.exists(BOT_STATE_FILE):
+def _load_bot_state(path: str) -> bool:
+    if os.path.exists(path):
         try:
-            # Lê o arquivo toda vez (sem cache) para detectar mudanças
-            with open(BOT_STATE_FILE, 'r', encoding='utf-8') as f:
+            with open(path, 'r', encoding='utf-8') as f:
                 state = json.load(f)
                 return state.get('enabled', True)
         except Exception as e:
@@ -19,11 +18,18 @@ def get_bot_state():
             return True
     return True  # Por padrão, ativado
 
+def get_bot_state():
+    """Retorna estado atual do bot
+    Em cache: o arquivo só é relido quando muda (a interface web grava, o bot percebe na hora)
+    """
+    return watch_file(BOT_STATE_FILE, _load_bot_state).get()
+
 def set_bot_state(enabled: bool):
     """Define estado do bot"""
     with open(BOT_STATE_FILE, 'w') as f:
         json.dump({'enabled': enabled}, f, indent=2)
         f.flush()  # Garante que o arquivo é salvo imediatamente
         os.fsync(f.fileno())  # Força escrita no disco
+    get_state_cache().invalidate(BOT_STATE_FILE)
     return enabled
 
@@ -0,0 +1,148 @@
+"""
+Reserva local de capital para compras simultâneas
+Cada compra reserva amount_sol + taxas antes de enviar a transação: sinais que chegam juntos
+disputam o saldo em memória (wallet_balance) descontando o que já está reservado, em vez de
+todos conferirem o mesmo saldo on-chain desatualizado. A reserva também bloqueia uma segunda
+compra do mesmo token enquanto a primeira está em andamento. Nenhuma chamada RPC.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import config
+from wallet_balance import WalletBalanceService, get_wallet_balance_service
+
+# Prazo máximo para uma transação enviada ainda entrar num bloco (validade do blockhash, ~150 slots)
+TX_LANDING_WINDOW_SECONDS = 90.0
+
+class CapitalReservationError(Exception):
+    """Compra recusada: saldo livre insuficiente ou compra do mesmo token em andamento"""
+
+class Reservation:
+    """Capital separado para uma compra em andamento"""
+    __slots__ = ('contract_address', 'amount_sol', 'fee_sol', 'created_at')
+
+    def __init__(self, contract_address: str, amount_sol: float, fee_sol: float):
+        self.contract_address = contract_address
+        self.amount_sol = amount_sol
+        self.fee_sol = fee_sol
+        self.created_at = time.time()
+
+    @property
+    def total_sol(self) -> float:
+        return self.amount_sol + self.fee_sol
+
+class CapitalLedger:
+    def __init__(self, balance_service: WalletBalanceService = None, fee_reserve: float = None):
+        """
+        Args:
+            balance_service: Fonte do saldo em memória (padrão: serviço do processo)
+            fee_reserve: SOL reservado para taxas em cada compra (padrão: BUY_FEE_RESERVE_SOL)
+        """
+        self.balance_service = balance_service or get_wallet_balance_service()
+        self.fee_reserve = config.BUY_FEE_RESERVE_SOL if fee_reserve is None else fee_reserve
+        self._lock = threading.RLock()
+        self._reservations: Dict[str, Reservation] = {}  # Compras em andamento por contract address
+        # Compras enviadas cujo gasto real não chegou ao saldo em memória (confirmação sem detalhes):
+        # [(horário a partir do qual a TX não entra mais, SOL)] - o valor fica preso até uma leitura
+        # RPC (no commitment das confirmações) iniciada depois disso, que com certeza já inclui o gasto
+        self._held: List[Tuple[float, float]] = []
+        self.stats = {'reserved': 0, 'settled': 0, 'released': 0, 'refused_balance': 0, 'refused_duplicate': 0}
+
+    def _held_sol(self) -> float:
+        rpc_at = self.balance_service.last_rpc_request_at
+        if rpc_at is not None:
+            self._held = [(landed_by, sol) for landed_by, sol in self._held if landed_by > rpc_at]
+        return sum(sol for _, sol in self._held)
+
+    def _committed_sol(self) -> float:
+        return sum(r.total_sol for r in self._reservations.values()) + self._held_sol()
+
+    def available_sol(self) -> Optional[float]:
+        """Saldo em memória menos o que está reservado (None se o saldo ainda não foi lido)"""
+        balance = self.balance_service.sol
+        if balance is None:
+            return None
+        with self._lock:
+            return balance - self._committed_sol()
+
+    def reserve(self, contract_address: str, amount_sol: float, require_balance: bool = False) -> Reservation:
+        """Separa amount_sol + taxas para a compra (verificação e reserva atômicas)
+        Args:
+            require_balance: Recusa se o saldo ainda não foi lido (False: só bloqueia duplicadas)
+        Raises:
+            CapitalReservationError: saldo livre insuficiente ou compra do token já em andamento
+        """
+        reservation = Reservation(contract_address, amount_sol, self.fee_reserve)
+        with self._lock:
+            if contract_address in self._reservations:
+                self.stats['refused_duplicate'] += 1
+                raise CapitalReservationError(f"Compra de {contract_address[:8]}... já em andamento")
+            balance = self.balance_service.sol
+            if balance is None:
+                if require_balance:
+                    self.stats['refused_balance'] += 1
+                    raise CapitalReservationError("Saldo da carteira ainda não foi lido")
+            else:
+                available = balance - self._committed_sol()
+                if available < reservation.total_sol:
+                    self.stats['refused_balance'] += 1
+                    raise CapitalReservationError(
+                        f"Saldo insuficiente: {available:.4f} SOL livres de {balance:.4f} SOL "
+                        f"(precisa {reservation.total_sol:.4f} SOL)"
+                    )
+            self._reservations[contract_address] = reservation
+            self.stats['reserved'] += 1
+        return reservation
+
+    def _pop(self, reservation: Reservation) -> bool:
+        if self._reservations.get(reservation.contract_address) is not reservation:
+            return False  # Já liquidada/liberada
+        del self._reservations[reservation.contract_address]
+        return True
+
+    def settle(self, reservation: Reservation, balance_updated: bool = True):
+        """Compra executada: solta a reserva
+        Args:
+            balance_updated: False se o gasto real não foi aplicado no saldo em memória
+                             (confirmação sem detalhes) - o valor fica preso até uma leitura RPC
+                             iniciada depois do prazo em que a TX ainda poderia entrar num bloco
+        """
+        with self._lock:
+            if not self._pop(reservation):
+                return
+            if not balance_updated:
+                self._held.append((time.time() + TX_LANDING_WINDOW_SECONDS, reservation.total_sol))
+            self.stats['settled'] += 1
+
+    def release(self, reservation: Reservation):
+        """Compra falhou/desistiu: devolve o capital (chamadas depois de settle são ignoradas)"""
+        with self._lock:
+            if self._pop(reservation):
+                self.stats['released'] += 1
+
+    def is_pending(self, contract_address: str) -> bool:
+        return contract_address in self._reservations
+
+    def get_stats(self) -> Dict:
+        """Reservas em andamento e saldo livre"""
+        with self._lock:
+            return {
+                **self.stats,
+                'pending': {ca: round(r.total_sol, 6) for ca, r in self._reservations.items()},
+                'reserved_sol': round(sum(r.total_sol for r in self._reservations.values()), 6),
+                'held_sol': round(self._held_sol(), 6),
+                'available_sol': self.available_sol()
+            }
+
+# Instância global (singleton)
+_ledger: Optional[CapitalLedger] = None
+_ledger_lock = threading.Lock()
+
+def get_capital_ledger() -> CapitalLedger:
+    """Retorna a reserva de capital do processo (singleton)"""
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = CapitalLedger()
+    return _ledger
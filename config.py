@@ -1,5 +1,5 @@
 import os
-from dotenv import load_dotenv
+from dotenv import find_dotenv, load_dotenv
 
 load_dotenv()
 
@@ -25,6 +25,47 @@ RPC_URL = os.getenv('RPC_URL', 'https://api.mainnet-beta.solana.com')  # Use Alc
 BIRDEYE_API_KEY = os.getenv('BIRDEYE_API_KEY', '')  # Opcional: https://birdeye.so
 JUPITER_API_KEY = os.getenv('JUPITER_API_KEY', '')  # Opcional: Para reduzir rate limits
 
+# HTTP (sessão compartilhada por processo - ver http_session.py)
+HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', '100'))  # Conexões simultâneas no total
+HTTP_LIMIT_PER_HOST = int(os.getenv('HTTP_LIMIT_PER_HOST', '20'))  # Conexões simultâneas por host
+HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL', '300'))  # Cache de DNS (segundos)
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '60'))  # Mantém conexões ociosas abertas (segundos)
+HTTP_TIMEOUT_SECONDS = float(os.getenv('HTTP_TIMEOUT_SECONDS', '15'))  # Timeout padrão por requisição
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))  # Timeout para abrir conexão
+
+# Hedge entre endpoints da Jupiter (ver EndpointHedger em jupiter_client.py)
+JUPITER_HEDGE_DELAY_MS = int(os.getenv('JUPITER_HEDGE_DELAY_MS', '0'))  # Prazo fixo antes de disparar o fallback (0 = p95 automático)
+JUPITER_HEDGE_MIN_MS = int(os.getenv('JUPITER_HEDGE_MIN_MS', '150'))  # Limite inferior do prazo automático
+JUPITER_HEDGE_MAX_MS = int(os.getenv('JUPITER_HEDGE_MAX_MS', '1500'))  # Limite superior (e prazo inicial sem histórico)
+
+# Confirmação de transações (ver confirmation_tracker.py)
+CONFIRMATION_COMMITMENT = os.getenv('CONFIRMATION_COMMITMENT', 'confirmed').lower()  # processed, confirmed ou finalized
+CONFIRMATION_POLL_INTERVAL_MS = int(os.getenv('CONFIRMATION_POLL_INTERVAL_MS', '400'))  # Intervalo entre consultas em lote
+CONFIRMATION_TIMEOUT_SECONDS = float(os.getenv('CONFIRMATION_TIMEOUT_SECONDS', '60'))  # Prazo máximo por transação
+
+# Envio de transações (ver tx_broadcaster.py)
+SEND_RPC_URLS = [url.strip() for url in os.getenv('SEND_RPC_URLS', '').split(',') if url.strip()]  # Vazio = só RPC_URL
+SKIP_PREFLIGHT = os.getenv('SKIP_PREFLIGHT', 'false').lower() == 'true'  # Pula simulação antes de enviar
+REBROADCAST_INTERVAL_MS = int(os.getenv('REBROADCAST_INTERVAL_MS', '2000'))  # Reenvio até confirmar (0 = desativado)
+
+# Histórico de trades (ver trade_store.py)
+TRADES_DB_FILE = os.getenv('TRADES_DB_FILE', 'trades.db')  # Banco SQLite (importa trades_history.json na primeira execução)
+TRADES_FLUSH_INTERVAL_SECONDS = float(os.getenv('TRADES_FLUSH_INTERVAL_SECONDS', '5'))  # Agrupa atualizações de preço (compras/vendas gravam na hora)
+
+# Histórico de preços dos tokens detectados (ver price_history_store.py)
+PRICE_HISTORY_FILE = os.getenv('PRICE_HISTORY_FILE', 'price_history.bin')  # Arquivo binário só-append
+PRICE_HISTORY_POINTS = int(os.getenv('PRICE_HISTORY_POINTS', '100'))  # Pontos mantidos por token
+DETECTED_TOKENS_SNAPSHOT_SECONDS = float(os.getenv('DETECTED_TOKENS_SNAPSHOT_SECONDS', '2'))  # Bot grava detected_tokens.json a cada X segundos (se mudou)
+
+# Canal de eventos bot ↔ interface web (ver event_bus.py)
+EVENT_BUS_SOCKET = os.getenv('EVENT_BUS_SOCKET', 'bot_events.sock')  # Socket Unix (Linux/Mac)
+EVENT_BUS_PORT = int(os.getenv('EVENT_BUS_PORT', '5055'))  # Porta TCP local (Windows, sem socket Unix)
+EVENT_BUS_TOKEN_FILE = os.getenv('EVENT_BUS_TOKEN_FILE', 'bot_events.token')  # Token sorteado a cada execução do bot (só a interface local lê)
+WEB_TRADE_TIMEOUT_SECONDS = float(os.getenv('WEB_TRADE_TIMEOUT_SECONDS', '90'))  # Espera máxima da interface por compra/venda manual
+WALLET_BALANCE_REFRESH_SECONDS = float(os.getenv('WALLET_BALANCE_REFRESH_SECONDS', '15'))  # Releitura do saldo via RPC em segundo plano
+WALLET_BALANCE_MAX_AGE_SECONDS = float(os.getenv('WALLET_BALANCE_MAX_AGE_SECONDS', '120'))  # Saldo mais velho que isso é marcado como desatualizado
+BUY_FEE_RESERVE_SOL = float(os.getenv('BUY_FEE_RESERVE_SOL', '0.01'))  # SOL reservado para taxas em cada compra (além do valor da compra)
+
 # Trading
 SLIPPAGE_BPS = int(os.getenv('SLIPPAGE_BPS', '1000'))  # 10% padrão (1000 bps = 10%)
 MIN_SCORE = int(os.getenv('MIN_SCORE', '15'))
@@ -53,6 +94,19 @@ MAX_TIME_MINUTES_18_19 = int(os.getenv('MAX_TIME_MINUTES_18_19', '5'))
 # Score 20-21: só se imediato (0 minutos = primeiro minuto)
 MAX_TIME_MINUTES_20_21 = int(os.getenv('MAX_TIME_MINUTES_20_21', '1'))
 
+# Intervalo de verificação de preço das posições abertas (segundos) - um ciclo busca todas em lote
+PRICE_POLL_INTERVAL_SECONDS = float(os.getenv('PRICE_POLL_INTERVAL_SECONDS', '10'))
+# Validade do preço em cache (segundos) - chamadas simultâneas do mesmo token compartilham a busca
+PRICE_CACHE_TTL_SECONDS = float(os.getenv('PRICE_CACHE_TTL_SECONDS', '3'))
+# Modo de busca de preço: 'fallback' (uma fonte por vez, na ordem) ou 'consensus' (todas em paralelo)
+PRICE_MODE = os.getenv('PRICE_MODE', 'fallback').lower()
+PRICE_CONSENSUS_DEADLINE_MS = int(os.getenv('PRICE_CONSENSUS_DEADLINE_MS', '2500'))  # Prazo único para todas as fontes
+PRICE_CONSENSUS_TOLERANCE = float(os.getenv('PRICE_CONSENSUS_TOLERANCE', '0.05'))  # Diferença máxima para fontes "concordarem" (5%)
+PRICE_CONSENSUS_MIN_AGREE = int(os.getenv('PRICE_CONSENSUS_MIN_AGREE', '2'))  # Fontes concordando para responder antes do prazo
+PRICE_BREAKER_FAILURES = int(os.getenv('PRICE_BREAKER_FAILURES', '3'))  # Falhas seguidas para desativar uma fonte
+PRICE_BREAKER_COOLDOWN_SECONDS = float(os.getenv('PRICE_BREAKER_COOLDOWN_SECONDS', '30'))  # Tempo desativada
+PRICE_REFRESH_CONCURRENCY = int(os.getenv('PRICE_REFRESH_CONCURRENCY', '8'))  # Buscas individuais simultâneas na atualização manual (interface)
+
 # Stop Loss por Tempo - Se token não subir em X minutos, vende tudo
 # Baseado na média: tokens que dão certo começam a subir em 1-5 minutos
 # Se não subiu em 5 minutos, provavelmente não vai subir
@@ -103,14 +157,33 @@ def get_max_time_by_score(score: int) -> int:
     else:
         return 0  # Não compra se não tem regra definida
 
-def reload_config():
-    """Recarrega configurações do .env (útil quando valores são atualizados via interface web)"""
+# .env em cache (ver state_cache.py) - criado na primeira chamada de reload_config
+_env_file = None
+
+def reload_config(force: bool = False):
+    """Recarrega configurações do .env (útil quando valores são atualizados via interface web)
+    O arquivo só é relido quando muda - nas demais chamadas o custo é uma leitura de memória
+    Args:
+        force: Relê mesmo sem notificação de mudança (ex: interface avisou que acabou de gravar)
+    """
+    global _env_file
+    if _env_file is None:
+        from state_cache import watch_file
+        env_path = find_dotenv() or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+        _env_file = watch_file(env_path, _load_env_values)
+    if force:
+        _env_file.invalidate()
+    _env_file.get()
+
+def _load_env_values(env_path: str) -> bool:
+    """Aplica os valores editáveis pela interface web a partir do .env"""
     global AMOUNT_SOL_15_17, AMOUNT_SOL_18_19, AMOUNT_SOL_20_21, AMOUNT_SOL_LOW
     global ENABLE_LOW_SCORE
     global MAX_TIME_MINUTES_15_17, MAX_TIME_MINUTES_18_19, MAX_TIME_MINUTES_20_21
     
     # Recarrega valores do .env
-    load_dotenv(override=True)  # override=True força recarregar
+    if os.path.exists(env_path):
+        load_dotenv(env_path, override=True)  # override=True força recarregar
     
     AMOUNT_SOL_15_17 = float(os.getenv('AMOUNT_SOL_15_17', '0.05'))
     AMOUNT_SOL_18_19 = float(os.getenv('AMOUNT_SOL_18_19', '0.03'))
@@ -120,4 +193,5 @@ def reload_config():
     MAX_TIME_MINUTES_15_17 = int(os.getenv('MAX_TIME_MINUTES_15_17', '3'))
     MAX_TIME_MINUTES_18_19 = int(os.getenv('MAX_TIME_MINUTES_18_19', '5'))
     MAX_TIME_MINUTES_20_21 = int(os.getenv('MAX_TIME_MINUTES_20_21', '1'))
+    return True
 
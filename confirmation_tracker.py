@@ -0,0 +1,165 @@
+"""
+Rastreador de confirmação de transações
+Uma única tarefa consulta getSignatureStatuses em lote para todas as assinaturas pendentes
+e resolve o future de cada trade assim que ela atinge o commitment pedido
+(substitui o sleep fixo antes de ler o saldo)
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional
+import aiohttp
+from http_session import shared_session
+
+# Ordem dos níveis de commitment da Solana
+COMMITMENT_LEVELS = {'processed': 0, 'confirmed': 1, 'finalized': 2}
+MAX_SIGNATURES_PER_CALL = 256  # Limite do RPC para getSignatureStatuses
+
+class TransactionFailedError(Exception):
+    """Transação entrou na blockchain mas falhou (o erro on-chain vai no texto, ex: Custom 6001)"""
+    def __init__(self, signature: str, err):
+        self.signature = signature
+        self.err = err
+        super().__init__(f"Transação falhou on-chain ({signature[:8]}...): {err}")
+
+class ConfirmationTimeoutError(Exception):
+    """Transação não atingiu o commitment dentro do prazo (pode ainda confirmar depois)"""
+    pass
+
+class ConfirmationTracker:
+    def __init__(self, rpc_url: str, poll_interval: float = 0.4, timeout: float = 60.0):
+        """
+        Args:
+            rpc_url: Endpoint JSON-RPC da Solana
+            poll_interval: Segundos entre consultas em lote
+            timeout: Prazo padrão para cada assinatura (segundos)
+        """
+        self.rpc_url = rpc_url
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._pending: Dict[str, List[Dict]] = {}  # {assinatura: [{'future', 'commitment', 'started_at'}]}
+        self._task: Optional[asyncio.Task] = None
+        self._loop = None
+        self._request_id = 0
+        self.stats = {'rpc_calls': 0, 'confirmed': 0, 'failed': 0, 'timeouts': 0}
+
+    async def wait_for(self, signature: str, commitment: str = 'confirmed', timeout: float = None) -> Dict:
+        """Aguarda a assinatura atingir o commitment
+        Returns: status retornado pelo RPC ({'slot', 'confirmationStatus', 'err', ...}) + 'elapsed_ms'
+        Raises:
+            TransactionFailedError: transação falhou on-chain
+            ConfirmationTimeoutError: não confirmou dentro do prazo
+        """
+        if commitment not in COMMITMENT_LEVELS:
+            raise ValueError(f"Commitment inválido: {commitment}")
+        self._ensure_running()
+        timeout = timeout or self.timeout
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = {'future': future, 'commitment': commitment, 'started_at': time.monotonic()}
+        self._pending.setdefault(signature, []).append(waiter)
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise ConfirmationTimeoutError(
+                f"Transação {signature[:8]}... não atingiu '{commitment}' em {timeout:g}s"
+            )
+        finally:
+            waiters = self._pending.get(signature)
+            if waiters and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._pending[signature]
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            # Futures de outro event loop (ex: interface web cria loops novos) não servem mais
+            self._pending.clear()
+            self._loop = loop
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        """Consulta todas as assinaturas pendentes numa única chamada por ciclo"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._pending:
+                continue
+
+            signatures = list(self._pending.keys())
+            for start in range(0, len(signatures), MAX_SIGNATURES_PER_CALL):
+                chunk = signatures[start:start + MAX_SIGNATURES_PER_CALL]
+                try:
+                    statuses = await self._get_signature_statuses(chunk)
+                except Exception as e:
+                    print(f"⚠️  Erro ao consultar status de {len(chunk)} transação(ões): {e}")
+                    continue
+                for signature, status in zip(chunk, statuses):
+                    self._resolve(signature, status)
+
+    def _resolve(self, signature: str, status: Optional[Dict]):
+        """Resolve quem falhou ou atingiu o commitment pedido"""
+        waiters = self._pending.get(signature)
+        if not waiters or status is None:
+            return  # Ainda não visto pelo RPC
+
+        if status.get('err') is not None:
+            del self._pending[signature]
+            self.stats['failed'] += 1
+            for waiter in waiters:
+                if not waiter['future'].done():
+                    waiter['future'].set_exception(TransactionFailedError(signature, status['err']))
+            return
+
+        reached = COMMITMENT_LEVELS.get(status.get('confirmationStatus') or 'processed', 0)
+        remaining = []
+        for waiter in waiters:
+            if waiter['future'].done():
+                continue
+            if reached >= COMMITMENT_LEVELS[waiter['commitment']]:
+                self.stats['confirmed'] += 1
+                result = dict(status)
+                result['elapsed_ms'] = round((time.monotonic() - waiter['started_at']) * 1000, 1)
+                waiter['future'].set_result(result)
+            else:
+                remaining.append(waiter)
+        if remaining:
+            self._pending[signature] = remaining
+        else:
+            del self._pending[signature]
+
+    async def _get_signature_statuses(self, signatures: list) -> list:
+        """Chamada JSON-RPC crua (funciona com qualquer RPC, inclusive um servidor local de teste)"""
+        self._request_id += 1
+        payload = {
+            'jsonrpc': '2.0',
+            'id': self._request_id,
+            'method': 'getSignatureStatuses',
+            'params': [signatures, {'searchTransactionHistory': False}]
+        }
+        self.stats['rpc_calls'] += 1
+        async with shared_session() as session:
+            async with session.post(self.rpc_url, json=payload, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                data = await response.json(content_type=None)
+        if 'error' in data:
+            raise Exception(f"RPC retornou erro: {data['error']}")
+        return data['result']['value']
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def stop(self):
+        """Cancela a tarefa de consulta e quem ainda estava esperando"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        for waiters in self._pending.values():
+            for waiter in waiters:
+                if not waiter['future'].done():
+                    waiter['future'].cancel()
+        self._pending.clear()
@@ -1,25 +1,19 @@
 """
-Script para converter TODOS os trades para SOL
+Script para converter TODOS os trades para SOL (banco SQLite do histórico)
+Pare o bot antes: ele mantém os trades ativos em memória e desfaria a conversão
 """
-import json
-import os
 import sys
 import io
+from trade_store import TradeHistoryEdit
 
 # Configura encoding para Windows
 if sys.stdout.encoding != 'utf-8':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
-TRADES_FILE = 'trades_history.json'
-
 def converter_todos_para_sol():
     """Converte todos os campos USDC para SOL"""
-    if not os.path.exists(TRADES_FILE):
-        print(f"Arquivo {TRADES_FILE} nao encontrado")
-        return
-    
-    with open(TRADES_FILE, 'r', encoding='utf-8') as f:
-        trades = json.load(f)
+    history = TradeHistoryEdit()
+    trades = history.trades
     
     convertidos = 0
     
@@ -60,11 +54,11 @@ def converter_todos_para_sol():
             convertidos += 1
     
     if convertidos > 0:
-        with open(TRADES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(trades, f, indent=2, ensure_ascii=False)
+        history.commit()
         print(f"\n[OK] {convertidos} trades convertidos para SOL!")
     else:
         print("[OK] Nenhum trade precisa ser convertido")
+    history.close()
     
     # Mostra resumo
     print(f"\nResumo:")
@@ -1,24 +1,19 @@
 """
 Script para corrigir preços de entrada inválidos nos trades
 Usa o preço inicial do token detectado como referência
+Pare o bot antes: ele mantém os trades ativos em memória e desfaria a correção
 """
-import json
-import os
 from detected_tokens_tracker import get_all_detected_tokens
+from trade_store import TradeHistoryEdit
 
-TRADES_FILE = 'trades_history.json'
 DETECTED_TOKENS_FILE = 'detected_tokens.json'
 
 def corrigir_precos_entrada():
     """Corrige preços de entrada inválidos usando preço inicial detectado"""
     
-    # Carrega trades
-    if not os.path.exists(TRADES_FILE):
-        print("ERRO: Arquivo trades_history.json nao encontrado")
-        return
-    
-    with open(TRADES_FILE, 'r', encoding='utf-8') as f:
-        trades_data = json.load(f)
+    # Carrega trades (banco SQLite do histórico)
+    history = TradeHistoryEdit()
+    trades_data = history.trades
     
     # Carrega tokens detectados
     detected_tokens = get_all_detected_tokens(limit=1000)
@@ -84,19 +79,18 @@ def corrigir_precos_entrada():
             corrigidos += 1
     
     if corrigidos > 0:
-        # Salva backup
-        backup_file = f'trades_history_backup_antes_correcao_{os.path.basename(TRADES_FILE)}'
-        with open(backup_file, 'w', encoding='utf-8') as f:
-            json.dump(trades_data, f, indent=2, ensure_ascii=False)
+        # Salva backup do banco antes de gravar
+        backup_file = f'{history.store.path}.backup_antes_correcao'
+        history.store.backup(backup_file)
         print(f"\nBackup criado: {backup_file}")
         
-        # Salva corrigido
-        with open(TRADES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(trades_data, f, indent=2, ensure_ascii=False)
+        # Salva só os trades corrigidos
+        history.commit()
         
         print(f"\n{corrigidos} trade(s) corrigido(s)!")
     else:
         print("Nenhum trade precisa de correcao")
+    history.close()
 
 if __name__ == '__main__':
     print("Corrigindo precos de entrada invalidos...\n")
@@ -2,23 +2,22 @@
 Script para corrigir time_to_sell nos trades vendidos manualmente
 Recalcula baseado nos timestamps reais de compra e venda
 """
-import json
 import sys
 import io
 from datetime import datetime, timezone
+from trade_store import TradeHistoryEdit
 
 # Garante encoding UTF-8 para Windows
 if sys.stdout.encoding != 'utf-8':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
-TRADES_FILE = 'trades_history.json'
-
 def corrigir_time_to_sell():
     """Corrige time_to_sell para todos os trades vendidos manualmente"""
+    history = None
     try:
-        # Carrega trades
-        with open(TRADES_FILE, 'r', encoding='utf-8') as f:
-            trades = json.load(f)
+        # Carrega trades (banco SQLite do histórico)
+        history = TradeHistoryEdit()
+        trades = history.trades
         
         corrigidos = 0
         
@@ -74,15 +73,17 @@ def corrigir_time_to_sell():
                         print(f"❌ Erro ao corrigir {trade.get('symbol', 'N/A')}: {e}")
         
         if corrigidos > 0:
-            # Salva correções
-            with open(TRADES_FILE, 'w', encoding='utf-8') as f:
-                json.dump(trades, f, indent=2, ensure_ascii=False)
+            # Salva só os trades corrigidos
+            history.commit()
             print(f"\n✅ {corrigidos} trade(s) corrigido(s)!")
         else:
             print("\n✓ Nenhuma correção necessária.")
             
     except Exception as e:
         print(f"❌ Erro: {e}")
+    finally:
+        if history is not None:
+            history.close()
 
 if __name__ == '__main__':
     corrigir_time_to_sell()
@@ -1,27 +1,22 @@
 """
-Script para corrigir valores em trades_history.json
+Script para corrigir valores no histórico de trades (banco SQLite)
 Converte amount_usdc de SOL para USDC (multiplica por 100)
+Pare o bot antes: ele mantém os trades ativos em memória e desfaria a correção
 """
-import json
-import os
 import sys
 import io
+from trade_store import TradeHistoryEdit
 
 # Configura encoding para Windows
 if sys.stdout.encoding != 'utf-8':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
-TRADES_FILE = 'trades_history.json'
 SOL_TO_USD_RATE = 100.0  # 1 SOL ≈ $100
 
 def corrigir_trades():
-    """Corrige valores de SOL para USDC no arquivo de trades"""
-    if not os.path.exists(TRADES_FILE):
-        print(f"Arquivo {TRADES_FILE} não encontrado")
-        return
-    
-    with open(TRADES_FILE, 'r', encoding='utf-8') as f:
-        trades = json.load(f)
+    """Corrige valores de SOL para USDC no histórico de trades"""
+    history = TradeHistoryEdit()
+    trades = history.trades
     
     corrigidos = 0
     
@@ -49,15 +44,15 @@ def corrigir_trades():
             corrigidos += 1
     
     if corrigidos > 0:
-        # Salva arquivo corrigido
-        with open(TRADES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(trades, f, indent=2, ensure_ascii=False)
+        # Salva só os trades corrigidos
+        history.commit()
         print(f"\n[OK] {corrigidos} trades corrigidos e salvos!")
     else:
         print("[OK] Nenhum trade precisa ser corrigido")
+    history.close()
 
 if __name__ == '__main__':
-    print("Corrigindo valores em trades_history.json...")
+    print("Corrigindo valores no historico de trades...")
     print("=" * 50)
     corrigir_trades()
     print("=" * 50)
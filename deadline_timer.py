@@ -0,0 +1,132 @@
+"""
+Temporizador de prazos (stop loss por tempo e outras regras baseadas em tempo)
+Todos os prazos ficam num heap e uma única tarefa dorme até o mais próximo - o prazo dispara
+na hora certa mesmo se a busca de preços estiver falhando, e milhares de prazos pendentes
+custam O(log n) para agendar/cancelar.
+"""
+import asyncio
+import heapq
+import itertools
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+TimerCallback = Callable[[], Awaitable[None]]
+
+class DeadlineTimer:
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Hashable]] = []  # (horário no relógio do loop, seq, chave)
+        self._timers: Dict[Hashable, Tuple[float, int, TimerCallback]] = {}  # Prazo vigente por chave
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()  # Callbacks em execução
+        self.stats = {'scheduled': 0, 'fired': 0, 'cancelled': 0, 'rearmed': 0, 'max_late_ms': 0.0}
+
+    def schedule_at(self, key: Hashable, when: datetime, callback: TimerCallback):
+        """Agenda callback para o horário when (substitui o prazo anterior da mesma chave)
+        O sono usa o relógio do loop (monotônico); se o relógio de parede ainda não chegou em when
+        quando o prazo dispara (ajuste de NTP, relógios com ritmos diferentes), reagenda para o
+        restante em vez de chamar o callback antes da hora.
+        """
+        async def fire():
+            remaining = (when - datetime.now(timezone.utc)).total_seconds()
+            if remaining > 0:
+                if key not in self._timers:  # Não sobrescreve um prazo novo agendado nesse meio tempo
+                    self.stats['rearmed'] += 1
+                    self.schedule(key, remaining, fire)
+                return
+            await callback()
+
+        delay = (when - datetime.now(timezone.utc)).total_seconds()
+        self.schedule(key, delay, fire)
+
+    def schedule(self, key: Hashable, delay: float, callback: TimerCallback):
+        """Agenda callback para daqui a delay segundos (chamar de dentro do event loop)"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max(0.0, delay)
+        seq = next(self._seq)
+        self._timers[key] = (deadline, seq, callback)
+        heapq.heappush(self._heap, (deadline, seq, key))
+        self.stats['scheduled'] += 1
+        self._compact()
+        self.start()
+        if self._heap[0][1] == seq:
+            self._wakeup.set()  # Novo prazo é o mais próximo - acorda para reajustar o sono
+
+    def cancel(self, key: Hashable):
+        """Remove o prazo da chave (a entrada do heap é descartada quando chegar ao topo)"""
+        if self._timers.pop(key, None) is not None:
+            self.stats['cancelled'] += 1
+
+    def pending_count(self) -> int:
+        return len(self._timers)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def _compact(self):
+        """Reconstrói o heap quando sobram muitas entradas canceladas/substituídas"""
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._timers):
+            self._heap = [(deadline, seq, key) for key, (deadline, seq, _) in self._timers.items()]
+            heapq.heapify(self._heap)
+
+    def _drop_stale(self):
+        while self._heap:
+            deadline, seq, key = self._heap[0]
+            current = self._timers.get(key)
+            if current is not None and current[1] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._drop_stale()
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            deadline = self._heap[0][0]
+            remaining = deadline - loop.time()
+            if remaining > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                    continue  # Agenda mudou - recalcula o próximo prazo
+                except asyncio.TimeoutError:
+                    pass
+
+            now = loop.time()
+            while self._heap and self._heap[0][0] <= now:
+                deadline, seq, key = heapq.heappop(self._heap)
+                current = self._timers.get(key)
+                if current is None or current[1] != seq:
+                    continue
+                del self._timers[key]
+                self.stats['fired'] += 1
+                self.stats['max_late_ms'] = max(self.stats['max_late_ms'], round((now - deadline) * 1000, 1))
+                # Cada callback roda em tarefa própria: uma venda lenta não atrasa os outros prazos
+                task = asyncio.create_task(current[2]())
+                self._running.add(task)
+                task.add_done_callback(lambda t, k=key: self._callback_done(k, t))
+
+    def _callback_done(self, key: Hashable, task: asyncio.Task):
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Erro no prazo agendado {key}: {task.exception()}")
+
+    async def stop(self):
+        """Para a tarefa e cancela callbacks em andamento"""
+        tasks = list(self._running)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._running.clear()
+        self._timers.clear()
+        self._heap.clear()
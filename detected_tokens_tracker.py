@@ -1,13 +1,30 @@
 """
 Rastreia todos os tokens detectados pelo bot (mesmo que não tenha comprado)
 Mantém histórico de preços para análise
+
+Os tokens ficam num registro em memória indexado pelo contract address (ordem = detecção),
+com get/update O(1) e "últimos k" O(k). No bot o registro é residente e grava snapshots
+em segundo plano; nos demais processos (interface web) ele relê o arquivo só quando muda.
+Com o bot rodando, a interface web manda as atualizações de preço para ele pelo canal de
+eventos (comando update_detected_prices) em vez de regravar o arquivo.
 """
 import json
 import os
+import threading
+from array import array
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+from price_history_store import get_price_history_store
 
 DETECTED_TOKENS_FILE = 'detected_tokens.json'
+MAX_TOKENS = 1000  # Tokens mais recentes mantidos (evita arquivo muito grande)
+WRITE_MERGE_ATTEMPTS = 3  # Snapshot refeito se outro processo gravou enquanto ele era serializado
+
+# Campos de preço que a interface web também atualiza (mesclados pelo processo residente)
+PRICE_FIELDS = ('initial_price', 'current_price', 'current_multiple', 'max_price', 'max_multiple',
+                'min_price', 'min_multiple', 'last_updated')
 
 def load_detected_tokens() -> Dict:
     """Carrega lista de tokens detectados"""
@@ -19,25 +36,164 @@ def load_detected_tokens() -> Dict:
             return {'tokens': []}
     return {'tokens': []}
 
-def save_detected_tokens(data: Dict):
-    """Salva lista de tokens detectados"""
-    with open(DETECTED_TOKENS_FILE, 'w', encoding='utf-8') as f:
+def _dump_tmp(data: Dict) -> str:
+    tmp_path = f"{DETECTED_TOKENS_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+    return tmp_path
 
-def add_detected_token(symbol: str, score: int, price: float, ca: str, 
-                       minutes_detected: int = None, detected_at: datetime = None):
-    """Adiciona ou atualiza token detectado
-    Se o token já existe, não duplica, mas atualiza se necessário
-    """
-    data = load_detected_tokens()
-    tokens = data.get('tokens', [])
-    
-    # Verifica se já existe
-    existing = None
-    for token in tokens:
-        if token.get('contract_address') == ca:
-            existing = token
-            break
+def save_detected_tokens(data: Dict):
+    """Salva lista de tokens detectados (escrita atômica - quem lê nunca vê arquivo pela metade)"""
+    os.replace(_dump_tmp(data), DETECTED_TOKENS_FILE)
+
+def _file_signature() -> Optional[Tuple]:
+    try:
+        stat = os.stat(DETECTED_TOKENS_FILE)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+class DetectedTokenRegistry:
+    def __init__(self, max_tokens: int = MAX_TOKENS):
+        self.max_tokens = max_tokens
+        self.lock = threading.RLock()
+        self._tokens: "OrderedDict[str, Dict]" = OrderedDict()  # Mais antigo → mais recente (detected_at)
+        self._signature = None  # Assinatura do arquivo quando lido/gravado por último
+        self._loaded = False
+        self._dirty = False
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._stop_snapshots = threading.Event()
+        self.snapshot_interval = 2.0
+
+    @property
+    def resident(self) -> bool:
+        """True no processo dono (bot): gravação fica para o snapshot em segundo plano"""
+        return self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+
+    def _reload(self):
+        tokens = load_detected_tokens().get('tokens', [])
+        tokens.sort(key=lambda x: x.get('detected_at') or '')
+        self._tokens = OrderedDict((token.get('contract_address'), token) for token in tokens)
+        self._loaded = True
+
+    def refresh(self):
+        """Relê o arquivo se outro processo gravou (no processo residente a memória é a fonte)"""
+        with self.lock:
+            if self.resident and self._loaded:
+                return
+            signature = _file_signature()
+            if not self._loaded or signature != self._signature:
+                self._signature = signature
+                self._reload()
+
+    def get(self, ca: str) -> Optional[Dict]:
+        self.refresh()
+        return self._tokens.get(ca)
+
+    def latest(self, limit: int) -> List[Dict]:
+        """Os limit tokens detectados mais recentemente (mais recentes primeiro)"""
+        self.refresh()
+        with self.lock:
+            return [dict(token) for token in islice(reversed(self._tokens.values()), limit)]
+
+    def insert(self, token: Dict):
+        """Adiciona token novo na posição da data de detecção"""
+        ca = token.get('contract_address')
+        self._tokens[ca] = token
+        if len(self._tokens) > 1:
+            previous = next(islice(reversed(self._tokens.values()), 1, 2))
+            if (token.get('detected_at') or '') < (previous.get('detected_at') or ''):
+                # Detecção fora de ordem (raro) - reordena
+                self._tokens = OrderedDict(sorted(self._tokens.items(), key=lambda item: item[1].get('detected_at') or ''))
+        evicted = []
+        while len(self._tokens) > self.max_tokens:
+            evicted.append(self._tokens.popitem(last=False)[0])
+        if evicted:
+            get_price_history_store().forget(self._tokens.keys())
+
+    def commit(self):
+        """Registra alteração: processo residente grava no próximo snapshot, os demais gravam já"""
+        with self.lock:
+            if self.resident:
+                self._dirty = True
+            else:
+                self._write()
+
+    def _write(self):
+        tmp_path = _dump_tmp({'tokens': list(reversed(self._tokens.values()))})
+        if self.resident:
+            # Outro processo gravou enquanto o snapshot era serializado: mescla e serializa de novo
+            # (senão a troca abaixo apagaria a gravação dele)
+            for _ in range(WRITE_MERGE_ATTEMPTS):
+                if _file_signature() == self._signature:
+                    break
+                self._merge_external()
+                tmp_path = _dump_tmp({'tokens': list(reversed(self._tokens.values()))})
+        os.replace(tmp_path, DETECTED_TOKENS_FILE)
+        self._signature = _file_signature()
+        self._dirty = False
+
+    def _merge_external(self):
+        """Traz atualizações de preço gravadas por outro processo (ex: botão da interface web)"""
+        signature = _file_signature()
+        if signature is None or signature == self._signature:
+            return
+        for external in load_detected_tokens().get('tokens', []):
+            token = self._tokens.get(external.get('contract_address'))
+            if token is None:
+                continue
+            if (external.get('last_updated') or '') > (token.get('last_updated') or ''):
+                for field in PRICE_FIELDS:
+                    if field in external:
+                        token[field] = external[field]
+            token['was_bought'] = token.get('was_bought') or external.get('was_bought', False)
+        self._signature = signature
+
+    def snapshot(self):
+        """Grava o registro (mesclando o que outro processo gravou desde o último snapshot)"""
+        with self.lock:
+            self._merge_external()
+            if self._dirty:
+                self._write()
+
+    def start(self, interval: float = None):
+        """Torna o registro residente neste processo e inicia os snapshots em segundo plano"""
+        with self.lock:
+            if self.resident:
+                return
+            if interval is not None:
+                self.snapshot_interval = interval
+            self._loaded = False
+            self.refresh()
+            self._stop_snapshots.clear()
+            self._snapshot_thread = threading.Thread(target=self._snapshot_loop, name='detected-tokens-snapshot', daemon=True)
+            self._snapshot_thread.start()
+
+    def _snapshot_loop(self):
+        while not self._stop_snapshots.wait(self.snapshot_interval):
+            try:
+                self.snapshot()
+            except Exception as e:
+                print(f"⚠️  Erro ao gravar tokens detectados: {e}")
+
+    def stop(self):
+        """Para os snapshots e grava o que estiver pendente"""
+        self._stop_snapshots.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join(timeout=5)
+            self._snapshot_thread = None
+        self.snapshot()
+
+# Instância global (singleton)
+_registry = DetectedTokenRegistry()
+
+def get_detected_token_registry() -> DetectedTokenRegistry:
+    return _registry
+
+def _apply_detected_token(symbol: str, score: int, price: float, ca: str, minutes_detected: int = None,
+                          detected_at: datetime = None) -> Dict:
+    """Aplica um token detectado no registro (sem ler/gravar arquivo)"""
+    existing = _registry.get(ca)
     
     if detected_at is None:
         detected_at = datetime.now(timezone.utc)
@@ -49,13 +205,6 @@ def add_detected_token(symbol: str, score: int, price: float, ca: str,
         'contract_address': ca,
         'minutes_detected': minutes_detected,
         'detected_at': detected_at.isoformat() if isinstance(detected_at, datetime) else detected_at,
-        'price_history': [
-            {
-                'price': price,
-                'timestamp': detected_at.isoformat() if isinstance(detected_at, datetime) else detected_at,
-                'minutes_since_detection': 0
-            }
-        ],
         'max_price': price,
         'min_price': price,
         'max_multiple': 1.0,
@@ -74,89 +223,180 @@ def add_detected_token(symbol: str, score: int, price: float, ca: str,
         if existing.get('score') is None:
             existing['score'] = score
     else:
-        # Adiciona novo token
-        tokens.append(token_data)
-    
-    # Limita a 1000 tokens mais recentes (evita arquivo muito grande)
-    tokens.sort(key=lambda x: x.get('detected_at', ''), reverse=True)
-    data['tokens'] = tokens[:1000]
+        # Adiciona novo token (primeiro ponto do histórico de preços = preço na detecção)
+        _registry.insert(token_data)
+        if price:
+            detected_ts = detected_at.timestamp() if isinstance(detected_at, datetime) else None
+            get_price_history_store().append(ca, price, detected_ts)
     
-    save_detected_tokens(data)
     return token_data
 
-def update_token_price(ca: str, current_price: float):
-    """Atualiza preço atual de um token detectado"""
-    data = load_detected_tokens()
-    tokens = data.get('tokens', [])
-    
-    for token in tokens:
-        if token.get('contract_address') == ca:
-            initial_price = token.get('initial_price', current_price)
-            if initial_price == 0:
-                initial_price = current_price
-                token['initial_price'] = current_price
-            
-            multiple = current_price / initial_price if initial_price > 0 else 1.0
-            
-            # Atualiza preço atual
-            token['current_price'] = current_price
-            token['current_multiple'] = multiple
-            
-            # Atualiza máximo/mínimo
-            if current_price > token.get('max_price', current_price):
-                token['max_price'] = current_price
-                token['max_multiple'] = multiple
-            
-            if current_price < token.get('min_price', current_price):
-                token['min_price'] = current_price
-                token['min_multiple'] = multiple
-            
-            # Adiciona ao histórico (limitado a últimas 100 entradas)
-            now = datetime.now(timezone.utc)
-            detected_at = datetime.fromisoformat(token.get('detected_at', now.isoformat()).replace('Z', '+00:00'))
-            minutes_since = int((now - detected_at).total_seconds() / 60)
-            
-            price_entry = {
-                'price': current_price,
-                'timestamp': now.isoformat(),
-                'minutes_since_detection': minutes_since
-            }
-            
-            history = token.get('price_history', [])
-            history.append(price_entry)
-            # Mantém apenas últimas 100 entradas
-            token['price_history'] = history[-100:]
-            token['last_updated'] = now.isoformat()
-            
-            save_detected_tokens(data)
-            return token
+def add_detected_token(symbol: str, score: int, price: float, ca: str, 
+                       minutes_detected: int = None, detected_at: datetime = None):
+    """Adiciona ou atualiza token detectado
+    Se o token já existe, não duplica, mas atualiza se necessário
+    """
+    with _registry.lock:
+        token_data = _apply_detected_token(symbol, score, price, ca, minutes_detected, detected_at)
+        _registry.commit()
+        return token_data
+
+def add_detected_tokens_batch(events: List[Dict]) -> int:
+    """Aplica um lote de eventos no registro (uma gravação no máximo)
+    Args:
+        events: Lista de dicts. Detecção: {'symbol', 'score', 'price', 'contract_address',
+                'minutes_detected', 'detected_at'}; compra: {'type': 'bought', 'contract_address'}
+    Returns:
+        Quantidade de eventos aplicados
+    """
+    if not events:
+        return 0
     
-    return None
+    with _registry.lock:
+        # Eventos são aplicados na ordem de chegada (detecção antes da marcação de compra)
+        for event in events:
+            ca = event.get('contract_address')
+            if event.get('type') == 'bought':
+                token = _registry.get(ca)
+                if token:
+                    token['was_bought'] = True
+            else:
+                _apply_detected_token(
+                    event.get('symbol'),
+                    event.get('score'),
+                    event.get('price'),
+                    ca,
+                    event.get('minutes_detected'),
+                    event.get('detected_at')
+                )
+        
+        _registry.commit()
+        return len(events)
 
-def mark_token_as_bought(ca: str):
-    """Marca token como comprado"""
-    data = load_detected_tokens()
-    tokens = data.get('tokens', [])
+def _apply_token_price(token: Dict, current_price: float, now: datetime):
+    """Aplica o preço atual no token (múltiplos, máximo/mínimo) - o ponto do histórico fica com quem chama"""
+    initial_price = token.get('initial_price', current_price)
+    if initial_price == 0:
+        initial_price = current_price
+        token['initial_price'] = current_price
     
-    for token in tokens:
-        if token.get('contract_address') == ca:
-            token['was_bought'] = True
-            save_detected_tokens(data)
-            return token
+    multiple = current_price / initial_price if initial_price > 0 else 1.0
     
-    return None
-
-def get_all_detected_tokens(limit: int = 100) -> List[Dict]:
-    """Retorna lista de tokens detectados (mais recentes primeiro)"""
-    data = load_detected_tokens()
-    tokens = data.get('tokens', [])
+    # Atualiza preço atual
+    token['current_price'] = current_price
+    token['current_multiple'] = multiple
     
-    # Ordena por data de detecção (mais recentes primeiro)
-    tokens.sort(key=lambda x: x.get('detected_at', ''), reverse=True)
+    # Atualiza máximo/mínimo
+    if current_price > token.get('max_price', current_price):
+        token['max_price'] = current_price
+        token['max_multiple'] = multiple
     
-    return tokens[:limit]
+    if current_price < token.get('min_price', current_price):
+        token['min_price'] = current_price
+        token['min_multiple'] = multiple
+    
+    _migrate_legacy_history(token)
+    token['last_updated'] = now.isoformat()
+
+def update_token_price(ca: str, current_price: float):
+    """Atualiza preço atual de um token detectado"""
+    with _registry.lock:
+        token = _registry.get(ca)
+        if token is None:
+            return None
+        
+        now = datetime.now(timezone.utc)
+        _apply_token_price(token, current_price, now)
+        # Adiciona ao histórico (buffer circular em price_history_store - O(1), sem JSON)
+        get_price_history_store().append(ca, current_price, now.timestamp())
+        
+        _registry.commit()
+        return token
+
+def update_token_prices_batch(prices: Dict[str, float]) -> List[Dict]:
+    """Atualiza o preço de vários tokens detectados (uma gravação do histórico e uma do registro)
+    Args:
+        prices: {contract_address: preço atual}; preços vazios/zerados e tokens desconhecidos são ignorados
+    Returns:
+        Cópias dos tokens atualizados
+    """
+    updated = []
+    with _registry.lock:
+        now = datetime.now(timezone.utc)
+        points = []
+        for ca, current_price in prices.items():
+            token = _registry.get(ca)
+            if token is None or not current_price or current_price <= 0:
+                continue
+            _apply_token_price(token, current_price, now)
+            points.append((ca, current_price, now.timestamp()))
+            updated.append(dict(token))
+        
+        if points:
+            get_price_history_store().append_many(points)
+            _registry.commit()
+    return updated
+
+def _detected_timestamp(token: Dict) -> Optional[float]:
+    try:
+        detected_at = datetime.fromisoformat(token['detected_at'].replace('Z', '+00:00'))
+    except (KeyError, AttributeError, ValueError):
+        return None
+    if detected_at.tzinfo is None:
+        detected_at = detected_at.replace(tzinfo=timezone.utc)
+    return detected_at.timestamp()
 
+def _migrate_legacy_history(token: Dict):
+    """Move o price_history antigo (lista no JSON) para o histórico binário"""
+    legacy = token.pop('price_history', None)
+    store = get_price_history_store()
+    if not legacy or store.has(token.get('contract_address')):
+        return
+    for entry in legacy:
+        try:
+            timestamp = datetime.fromisoformat(entry['timestamp'].replace('Z', '+00:00'))
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            store.append(token['contract_address'], float(entry['price']), timestamp.timestamp())
+        except (KeyError, TypeError, ValueError):
+            continue
+
+def get_token_price_history(token: Dict) -> Tuple[array, array]:
+    """Histórico de preços do token: (minutos desde a detecção, preços) em arrays contíguos"""
+    legacy = token.get('price_history')
+    if legacy and not get_price_history_store().has(token.get('contract_address')):
+        # Token ainda no formato antigo (nunca atualizado desde a migração)
+        return (array('d', (entry.get('minutes_since_detection', 0) for entry in legacy)),
+                array('d', (entry.get('price', 0.0) for entry in legacy)))
+    timestamps, prices = get_price_history_store().get_arrays(token.get('contract_address'))
+    detected_ts = _detected_timestamp(token)
+    if detected_ts is None:
+        detected_ts = timestamps[0] / 1000 if timestamps else 0.0
+    detected_ms = int(detected_ts * 1000)  # Mesma resolução dos registros (ms)
+    return array('d', (int((timestamp_ms - detected_ms) / 60000) for timestamp_ms in timestamps)), prices
 
+def mark_token_as_bought(ca: str):
+    """Marca token como comprado"""
+    with _registry.lock:
+        token = _registry.get(ca)
+        if token is None:
+            return None
+        token['was_bought'] = True
+        _registry.commit()
+        return token
 
+def get_detected_token(ca: str) -> Optional[Dict]:
+    """Token detectado pelo contract address (O(1), sem ler o arquivo se não mudou)"""
+    token = _registry.get(ca)
+    return dict(token) if token else None
+
+def get_all_detected_tokens(limit: int = 100) -> List[Dict]:
+    """Retorna lista de tokens detectados (mais recentes primeiro)"""
+    return _registry.latest(limit)
 
+def start_detected_tokens_snapshots(interval: float = None):
+    """Mantém o registro residente neste processo (bot) e grava snapshots em segundo plano"""
+    _registry.start(interval)
 
+def stop_detected_tokens_snapshots():
+    _registry.stop()
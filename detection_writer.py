@@ -0,0 +1,131 @@
+"""
+Fila write-behind para o registro de tokens detectados
+Aceita eventos instantaneamente (sem I/O) e grava em lote numa tarefa de fundo,
+tirando last_token_detected.json e detected_tokens.json do caminho crítico de compra
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from last_token_detected import save_last_token
+from detected_tokens_tracker import add_detected_tokens_batch, start_detected_tokens_snapshots, stop_detected_tokens_snapshots
+from logger import log_error
+from event_bus import publish
+import config
+
+class DetectionWriter:
+    def __init__(self, flush_interval: float = 0.2, max_batch: int = 200):
+        """
+        Args:
+            flush_interval: Segundos para agrupar eventos de uma rajada antes de gravar
+            max_batch: Máximo de eventos por gravação
+        """
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Inicia tarefa de gravação (chamar de dentro do event loop)"""
+        if self.running:
+            return
+        # Registro de tokens detectados fica residente neste processo (grava por snapshot)
+        start_detected_tokens_snapshots(config.DETECTED_TOKENS_SNAPSHOT_SECONDS)
+        self.queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    def submit_detection(self, symbol: str, score: int, price: float, ca: str,
+                         minutes_detected: int = None, detected_at=None):
+        """Enfileira token detectado (instantâneo - não toca no disco)"""
+        publish('detection', {
+            'symbol': symbol,
+            'score': score,
+            'price': price,
+            'contract_address': ca,
+            'minutes_detected': minutes_detected,
+            'detected_at': (detected_at or datetime.now(timezone.utc)).isoformat()
+        })
+        self._submit({
+            'type': 'detected',
+            'symbol': symbol,
+            'score': score,
+            'price': price,
+            'contract_address': ca,
+            'minutes_detected': minutes_detected,
+            'detected_at': detected_at
+        })
+
+    def submit_bought(self, ca: str):
+        """Enfileira marcação de compra (mantém ordem em relação à detecção)"""
+        self._submit({'type': 'bought', 'contract_address': ca})
+
+    def _submit(self, event: Dict):
+        if not self.running:
+            # Sem tarefa de fundo (ex: encerrando) - grava direto para não perder
+            self._write_batch([event])
+            return
+        self.queue.put_nowait(event)
+
+    async def _run(self):
+        """Consome a fila e grava em lotes numa thread (não bloqueia o event loop)"""
+        stopping = False
+        while not stopping:
+            event = await self.queue.get()
+            batch = []
+            if event is None:
+                stopping = True
+            else:
+                batch.append(event)
+                # Aguarda um pouco para agrupar eventos que chegam juntos
+                await asyncio.sleep(self.flush_interval)
+
+            # Drena o que já está na fila
+            while not self.queue.empty() and len(batch) < self.max_batch:
+                next_event = self.queue.get_nowait()
+                if next_event is None:
+                    stopping = True
+                    continue
+                batch.append(next_event)
+
+            if batch:
+                await asyncio.to_thread(self._write_batch, batch)
+
+    def _write_batch(self, batch: List[Dict]):
+        """Grava lote: último token detectado + tracker de tokens (uma escrita cada)"""
+        try:
+            detections = [e for e in batch if e.get('type') == 'detected']
+            if detections:
+                last = detections[-1]
+                save_last_token(
+                    last['symbol'],
+                    last['score'],
+                    last['price'],
+                    last['contract_address'],
+                    last['minutes_detected'],
+                    last['detected_at']
+                )
+            add_detected_tokens_batch(batch)
+        except Exception as e:
+            log_error(f"Erro ao gravar tokens detectados ({len(batch)} eventos): {e}")
+
+    async def stop(self):
+        """Encerramento limpo: grava tudo que ainda está na fila"""
+        if not self.running:
+            return
+        self.queue.put_nowait(None)
+        await self._task
+        self._task = None
+        await asyncio.to_thread(stop_detected_tokens_snapshots)
+
+# Instância global (singleton) - usada pelo bot e pelo trade_tracker_integration
+_detection_writer = None
+
+def get_detection_writer() -> DetectionWriter:
+    """Retorna fila write-behind do processo"""
+    global _detection_writer
+    if _detection_writer is None:
+        _detection_writer = DetectionWriter()
+    return _detection_writer
@@ -0,0 +1,491 @@
+"""
+Canal de eventos local entre o bot e a interface web (pub/sub em JSON, uma mensagem por linha)
+O bot abre um socket Unix (ou TCP em 127.0.0.1 onde não há AF_UNIX, ex: Windows) e publica
+eventos de trade, posição, detecção e preço; a interface assina e mantém uma visão em memória.
+Comandos da interface (ligar/desligar, blacklist, config, venda manual) voltam pelo mesmo canal
+e o bot responde - sem polling de arquivos nos dois sentidos. Os arquivos continuam sendo
+gravados (persistência e fallback quando o bot não está rodando).
+
+Eventos: trade_bought, trade_updated (preço e vendas parciais), trade_sold, detection, bot_state
+
+Autenticação: a cada execução o bot sorteia um token e grava em EVENT_BUS_TOKEN_FILE (legível
+só pelo usuário). A primeira linha de toda conexão tem de ser {"type": "hello", "token": "..."};
+qualquer outra coisa derruba a conexão (ex: página web fazendo POST para a porta local).
+
+Mensagens:
+    web → bot:  {"type": "hello", "token": "..."}  (primeira linha)
+    bot → web:  {"type": "event", "event": "trade_bought", "data": {...}, "ts": 1700000000.0}
+    web → bot:  {"type": "command", "id": 1, "command": "set_bot_state", "args": {"enabled": false}}
+    bot → web:  {"type": "reply", "id": 1, "ok": true, "result": ...}  (ou "ok": false, "error": "...")
+"""
+import asyncio
+import hmac
+import itertools
+import json
+import os
+import queue
+import secrets
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+import config
+from trade_stats import TradeStats, verify_stats
+
+RECONNECT_SECONDS = 2.0  # Intervalo entre tentativas de conexão do cliente (bot fora do ar)
+CLIENT_QUEUE_SIZE = 1000  # Mensagens pendentes por assinante (acima disso, eventos são descartados)
+HELLO_TIMEOUT_SECONDS = 5.0  # Prazo para a conexão se autenticar
+
+CommandHandler = Callable[[Dict], Union[Any, Awaitable[Any]]]
+
+def _encode(message: Dict) -> bytes:
+    return (json.dumps(message, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+def _use_unix_socket() -> bool:
+    return hasattr(socket, 'AF_UNIX')
+
+def _write_token(path: str, token: str):
+    """Grava o token num arquivo só do usuário (0600; troca atômica)"""
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+    os.replace(tmp_path, path)
+
+def _read_token(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+class EventBusServer:
+    """Lado do bot: aceita assinantes, publica eventos e executa comandos"""
+    def __init__(self, path: str = None, port: int = None, token_file: str = None):
+        """
+        Args:
+            path: Socket Unix (padrão: EVENT_BUS_SOCKET)
+            port: Porta TCP local usada quando não há socket Unix (padrão: EVENT_BUS_PORT)
+            token_file: Arquivo do token de autenticação (padrão: EVENT_BUS_TOKEN_FILE)
+        """
+        self.path = path or config.EVENT_BUS_SOCKET
+        self.port = port or config.EVENT_BUS_PORT
+        self.token_file = token_file or config.EVENT_BUS_TOKEN_FILE
+        self._token: Optional[str] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: Dict[asyncio.StreamWriter, asyncio.Queue] = {}
+        self._handlers: Dict[str, CommandHandler] = {}
+        self._tasks: set = set()
+        self.stats = {'published': 0, 'dropped': 0, 'commands': 0, 'rejected': 0}
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    def on_command(self, name: str, handler: CommandHandler):
+        """Registra comando (handler recebe os args e pode ser síncrono ou async)"""
+        self._handlers[name] = handler
+
+    async def start(self):
+        """Abre o socket (chamar de dentro do event loop do bot)"""
+        if self._server is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._token = secrets.token_hex(32)
+            _write_token(self.token_file, self._token)
+            if _use_unix_socket():
+                if os.path.exists(self.path):
+                    os.unlink(self.path)  # Socket órfão de uma execução anterior
+                previous_umask = os.umask(0o177)  # Socket nasce 0600 (sem janela com permissão aberta)
+                try:
+                    self._server = await asyncio.start_unix_server(self._handle_client, path=self.path)
+                finally:
+                    os.umask(previous_umask)
+                os.chmod(self.path, 0o600)
+                where = self.path
+            else:
+                self._server = await asyncio.start_server(self._handle_client, host='127.0.0.1', port=self.port)
+                where = f"127.0.0.1:{self.port}"
+        except OSError as e:
+            print(f"⚠️  Canal de eventos indisponível ({e}) - interface web usa os arquivos")
+            return
+        print(f"📡 Canal de eventos aberto em {where}")
+
+    def publish(self, event: str, data: Any = None):
+        """Publica evento para todos os assinantes (não bloqueia; pode ser chamado de qualquer thread)"""
+        if not self._clients or self._loop is None:
+            return
+        message = _encode({'type': 'event', 'event': event, 'data': data, 'ts': time.time()})
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._enqueue(message)
+        else:
+            self._loop.call_soon_threadsafe(self._enqueue, message)
+
+    def _enqueue(self, message: bytes):
+        self.stats['published'] += 1
+        for writer, queue in list(self._clients.items()):
+            if queue.full():
+                # Assinante lento (ou travado) não segura o bot: é desconectado e, ao reconectar,
+                # recarrega a visão do armazenamento em vez de seguir com eventos faltando
+                self.stats['dropped'] += 1
+                self._clients.pop(writer, None)
+                writer.close()
+                continue
+            queue.put_nowait(message)
+
+    async def _authenticate(self, reader: asyncio.StreamReader) -> bool:
+        """Primeira linha tem de ser o hello com o token desta execução"""
+        try:
+            line = await asyncio.wait_for(reader.readline(), HELLO_TIMEOUT_SECONDS)
+            message = json.loads(line)
+        except (asyncio.TimeoutError, ValueError, ConnectionError, asyncio.IncompleteReadError):
+            return False
+        token = message.get('token') if isinstance(message, dict) and message.get('type') == 'hello' else None
+        return isinstance(token, str) and hmac.compare_digest(token, self._token)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if not await self._authenticate(reader):
+            self.stats['rejected'] += 1
+            writer.close()
+            return
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self._clients[writer] = queue
+        sender = asyncio.create_task(self._send_loop(writer, queue))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(message, dict) and message.get('type') == 'command':
+                    task = asyncio.create_task(self._run_command(message, queue))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            sender.cancel()
+            writer.close()
+
+    async def _send_loop(self, writer: asyncio.StreamWriter, queue: asyncio.Queue):
+        try:
+            while True:
+                writer.write(await queue.get())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    async def _run_command(self, message: Dict, queue: asyncio.Queue):
+        self.stats['commands'] += 1
+        reply = {'type': 'reply', 'id': message.get('id')}
+        handler = self._handlers.get(message.get('command'))
+        if handler is None:
+            reply.update(ok=False, error=f"Comando desconhecido: {message.get('command')}")
+        else:
+            try:
+                result = handler(message.get('args') or {})
+                if asyncio.iscoroutine(result):
+                    result = await result
+                reply.update(ok=True, result=result)
+            except Exception as e:
+                reply.update(ok=False, error=str(e))
+        await queue.put(_encode(reply))  # Resposta espera espaço na fila (não é descartada)
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._clients):
+            writer.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await self._server.wait_closed()
+        self._server = None
+        self._clients.clear()
+        if _use_unix_socket() and os.path.exists(self.path):
+            os.unlink(self.path)
+        if os.path.exists(self.token_file):
+            os.unlink(self.token_file)
+
+class EventBusClient:
+    """Lado da interface web: assina eventos e envia comandos (thread própria, reconecta sozinho)"""
+    def __init__(self, path: str = None, port: int = None, token_file: str = None):
+        self.path = path or config.EVENT_BUS_SOCKET
+        self.port = port or config.EVENT_BUS_PORT
+        self.token_file = token_file or config.EVENT_BUS_TOKEN_FILE
+        self.connected = False
+        self._sock: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, list] = {}  # {id: [threading.Event, resposta]}
+        self._subscribers: List[Callable[[str, Any], None]] = []
+        self._connect_callbacks: List[Callable[[], None]] = []
+        self._disconnect_callbacks: List[Callable[[], None]] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: Callable[[str, Any], None]):
+        """callback(evento, dados) - chamado na thread do cliente, na ordem de publicação"""
+        self._subscribers.append(callback)
+
+    def on_connect(self, callback: Callable[[], None]):
+        """Chamado a cada (re)conexão, antes do primeiro evento (ex: recarregar a visão)"""
+        self._connect_callbacks.append(callback)
+
+    def on_disconnect(self, callback: Callable[[], None]):
+        self._disconnect_callbacks.append(callback)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='event-bus', daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> socket.socket:
+        # Token relido a cada conexão (o bot sorteia outro a cada execução)
+        token = _read_token(self.token_file)
+        if token is None:
+            raise OSError(f"Token do canal de eventos não encontrado ({self.token_file})")
+        if _use_unix_socket():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+        else:
+            sock = socket.create_connection(('127.0.0.1', self.port), timeout=RECONNECT_SECONDS)
+            sock.settimeout(None)
+        try:
+            sock.sendall(_encode({'type': 'hello', 'token': token}))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _run(self):
+        while True:
+            try:
+                sock = self._connect()
+            except OSError:
+                time.sleep(RECONNECT_SECONDS)
+                continue
+            self._sock = sock
+            self.connected = True
+            try:
+                for callback in self._connect_callbacks:
+                    callback()
+                with sock.makefile('rb') as stream:
+                    for line in stream:
+                        self._dispatch(line)
+            except Exception as e:
+                print(f"⚠️  Canal de eventos: conexão perdida ({e})")
+            finally:
+                self.connected = False
+                self._sock = None
+                sock.close()
+                self._fail_pending()
+                for callback in self._disconnect_callbacks:
+                    callback()
+            time.sleep(RECONNECT_SECONDS)
+
+    def _dispatch(self, line: bytes):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return
+        if message.get('type') == 'reply':
+            waiter = self._pending.pop(message.get('id'), None)
+            if waiter is not None:
+                waiter[1] = message
+                waiter[0].set()
+            return
+        if message.get('type') == 'event':
+            for callback in self._subscribers:
+                try:
+                    callback(message.get('event'), message.get('data'))
+                except Exception as e:
+                    print(f"⚠️  Erro tratando evento {message.get('event')}: {e}")
+
+    def _fail_pending(self):
+        for waiter in list(self._pending.values()):
+            waiter[0].set()  # Resposta fica None: quem espera recebe TimeoutError
+        self._pending.clear()
+
+    def command(self, name: str, args: Dict = None, timeout: float = 5.0) -> Optional[Dict]:
+        """Envia comando ao bot e espera a resposta
+        Returns: {'ok': bool, 'result' ou 'error'} ou None se o bot não está conectado (usar fallback)
+        Raises: TimeoutError se o comando foi enviado e a resposta não veio (o bot pode ter executado)
+        """
+        sock = self._sock
+        if not self.connected or sock is None:
+            return None
+        command_id = next(self._ids)
+        waiter = [threading.Event(), None]
+        self._pending[command_id] = waiter
+        try:
+            with self._send_lock:
+                sock.sendall(_encode({'type': 'command', 'id': command_id, 'command': name, 'args': args or {}}))
+        except OSError:
+            self._pending.pop(command_id, None)
+            return None
+        if not waiter[0].wait(timeout) or waiter[1] is None:
+            self._pending.pop(command_id, None)
+            raise TimeoutError(f"Bot não respondeu ao comando {name}")
+        return waiter[1]
+
+class LiveView:
+    """Visão em memória do bot montada pelos eventos (trades ativos, estatísticas, estado, detecções)"""
+    def __init__(self, max_detections: int = 50):
+        self._lock = threading.Lock()
+        self.synced = False  # Carregada e recebendo eventos
+        self.bot_enabled: Optional[bool] = None
+        self._active: 'OrderedDict[str, Dict]' = OrderedDict()  # {contract_address: trade}
+        self.stats = TradeStats()  # Agregados de /api/stats
+        self.detections: List[Dict] = []  # Mais recentes por último
+        self.max_detections = max_detections
+        # Recargas em andamento (rotas Flask leem o banco fora da thread do canal): eventos que chegam
+        # enquanto isso ficam guardados e são reaplicados sobre o que foi lido
+        self._reloads = 0
+        self._buffered: List[tuple] = []
+
+    def begin_reload(self):
+        """Chamar ANTES de ler o banco: eventos a partir daqui são reaplicados no reset"""
+        with self._lock:
+            self._reloads += 1
+
+    def abort_reload(self):
+        """Leitura falhou: encerra a recarga sem trocar a visão"""
+        with self._lock:
+            self._end_reload()
+
+    def _end_reload(self) -> List[tuple]:
+        self._reloads = max(0, self._reloads - 1)
+        buffered = list(self._buffered)
+        if not self._reloads:
+            self._buffered.clear()
+        return buffered
+
+    def reset(self, active_trades: List[Dict], bot_enabled: bool, sold_trades: List[Dict] = ()):
+        """Recarrega do armazenamento (na conexão e depois de alterações feitas pela própria interface)
+        Eventos recebidos desde begin_reload são reaplicados sobre a leitura - nenhum se perde se o
+        bot gravou entre a leitura do banco e o reset.
+        """
+        with self._lock:
+            self._active = OrderedDict((t.get('contract_address'), dict(t)) for t in active_trades)
+            self.stats.rebuild(list(self._active.values()), sold_trades)
+            self.bot_enabled = bot_enabled
+            self.synced = True
+            # Compra cuja venda já está na leitura: reaplicar a compra contaria a venda duas vezes
+            sold_keys = {(t.get('contract_address'), t.get('timestamp')) for t in sold_trades}
+            for event, data in self._end_reload():
+                if event == 'trade_bought' and (data.get('contract_address'), data.get('timestamp')) in sold_keys:
+                    continue
+                self._apply(event, data)
+
+    def desync(self):
+        with self._lock:
+            self.synced = False
+
+    def active_trades(self) -> List[Dict]:
+        with self._lock:
+            return [dict(trade) for trade in self._active.values()]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return self.stats.snapshot()
+
+    def verify_stats(self, sold_trades: List[Dict]) -> List[str]:
+        """Confere os agregados contra o recálculo completo (ativos desta visão + vendidos do banco)"""
+        with self._lock:
+            return verify_stats(self.stats, list(self._active.values()), sold_trades)
+
+    def apply(self, event: str, data: Any):
+        """Aplica um evento do bot (idempotente: reaplicar depois do reset não duplica)"""
+        with self._lock:
+            if self._reloads and event != 'detection':
+                self._buffered.append((event, data))
+            self._apply(event, data)
+
+    def _apply(self, event: str, data: Any):
+        if event == 'trade_bought':
+            trade = dict(data)
+            self._active[data['contract_address']] = trade
+            self.stats.add_active(trade)
+        elif event == 'trade_updated':
+            trade = self._active.get(data.get('contract_address'))
+            if trade is not None:
+                trade.update(data)
+                self.stats.update_active(trade)
+        elif event == 'trade_sold':
+            # Só conta vendas de trades que esta visão tinha como ativos (igual ao banco)
+            if self._active.pop(data.get('contract_address'), None) is not None:
+                self.stats.move_to_sold(data.get('contract_address'), data)
+        elif event == 'bot_state':
+            self.bot_enabled = data.get('enabled')
+        elif event == 'detection':
+            self.detections.append(data)
+            del self.detections[:-self.max_detections]
+
+class EventFanout:
+    """Repassa eventos a vários consumidores (ex: conexões SSE do dashboard), cada um com sua fila"""
+    def __init__(self, max_queue: int = 500):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers: List[queue.Queue] = []
+
+    def subscribe(self) -> queue.Queue:
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, data: Any = None):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event, data))
+            except queue.Full:
+                # Consumidor atrasado: descarta o acumulado e pede recarga completa
+                while True:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        break
+                subscriber.put_nowait(('resync', {'connected': True}))
+
+# Instância global do bot (singleton)
+_server: Optional[EventBusServer] = None
+
+def get_event_bus() -> EventBusServer:
+    """Retorna servidor de eventos do processo (singleton - só o bot inicia)"""
+    global _server
+    if _server is None:
+        _server = EventBusServer()
+    return _server
+
+def publish(event: str, data: Any = None):
+    """Publica evento se o servidor estiver aberto neste processo (no-op na interface web/scripts)"""
+    if _server is not None and _server.running:
+        _server.publish(event, data)
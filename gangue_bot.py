@@ -7,13 +7,17 @@ from gangue_client import GangueClient
 from jupiter_client import JupiterClient
 from take_profit import TakeProfitManager
 import config
-from trade_tracker_integration import log_trade_bought, log_trade_update, log_trade_sold
+from trade_tracker_integration import log_trade_bought, log_trade_update, log_trade_sold, close_tracker
 from bot_control import get_bot_state
 from last_token_detected import save_last_token
 from logger import log_info, log_warning, log_error, log_success
 from token_blacklist import get_blacklist_cache, is_blacklisted
 from daily_loss_limit import check_daily_loss_limit, add_trade_result
-from wallet_balance import get_wallet_balance
+from wallet_balance import get_wallet_balance_service
+from capital_ledger import CapitalReservationError, get_capital_ledger
+from http_session import close_http_sessions
+from event_bus import get_event_bus
+from bot_commands import register_bot_commands
 from datetime import datetime, timezone
 
 class GangueTradingBot:
@@ -29,6 +33,13 @@ class GangueTradingBot:
         self.processed_tokens = set()  # Tokens já processados (para evitar duplicatas)
         self.bot_start_time = datetime.now(timezone.utc)
         self.running = False
+        # Canal de eventos com a interface web (eventos saem, comandos chegam)
+        self.event_bus = get_event_bus()
+        register_bot_commands(self.event_bus, self.tp_manager)
+        # Saldo em memória (atualizado em segundo plano e a cada swap confirmado)
+        self.wallet_balance = get_wallet_balance_service()
+        # Reserva de capital das compras em andamento (sinais simultâneos não gastam o mesmo saldo)
+        self.capital = get_capital_ledger()
     
     async def initialize(self):
         """Inicializa o bot"""
@@ -47,6 +58,8 @@ class GangueTradingBot:
         
         # Carrega blacklist
         get_blacklist_cache()
+        await self.event_bus.start()
+        await self.wallet_balance.ensure_started()
     
     async def process_token(self, token_info):
         """Processa um token (mesma lógica do bot original)"""
@@ -83,17 +96,6 @@ class GangueTradingBot:
             log_info(f"⏭️  Token {token_info.symbol} com score {token_info.score} acima do máximo ({config.MAX_SCORE})")
             return
         
-        # Verifica saldo
-        try:
-            balance = await get_wallet_balance()
-            required_sol = amount_sol + 0.01
-            if balance['sol'] < required_sol:
-                log_warning(f"Saldo insuficiente: {balance['sol']:.4f} SOL (precisa {required_sol:.4f} SOL)")
-                return
-        except Exception as e:
-            log_error(f"Erro ao verificar saldo: {e}")
-            return
-        
         # Verifica janela de tempo
         # Como o site da Gangue não fornece horário de detecção, assumimos que foi detectado agora (0 minutos)
         # Isso permite comprar imediatamente se estiver dentro da janela de tempo
@@ -132,12 +134,23 @@ class GangueTradingBot:
             token_info.minutes_detected
         )
         
+        # Reserva amount_sol + taxas no saldo em memória (verificação e reserva atômicas, sem RPC)
+        # Também barra uma segunda compra do mesmo token enquanto esta não termina.
+        # Saldo ainda não lido: não compra (o gangue_bot sempre recusou comprar sem conhecer o saldo)
+        try:
+            reservation = self.capital.reserve(token_info.contract_address, amount_sol, require_balance=True)
+        except CapitalReservationError as e:
+            log_warning(str(e))
+            return
+        
         # Executa compra
         try:
             tx_signature, quote = await self.jupiter.buy_token(
                 token_info.contract_address,
                 amount_sol
             )
+            # Gasto real já entrou no saldo em memória se a confirmação trouxe os valores da TX
+            self.capital.settle(reservation, balance_updated=quote.get('from_balance', False))
             
             log_success(f"Compra realizada! TX: {tx_signature}")
             
@@ -189,6 +202,7 @@ class GangueTradingBot:
             log_info(f"📊 Posição monitorada: {token_info.symbol} @ ${entry_price:.10f}")
         
         except Exception as e:
+            self.capital.release(reservation)  # Ignorado se a compra já tinha sido liquidada
             log_error(f"Erro ao comprar token {token_info.symbol}: {e}")
     
     async def monitor_loop(self):
@@ -248,20 +262,16 @@ class GangueTradingBot:
     async def stop(self):
         """Para o bot"""
         self.running = False
+        await self.event_bus.stop()
         
-        # Cancela todas as tarefas de monitoramento do TakeProfitManager
-        for task in self.tp_manager.monitoring_tasks.values():
-            task.cancel()
-        
-        # Aguarda cancelamento
-        for task in self.tp_manager.monitoring_tasks.values():
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
+        # Para o monitoramento de preços do TakeProfitManager
+        await self.tp_manager.stop()
+        await self.wallet_balance.stop()
+        close_tracker()
         
         await self.gangue.close()
         await self.jupiter.close()
+        await close_http_sessions()
 
 async def main():
     """Função principal"""
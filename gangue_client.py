@@ -3,6 +3,7 @@ Cliente para buscar tokens do site da Gangue (gangue.macaco.club)
 Substitui o Telegram como fonte de informações
 """
 import aiohttp
+from http_session import shared_session
 import asyncio
 import json
 import re
@@ -94,7 +95,7 @@ class GangueClient:
                 '/alphas',  # Possível rota de alphas/tokens
             ]
             
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 for endpoint in endpoints:
                     try:
                         url = f"{self.base_url}{endpoint}"
@@ -416,7 +417,7 @@ class GangueClient:
                 f"{self.base_url}/tokens",
             ]
             
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 for url in token_finder_urls:
                     try:
                         cookies = self._get_cookies()
@@ -551,7 +552,7 @@ class GangueClient:
             
             # TENTATIVA 2: HTTP simples (fallback)
             print("🔄 Tentando método HTTP simples...")
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 url = f"{self.base_url}/"
                 cookies = self._get_cookies()
                 headers = self._get_headers()
@@ -0,0 +1,105 @@
+"""
+Camada compartilhada de sessões HTTP (aiohttp) para todas as chamadas externas
+Uma sessão por event loop, com pool de conexões por host, keep-alive e cache de DNS
+(evita novo handshake TCP+TLS e lookup de DNS a cada quote / consulta de preço)
+"""
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict
+import aiohttp
+import config
+
+# Sessões por event loop (aiohttp.ClientSession só funciona no loop onde foi criada)
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+_sessions_lock = threading.Lock()
+
+# Contadores do processo (reuso de conexão vs conexão nova)
+_stats = {
+    'requests': 0,
+    'connections_created': 0,
+    'connections_reused': 0,
+    'dns_cache_hits': 0,
+    'dns_cache_misses': 0,
+    'sessions_created': 0
+}
+
+def _count(key: str):
+    async def _handler(session, trace_config_ctx, params):
+        _stats[key] += 1
+    return _handler
+
+def _build_trace_config() -> aiohttp.TraceConfig:
+    """Hooks do aiohttp que alimentam os contadores"""
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_count('requests'))
+    trace_config.on_connection_create_end.append(_count('connections_created'))
+    trace_config.on_connection_reuseconn.append(_count('connections_reused'))
+    trace_config.on_dns_cache_hit.append(_count('dns_cache_hits'))
+    trace_config.on_dns_cache_miss.append(_count('dns_cache_misses'))
+    return trace_config
+
+def _create_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=config.HTTP_POOL_LIMIT,
+        limit_per_host=config.HTTP_LIMIT_PER_HOST,
+        use_dns_cache=True,
+        ttl_dns_cache=config.HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=config.HTTP_TIMEOUT_SECONDS,
+        connect=config.HTTP_CONNECT_TIMEOUT
+    )
+    _stats['sessions_created'] += 1
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        # Não guarda cookies entre requisições (cookies por requisição continuam funcionando)
+        cookie_jar=aiohttp.DummyCookieJar(),
+        trace_configs=[_build_trace_config()]
+    )
+
+def get_session() -> aiohttp.ClientSession:
+    """Retorna sessão compartilhada do event loop atual (cria na primeira chamada)
+    Timeouts específicos podem ser passados por requisição: session.get(url, timeout=...)
+    """
+    loop = asyncio.get_running_loop()
+    with _sessions_lock:
+        session = _sessions.get(loop)
+        if session is None or session.closed:
+            session = _create_session()
+            _sessions[loop] = session
+        return session
+
+@asynccontextmanager
+async def shared_session():
+    """Substituto de `async with aiohttp.ClientSession() as session` que NÃO fecha a sessão no final"""
+    yield get_session()
+
+async def close_http_sessions():
+    """Fecha a sessão do event loop atual (chamar no encerramento do bot / fim do loop)"""
+    loop = asyncio.get_running_loop()
+    with _sessions_lock:
+        session = _sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
+
+def run_sync(coro):
+    """asyncio.run() que fecha a sessão HTTP do loop antes de encerrá-lo (para wrappers síncronos)"""
+    async def _runner():
+        try:
+            return await coro
+        finally:
+            await close_http_sessions()
+    return asyncio.run(_runner())
+
+def get_http_stats() -> Dict:
+    """Contadores de conexões do processo"""
+    stats = dict(_stats)
+    total_connections = stats['connections_created'] + stats['connections_reused']
+    stats['reuse_ratio'] = round(stats['connections_reused'] / total_connections, 4) if total_connections else 0.0
+    with _sessions_lock:
+        stats['open_sessions'] = sum(1 for s in _sessions.values() if not s.closed)
+    return stats
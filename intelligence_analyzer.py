@@ -1,7 +1,7 @@
 """
 Analisador de Inteligência - Analisa tokens detectados para sugerir melhores configurações
 """
-from detected_tokens_tracker import get_all_detected_tokens
+from detected_tokens_tracker import get_all_detected_tokens, get_token_price_history
 from typing import Dict, List, Tuple
 from datetime import datetime, timezone
 
@@ -58,8 +58,8 @@ def analyze_score_performance(tokens: List[Dict]) -> Dict:
     tokens_that_dropped = 0
     
     for token in tokens:
-        price_history = token.get('price_history', [])
-        if len(price_history) < 2:
+        minutes, prices = get_token_price_history(token)
+        if len(prices) < 2:
             continue
         
         initial_price = token.get('initial_price', 0)
@@ -72,11 +72,10 @@ def analyze_score_performance(tokens: List[Dict]) -> Dict:
         
         # Procura quando atingiu o pico no histórico
         peak_reached_at = None
-        for i, entry in enumerate(price_history):
-            entry_price = entry.get('price', initial_price)
+        for entry_minutes, entry_price in zip(minutes, prices):
             entry_multiple = entry_price / initial_price if initial_price > 0 else 1.0
             if entry_multiple >= max_multiple * 0.95:  # 95% do máximo (tolerância)
-                peak_reached_at = entry.get('minutes_since_detection', 0)
+                peak_reached_at = entry_minutes
                 break
         
         if peak_reached_at is not None and peak_reached_at > 0:
@@ -94,12 +93,10 @@ def analyze_score_performance(tokens: List[Dict]) -> Dict:
         
         # Encontra quando caiu significativamente (se caiu)
         if current_multiple < 0.9:
-            for entry in price_history:
-                entry_price = entry.get('price', initial_price)
+            for entry_minutes, entry_price in zip(minutes, prices):
                 entry_multiple = entry_price / initial_price if initial_price > 0 else 1.0
                 if entry_multiple < 0.9:  # Caiu mais de 10%
-                    drop_time = entry.get('minutes_since_detection', 0)
-                    times_to_drop.append(drop_time)
+                    times_to_drop.append(entry_minutes)
                     break
     
     if len(times_to_peak) == 0:
@@ -144,12 +141,11 @@ def analyze_general_patterns(tokens: List[Dict]) -> Dict:
         all_current_multiples.append(current_multiple)
         
         # Tenta encontrar tempo até pico
-        price_history = token.get('price_history', [])
-        for entry in price_history:
-            entry_price = entry.get('price', initial_price)
+        minutes, prices = get_token_price_history(token)
+        for entry_minutes, entry_price in zip(minutes, prices):
             entry_multiple = entry_price / initial_price if initial_price > 0 else 1.0
             if entry_multiple >= max_multiple * 0.95:
-                all_times_to_peak.append(entry.get('minutes_since_detection', 0))
+                all_times_to_peak.append(entry_minutes)
                 break
     
     if len(all_times_to_peak) == 0:
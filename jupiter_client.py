@@ -1,18 +1,193 @@
 import asyncio
 import aiohttp
+from http_session import shared_session
+from confirmation_tracker import ConfirmationTracker, ConfirmationTimeoutError
+from tx_broadcaster import TransactionBroadcaster
 import json
 import base64
 from solders.keypair import Keypair
 from solders.transaction import VersionedTransaction
 from solders.message import to_bytes_versioned
 from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
 from base58 import b58decode
+import time
 import config
-from typing import Optional, Dict
+from collections import deque
+from typing import Optional, Dict, List, Callable, Awaitable
+from latency_tracker import percentile
+from wallet_balance import get_wallet_balance_service
 
 # Endereços
 SOL_MINT = "So11111111111111111111111111111111111111112"  # Wrapped SOL
 
+# Quote especulativa mais velha que isso é descartada (preço pode ter mudado)
+QUOTE_PREFETCH_MAX_AGE_SECONDS = 5.0
+
+class QuotePrefetch:
+    """Quote SOL → token disparada em segundo plano enquanto as verificações pré-compra rodam"""
+    def __init__(self, task: asyncio.Task, token_address: str, amount_lamports: int, slippage_bps: int):
+        self.task = task
+        self.token_address = token_address
+        self.amount_lamports = amount_lamports
+        self.slippage_bps = slippage_bps
+        self.created_at = time.monotonic()
+        # Evita aviso "Task exception was never retrieved" se a quote for descartada
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    
+    def matches(self, token_address: str, amount_lamports: int, slippage_bps: int) -> bool:
+        """Só pode ser usada se os parâmetros finais da compra forem os mesmos"""
+        return (self.token_address == token_address and
+                self.amount_lamports == amount_lamports and
+                self.slippage_bps == slippage_bps and
+                time.monotonic() - self.created_at <= QUOTE_PREFETCH_MAX_AGE_SECONDS)
+    
+    async def result(self) -> dict:
+        return await self.task
+    
+    def discard(self):
+        """Descarta a quote (alguma verificação falhou ou parâmetros mudaram)"""
+        if not self.task.done():
+            self.task.cancel()
+
+class EndpointHedger:
+    """Requisições "hedged" entre endpoints equivalentes
+    Dispara no endpoint mais rápido (EWMA de latência); se não responder até o prazo (p95 recente),
+    dispara o próximo em paralelo. A primeira resposta boa vence e as outras são canceladas.
+    """
+    def __init__(self, name: str, urls: List[str], alpha: float = 0.2, max_samples: int = 100):
+        self.name = name
+        self.urls = list(urls)
+        self.alpha = alpha  # Peso da amostra nova no EWMA
+        self.endpoints = {
+            url: {
+                'ewma_ms': None,
+                'samples': deque(maxlen=max_samples),
+                'failures': 0,
+                'consecutive_failures': 0,
+                'wins': 0,
+                'hedges_fired': 0,
+                'cancelled': 0
+            }
+            for url in self.urls
+        }
+    
+    def ordered_urls(self) -> List[str]:
+        """Endpoints saudáveis primeiro, do menor para o maior EWMA (sem amostras mantém ordem original)"""
+        def key(url):
+            stats = self.endpoints[url]
+            ewma = stats['ewma_ms'] if stats['ewma_ms'] is not None else float('inf')
+            return (stats['consecutive_failures'] > 0, ewma, self.urls.index(url))
+        return sorted(self.urls, key=key)
+    
+    def hedge_delay(self, url: str) -> float:
+        """Quanto esperar (segundos) pelo endpoint antes de disparar o próximo"""
+        if config.JUPITER_HEDGE_DELAY_MS > 0:
+            return config.JUPITER_HEDGE_DELAY_MS / 1000
+        stats = self.endpoints[url]
+        samples = stats['samples']
+        if len(samples) < 5:
+            # Pouco histórico para p95: usa o dobro do EWMA (ou o limite superior se nunca respondeu)
+            delay_ms = stats['ewma_ms'] * 2 if stats['ewma_ms'] is not None else config.JUPITER_HEDGE_MAX_MS
+        else:
+            delay_ms = percentile(sorted(samples), 95)
+        delay_ms = min(max(delay_ms, config.JUPITER_HEDGE_MIN_MS), config.JUPITER_HEDGE_MAX_MS)
+        return delay_ms / 1000
+    
+    def _record_success(self, url: str, elapsed_ms: float):
+        stats = self.endpoints[url]
+        stats['wins'] += 1
+        stats['consecutive_failures'] = 0
+        stats['samples'].append(elapsed_ms)
+        if stats['ewma_ms'] is None:
+            stats['ewma_ms'] = elapsed_ms
+        else:
+            stats['ewma_ms'] = self.alpha * elapsed_ms + (1 - self.alpha) * stats['ewma_ms']
+    
+    def _record_failure(self, url: str):
+        stats = self.endpoints[url]
+        stats['failures'] += 1
+        stats['consecutive_failures'] += 1
+    
+    async def run(self, request: Callable[[str], Awaitable]):
+        """Executa request(url) com hedge e retorna a primeira resposta boa
+        request deve levantar exceção para respostas ruins (ex: status != 200)
+        """
+        queue = self.ordered_urls()
+        running = {}  # {task: (url, started_at)}
+        last_error = None
+        
+        def launch():
+            url = queue.pop(0)
+            if running:
+                self.endpoints[url]['hedges_fired'] += 1
+            task = asyncio.create_task(request(url))
+            running[task] = (url, time.perf_counter())
+            return url
+        
+        current_url = launch()
+        try:
+            while running:
+                # Só espera o prazo do hedge se ainda há endpoint reserva
+                timeout = self.hedge_delay(current_url) if queue else None
+                done, _ = await asyncio.wait(running.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    # Prazo estourou: dispara o próximo em paralelo (o anterior continua correndo)
+                    current_url = launch()
+                    continue
+                
+                for task in done:
+                    url, started_at = running.pop(task)
+                    if task.exception() is None:
+                        self._record_success(url, (time.perf_counter() - started_at) * 1000)
+                        return task.result()
+                    last_error = task.exception()
+                    self._record_failure(url)
+                
+                # Falhou rápido: não espera o prazo, tenta o próximo imediatamente
+                if not running and queue:
+                    current_url = launch()
+        finally:
+            # Cancela os perdedores
+            for task, (url, _) in running.items():
+                task.cancel()
+                self.endpoints[url]['cancelled'] += 1
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+        
+        raise last_error or Exception(f"Nenhum endpoint de {self.name} respondeu")
+    
+    def get_stats(self) -> Dict:
+        """Resumo por endpoint (EWMA, p95, vitórias, falhas)"""
+        result = {}
+        for url, stats in self.endpoints.items():
+            samples = sorted(stats['samples'])
+            result[url] = {
+                'ewma_ms': round(stats['ewma_ms'], 1) if stats['ewma_ms'] is not None else None,
+                'p95_ms': round(percentile(samples, 95), 1) if samples else None,
+                'hedge_delay_ms': round(self.hedge_delay(url) * 1000, 1),
+                'failures': stats['failures'],
+                'wins': stats['wins'],
+                'hedges_fired': stats['hedges_fired'],
+                'cancelled': stats['cancelled']
+            }
+        return result
+
+# Novos endpoints da Jupiter API (quote-api.jup.ag foi descontinuado)
+QUOTE_URLS = [
+    "https://api.jup.ag/swap/v1/quote",    # Novo endpoint oficial
+    "https://quote-api.jup.ag/v6/quote"   # Fallback (pode não funcionar)
+]
+SWAP_URLS = [
+    "https://api.jup.ag/swap/v1/swap",    # Novo endpoint oficial
+    "https://quote-api.jup.ag/v6/swap"   # Fallback (pode não funcionar)
+]
+
+# Compartilhados por todas as instâncias do processo (histórico de latência não se perde)
+quote_hedger = EndpointHedger('quote', QUOTE_URLS)
+swap_hedger = EndpointHedger('swap', SWAP_URLS)
+
 class JupiterClient:
     def __init__(self):
         self.rpc_url = config.RPC_URL
@@ -26,6 +201,20 @@ class JupiterClient:
             print(f"✅ Usando RPC da Alchemy: {self.rpc_url.split('/v2/')[0]}/v2/***")
         self.client = AsyncClient(self.rpc_url)
         self.keypair = self._load_keypair()
+        # Confirmação em lote de todas as transações em andamento (sem sleep fixo)
+        self.confirmations = ConfirmationTracker(
+            self.rpc_url,
+            poll_interval=config.CONFIRMATION_POLL_INTERVAL_MS / 1000,
+            timeout=config.CONFIRMATION_TIMEOUT_SECONDS
+        )
+        # Envio para vários RPCs com reenvio até confirmar
+        self.broadcaster = TransactionBroadcaster(
+            config.SEND_RPC_URLS or [self.rpc_url],
+            self.confirmations,
+            skip_preflight=config.SKIP_PREFLIGHT,
+            rebroadcast_interval=config.REBROADCAST_INTERVAL_MS / 1000,
+            max_lifetime=config.CONFIRMATION_TIMEOUT_SECONDS
+        )
     
     def _load_keypair(self) -> Keypair:
         """Load keypair from private key"""
@@ -53,13 +242,6 @@ class JupiterClient:
         """Get swap quote from Jupiter with retry and alternative endpoints"""
         slippage = slippage_bps or self.slippage_bps
         
-        # Usa novos endpoints da Jupiter API (quote-api.jup.ag foi descontinuado)
-        # Novo endpoint: api.jup.ag/swap/v1/quote
-        urls = [
-            "https://api.jup.ag/swap/v1/quote",    # Novo endpoint oficial
-            "https://quote-api.jup.ag/v6/quote"   # Fallback (pode não funcionar)
-        ]
-        
         params = {
             "inputMint": input_mint,
             "outputMint": output_mint,
@@ -76,28 +258,23 @@ class JupiterClient:
         if hasattr(config, 'JUPITER_API_KEY') and config.JUPITER_API_KEY:
             headers["x-api-key"] = config.JUPITER_API_KEY
         
+        async def request(url):
+            timeout = aiohttp.ClientTimeout(total=10)
+            async with shared_session() as session:
+                async with session.get(url, params=params, headers=headers, timeout=timeout) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    error_text = await response.text()
+                    raise Exception(f"Erro ao obter quote: {response.status} - {error_text}")
+        
         last_error = None
-        for url in urls:
-            for attempt in range(max_retries):
-                try:
-                    timeout = aiohttp.ClientTimeout(total=10)
-                    async with aiohttp.ClientSession(timeout=timeout) as session:
-                        async with session.get(url, params=params, headers=headers) as response:
-                            if response.status == 200:
-                                return await response.json()
-                            else:
-                                error_text = await response.text()
-                                last_error = Exception(f"Erro ao obter quote: {response.status} - {error_text}")
-                except aiohttp.ClientConnectorError as e:
-                    last_error = e
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(1 * (attempt + 1))  # Backoff
-                    continue
-                except Exception as e:
-                    last_error = e
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(1 * (attempt + 1))
-                    continue
+        for attempt in range(max_retries):
+            try:
+                return await quote_hedger.run(request)
+            except Exception as e:
+                last_error = e
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(0.2 * (attempt + 1))  # Backoff curto (endpoints já disputaram em paralelo)
         
         raise Exception(f"Erro ao obter quote após {max_retries} tentativas: {last_error}")
     
@@ -107,12 +284,6 @@ class JupiterClient:
             quote: Quote response from get_quote
             use_sol: True para SOL (wrap/unwrap), False para tokens SPL
         """
-        # Usa novos endpoints da Jupiter API
-        urls = [
-            "https://api.jup.ag/swap/v1/swap",    # Novo endpoint oficial
-            "https://quote-api.jup.ag/v6/swap"   # Fallback (pode não funcionar)
-        ]
-        
         payload = {
             "quoteResponse": quote,
             "userPublicKey": str(self.keypair.pubkey()),
@@ -129,34 +300,35 @@ class JupiterClient:
         if hasattr(config, 'JUPITER_API_KEY') and config.JUPITER_API_KEY:
             headers["x-api-key"] = config.JUPITER_API_KEY
         
+        async def request(url):
+            timeout = aiohttp.ClientTimeout(total=15)
+            async with shared_session() as session:
+                async with session.post(url, json=payload, headers=headers, timeout=timeout) as response:
+                    if response.status == 200:
+                        swap_transaction = await response.json()
+                        # Usado pelo broadcaster para parar de reenviar quando o blockhash expirar
+                        quote['last_valid_block_height'] = swap_transaction.get('lastValidBlockHeight')
+                        return swap_transaction['swapTransaction']
+                    error_text = await response.text()
+                    raise Exception(f"Erro ao executar swap: {response.status} - {error_text}")
+        
         last_error = None
-        for url in urls:
-            for attempt in range(max_retries):
-                try:
-                    timeout = aiohttp.ClientTimeout(total=15)
-                    async with aiohttp.ClientSession(timeout=timeout) as session:
-                        async with session.post(url, json=payload, headers=headers) as response:
-                            if response.status == 200:
-                                swap_transaction = await response.json()
-                                return swap_transaction['swapTransaction']
-                            else:
-                                error_text = await response.text()
-                                last_error = Exception(f"Erro ao executar swap: {response.status} - {error_text}")
-                except aiohttp.ClientConnectorError as e:
-                    last_error = e
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(1 * (attempt + 1))  # Backoff
-                    continue
-                except Exception as e:
-                    last_error = e
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(1 * (attempt + 1))
-                    continue
+        for attempt in range(max_retries):
+            try:
+                return await swap_hedger.run(request)
+            except Exception as e:
+                last_error = e
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(0.2 * (attempt + 1))
         
         raise Exception(f"Erro ao executar swap após {max_retries} tentativas: {last_error}")
     
-    async def send_transaction(self, transaction_hex: str) -> str:
-        """Send transaction to Solana network"""
+    async def send_transaction(self, transaction_hex: str, last_valid_block_height: int = None) -> str:
+        """Send transaction to Solana network
+        Envia para todos os RPCs de SEND_RPC_URLS e reenvia até confirmar ou o blockhash expirar
+        Args:
+            last_valid_block_height: Retornado pelo swap da Jupiter (limite para reenvio)
+        """
         try:
             transaction_bytes = base64.b64decode(transaction_hex)
             transaction = VersionedTransaction.from_bytes(transaction_bytes)
@@ -168,9 +340,12 @@ class JupiterClient:
             # Cria uma nova transação populada com a assinatura usando populate
             signed_transaction = VersionedTransaction.populate(transaction.message, [signature])
             
-            # Envia a transação assinada
-            result = await self.client.send_transaction(signed_transaction)
-            return str(result.value)
+            # Envia a transação assinada (retorna quando o primeiro RPC aceitar)
+            return await self.broadcaster.send(
+                bytes(signed_transaction),
+                str(signature),
+                last_valid_block_height=last_valid_block_height
+            )
         except Exception as e:
             error_str = str(e)
             # Melhora mensagem de erro para erros comuns
@@ -183,12 +358,28 @@ class JupiterClient:
             else:
                 raise Exception(f"Erro ao enviar transação: {error_str[:300]}")
     
-    async def buy_token(self, token_address: str, amount_sol: float, max_slippage_bps: int = None) -> tuple:
+    def prefetch_buy_quote(self, token_address: str, amount_sol: float, slippage_bps: int = 1000) -> QuotePrefetch:
+        """Dispara quote SOL → token em paralelo (especulativa)
+        O resultado é usado por buy_token(prefetched_quote=...) se os parâmetros baterem;
+        caso contrário é descartado.
+        Args:
+            slippage_bps: Deve ser o primeiro nível de slippage que buy_token vai tentar (padrão: 1000)
+        """
+        amount_lamports = int(amount_sol * 1e9)
+        task = asyncio.create_task(
+            self.get_quote(SOL_MINT, token_address, amount_lamports, slippage_bps=slippage_bps)
+        )
+        return QuotePrefetch(task, token_address, amount_lamports, slippage_bps)
+    
+    async def buy_token(self, token_address: str, amount_sol: float, max_slippage_bps: int = None,
+                        trace=None, prefetched_quote: QuotePrefetch = None) -> tuple:
         """Buy token with SOL
         Args:
             token_address: Token mint address to buy
             amount_sol: Amount in SOL (not lamports)
             max_slippage_bps: Slippage máximo em basis points (padrão: 1000 = 10%, pode aumentar até 2000 = 20%)
+            trace: LatencyTrace opcional (marca quote, swap_build, send e confirm)
+            prefetched_quote: QuotePrefetch disparada antes (usada no primeiro nível de slippage se bater)
         Returns: (tx_signature, quote_data) where quote_data contains:
             - outAmount: quantidade de tokens recebidos (raw)
             - inAmount: quantidade de SOL enviada (lamports)
@@ -207,7 +398,22 @@ class JupiterClient:
                     print(f"   🔄 Tentando comprar com slippage: {slippage_bps/100}% ({slippage_bps} bps)")
                     
                     # Get quote: SOL -> Token com slippage específico
-                    quote = await self.get_quote(SOL_MINT, token_address, amount_sol_lamports, slippage_bps=slippage_bps)
+                    quote = None
+                    if prefetched_quote is not None:
+                        prefetch = prefetched_quote
+                        prefetched_quote = None  # Usa no máximo uma vez
+                        if prefetch.matches(token_address, amount_sol_lamports, slippage_bps):
+                            try:
+                                quote = await prefetch.result()
+                                print(f"   ⚡ Usando quote pré-carregada")
+                            except Exception as prefetch_error:
+                                print(f"   ⚠️  Quote pré-carregada falhou ({prefetch_error}), buscando nova...")
+                        else:
+                            prefetch.discard()
+                    if quote is None:
+                        quote = await self.get_quote(SOL_MINT, token_address, amount_sol_lamports, slippage_bps=slippage_bps)
+                    if trace:
+                        trace.mark('quote')
                     
                     if not quote.get('outAmount'):
                         raise Exception("Quote inválida: sem outAmount")
@@ -229,12 +435,17 @@ class JupiterClient:
                     
                     # Execute swap (use_sol=True porque estamos usando SOL)
                     swap_transaction = await self.swap(quote, use_sol=True)
-                    
-                    # Obtém saldo ANTES da compra
-                    balance_before = await self.get_wallet_sol_balance()
+                    if trace:
+                        trace.mark('swap_build')
                     
                     # Send transaction
-                    tx_signature = await self.send_transaction(swap_transaction)
+                    tx_signature = await self.send_transaction(swap_transaction, quote.get('last_valid_block_height'))
+                    if trace:
+                        trace.mark('send')
+                    send_result = self.broadcaster.get_result(tx_signature)
+                    if send_result:
+                        quote['send_endpoint'] = send_result['first_ack']
+                        print(f"   📡 Aceita primeiro por {send_result['first_ack']} em {send_result['first_ack_ms']:.0f}ms")
                     
                     # Se chegou aqui, deu certo! Sai do loop
                     print(f"✅ Compra executada! TX: {tx_signature}")
@@ -242,53 +453,36 @@ class JupiterClient:
                     print(f"   Tokens recebidos (quote): {out_amount}")
                     print(f"   Preço calculado (quote): {quote['calculated_price']:.10f} SOL/token")
                     
-                    # Obtém valores reais comparando saldo da carteira (método mais confiável)
-                    print(f"   🔍 Consultando saldo da carteira para valores reais...")
-                    balance_details = await self.get_transaction_details_by_balance(balance_before, wait_seconds=5)
+                    # Aguarda confirmação e lê valores reais da própria transação
+                    # (pre/post balances da carteira nesta TX - não se mistura com outros trades simultâneos)
+                    print(f"   🔍 Aguardando confirmação para valores reais...")
+                    tx_details = await self.confirm_transaction(tx_signature)
                     
-                    if balance_details and balance_details.get('confirmed'):
-                        real_sol_spent = abs(balance_details['sol_received'])  # Deve ser negativo (gastou SOL), convertemos para positivo
+                    if tx_details and tx_details.get('confirmed'):
+                        real_sol_spent = abs(tx_details['sol_received'])  # Deve ser negativo (gastou SOL), convertemos para positivo
                         
                         if real_sol_spent > 0:
                             # Tokens reais recebidos vêm do quote (outAmount é o que realmente foi recebido na transação)
                             real_tokens_received = out_amount
                             
-                            # Calcula preço de entrada REAL: SOL_real_gasto / Tokens_reais_recebidos
-                            # Preço = quanto SOL custa cada token
-                            # outAmount está em unidades brutas do token (com decimais já aplicados)
-                            # Para calcular o preço unitário correto:
-                            # Preço = SOL gasto / (tokens recebidos / 10^decimais)
-                            # Como não sabemos os decimais exatos, assumimos 9 decimais (padrão Solana)
-                            # Mas o importante é manter a proporção correta
                             # Não calculamos preço aqui porque não sabemos os decimais do token
                             # O preço será usado do Telegram no bot.py (mais confiável)
                             quote['real_in_amount_sol'] = real_sol_spent
                             quote['real_out_amount_tokens'] = real_tokens_received
                             quote['from_balance'] = True
                             
-                            print(f"   ✅ Valores reais calculados pelo saldo da carteira:")
-                            print(f"      Saldo antes: {balance_before:.6f} SOL")
-                            print(f"      Saldo depois: {balance_details['balance_after']:.6f} SOL")
+                            print(f"   ✅ Valores reais da transação confirmada ({tx_details.get('confirmation_ms', 0):.0f}ms):")
+                            print(f"      Saldo antes: {tx_details['balance_before']:.6f} SOL")
+                            print(f"      Saldo depois: {tx_details['balance_after']:.6f} SOL")
                             print(f"      SOL gasto REAL: {real_sol_spent:.6f} SOL")
                             print(f"      Tokens recebidos REAL: {real_tokens_received}")
                             print(f"      Preço será usado do Telegram (mais confiável para tokens novos)")
                         else:
                             print(f"   ⚠️  Saldo não diminuiu como esperado, usando valores do quote")
                     else:
-                        print(f"   ⚠️  Não foi possível calcular pelo saldo, usando valores do quote")
-                    
-                    # Tenta também obter detalhes da transação (método complementar)
-                    try:
-                        tx_details = await self.get_transaction_details(tx_signature, max_retries=2, wait_seconds=2)
-                        if tx_details and tx_details.get('confirmed') and tx_details.get('tokens_sold', 0) > 0:
-                            # Se conseguiu tokens da transação, usa para validar
-                            if not quote.get('from_balance'):
-                                quote['real_out_amount_tokens'] = tx_details['tokens_sold']
-                                if tx_details.get('real_price', 0) > 0:
-                                    quote['calculated_price'] = tx_details['real_price']
-                                    quote['from_blockchain'] = True
-                    except:
-                        pass  # Não bloqueia se falhar
+                        print(f"   ⚠️  Não foi possível obter valores reais, usando valores do quote")
+                    if trace:
+                        trace.mark('confirm')
                     
                     return tx_signature, quote
                     
@@ -395,11 +589,8 @@ class JupiterClient:
                     # Execute swap (use_sol=True porque estamos vendendo para SOL)
                     swap_transaction = await self.swap(quote, use_sol=True)
                     
-                    # Obtém saldo ANTES da venda
-                    balance_before = await self.get_wallet_sol_balance()
-                    
                     # Send transaction
-                    tx_signature = await self.send_transaction(swap_transaction)
+                    tx_signature = await self.send_transaction(swap_transaction, quote.get('last_valid_block_height'))
                     
                     # Se chegou aqui, deu certo! Sai do loop
                     print(f"✅ Venda executada! TX: {tx_signature}")
@@ -407,44 +598,33 @@ class JupiterClient:
                     print(f"   SOL recebido (quote): {quote['real_out_amount_sol']:.6f} SOL")
                     print(f"   Preço de venda (quote): {quote['calculated_price']:.10f} SOL/token")
                     
-                    # Obtém valores reais comparando saldo da carteira (método mais confiável)
-                    print(f"   🔍 Consultando saldo da carteira para valores reais...")
-                    balance_details = await self.get_transaction_details_by_balance(balance_before, wait_seconds=5)
+                    # Aguarda confirmação e lê valores reais da própria transação
+                    print(f"   🔍 Aguardando confirmação para valores reais...")
+                    tx_details = await self.confirm_transaction(tx_signature)
                     
-                    if balance_details and balance_details.get('confirmed'):
-                        real_sol_received = balance_details['sol_received']  # Deve ser positivo (recebeu SOL)
+                    if tx_details and tx_details.get('confirmed'):
+                        real_sol_received = tx_details['sol_received']  # Deve ser positivo (recebeu SOL)
                         
-                        # Verifica se realmente recebeu SOL (pode ser negativo se ainda não confirmou)
                         if real_sol_received > 0.0001:  # Mínimo de 0.0001 SOL para considerar válido
                             quote['real_out_amount_sol'] = real_sol_received
                             quote['real_in_amount_tokens'] = in_amount
                             quote['from_balance'] = True
                             
-                            print(f"   ✅ Valores reais calculados pelo saldo da carteira:")
-                            print(f"      Saldo antes: {balance_before:.6f} SOL")
-                            print(f"      Saldo depois: {balance_details['balance_after']:.6f} SOL")
+                            print(f"   ✅ Valores reais da transação confirmada ({tx_details.get('confirmation_ms', 0):.0f}ms):")
+                            print(f"      Saldo antes: {tx_details['balance_before']:.6f} SOL")
+                            print(f"      Saldo depois: {tx_details['balance_after']:.6f} SOL")
                             print(f"      SOL recebido REAL: {real_sol_received:.6f} SOL")
                             print(f"      Tokens vendidos: {in_amount}")
-                        elif real_sol_received <= 0:
-                            print(f"   ⚠️  Saldo não aumentou ainda (mudança: {real_sol_received:.6f} SOL) - transação pode estar pendente")
-                            print(f"   💡 Usando valores do quote: {quote.get('real_out_amount_sol', 0):.6f} SOL")
                         else:
                             print(f"   ⚠️  Mudança muito pequena ({real_sol_received:.6f} SOL) - usando valores do quote")
+                        
+                        if tx_details.get('tokens_sold', 0) > 0 and not quote.get('from_balance'):
+                            quote['real_in_amount_tokens'] = tx_details['tokens_sold']
+                            if tx_details.get('real_price', 0) > 0:
+                                quote['calculated_price'] = tx_details['real_price']
+                                quote['from_blockchain'] = True
                     else:
-                        print(f"   ⚠️  Não foi possível calcular pelo saldo, usando valores do quote")
-                    
-                    # Tenta também obter detalhes da transação (método complementar)
-                    try:
-                        tx_details = await self.get_transaction_details(tx_signature, max_retries=2, wait_seconds=2)
-                        if tx_details and tx_details.get('confirmed') and tx_details.get('tokens_sold', 0) > 0:
-                            # Se conseguiu tokens da transação, usa para validar
-                            if not quote.get('from_balance'):
-                                quote['real_in_amount_tokens'] = tx_details['tokens_sold']
-                                if tx_details.get('real_price', 0) > 0:
-                                    quote['calculated_price'] = tx_details['real_price']
-                                    quote['from_blockchain'] = True
-                    except:
-                        pass  # Não bloqueia se falhar
+                        print(f"   ⚠️  Não foi possível obter valores reais, usando valores do quote")
                     
                     # Adiciona informações sobre quantidade vendida
                     quote['tokens_requested'] = amount_tokens
@@ -579,51 +759,57 @@ class JupiterClient:
             print(f"⚠️  Erro ao obter saldo: {e}")
             return 0.0
     
-    async def get_transaction_details_by_balance(self, balance_before: float, wait_seconds: int = 5) -> Optional[Dict]:
-        """Obtém valores reais da transação comparando saldo antes/depois
-        Args:
-            balance_before: Saldo de SOL antes da transação
-            wait_seconds: Segundos para aguardar confirmação (padrão: 5 segundos)
+    async def confirm_transaction(self, tx_signature: str, commitment: str = None) -> Optional[Dict]:
+        """Aguarda a transação atingir o commitment e retorna seus valores reais
+        Raises:
+            TransactionFailedError: transação falhou on-chain (texto contém o erro, ex: Custom 6001)
         Returns:
-            Dict com valores reais: {
-                'sol_received': float,  # Positivo para venda, negativo para compra
-                'sol_change': float,    # Mudança no saldo
-                'confirmed': bool
-            }
+            Dict de get_transaction_details + 'confirmation_ms', ou None se não confirmou no prazo
         """
-        # Aguarda confirmação (aumentado para 5 segundos para dar tempo da transação confirmar)
-        await asyncio.sleep(wait_seconds)
-        
-        # Obtém saldo após transação
-        balance_after = await self.get_wallet_sol_balance()
-        
-        # Calcula diferença
-        sol_change = balance_after - balance_before
+        commitment = commitment or config.CONFIRMATION_COMMITMENT
+        try:
+            status = await self.confirmations.wait_for(tx_signature, commitment=commitment)
+        except ConfirmationTimeoutError as e:
+            # Transação já foi enviada e pode confirmar depois - não trata como falha
+            print(f"   ⚠️  {e}")
+            return None
         
-        return {
-            'sol_received': sol_change,  # Positivo = recebeu SOL (venda), Negativo = gastou SOL (compra)
-            'sol_change': sol_change,
-            'balance_before': balance_before,
-            'balance_after': balance_after,
-            'confirmed': True
-        }
+        # getTransaction não aceita 'processed' - no mínimo 'confirmed'
+        tx_commitment = 'finalized' if commitment == 'finalized' else 'confirmed'
+        tx_details = await self.get_transaction_details(
+            tx_signature, max_retries=5, wait_seconds=0, commitment=tx_commitment, retry_delay=0.4
+        )
+        if tx_details:
+            tx_details['confirmation_ms'] = status.get('elapsed_ms', 0)
+            tx_details['slot'] = status.get('slot')
+            if tx_details.get('confirmed') and tx_details.get('sol_received') is not None:
+                # Saldo em memória acompanha o swap na hora (próxima leitura RPC confirma)
+                get_wallet_balance_service().apply_delta(tx_details['sol_received'], tx_details.get('slot'))
+        return tx_details
     
-    async def get_transaction_details(self, tx_signature: str, max_retries: int = 5, wait_seconds: int = 3) -> Optional[Dict]:
+    async def get_transaction_details(self, tx_signature: str, max_retries: int = 5, wait_seconds: int = 3,
+                                      commitment: str = None, retry_delay: float = 2) -> Optional[Dict]:
         """Obtém detalhes reais da transação do Solscan/RPC após confirmação
         Args:
             tx_signature: Assinatura da transação
             max_retries: Número máximo de tentativas
-            wait_seconds: Segundos para aguardar confirmação
+            wait_seconds: Segundos para aguardar confirmação (0 se já confirmada pelo ConfirmationTracker)
+            commitment: Commitment do getTransaction ('confirmed' ou 'finalized'; padrão do cliente RPC)
+            retry_delay: Segundos entre tentativas
         Returns:
             Dict com valores reais: {
-                'sol_received': float,
+                'sol_received': float,  # Variação de SOL da carteira nesta TX (negativo = gastou)
+                'balance_before': float,
+                'balance_after': float,
                 'tokens_sold': int,
                 'real_price': float,
                 'confirmed': bool
             }
         """
         # Aguarda confirmação
-        await asyncio.sleep(wait_seconds)
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+        rpc_commitment = Commitment(commitment) if commitment else None
         
         for attempt in range(max_retries):
             try:
@@ -648,6 +834,7 @@ class JupiterClient:
                     result = await self.client.get_transaction(
                         sig,
                         encoding="jsonParsed",
+                        commitment=rpc_commitment,
                         max_supported_transaction_version=0
                     )
                 except TypeError:
@@ -655,12 +842,13 @@ class JupiterClient:
                     result = await self.client.get_transaction(
                         tx_signature,
                         encoding="jsonParsed",
+                        commitment=rpc_commitment,
                         max_supported_transaction_version=0
                     )
                 
                 if result.value is None:
                     if attempt < max_retries - 1:
-                        await asyncio.sleep(2)
+                        await asyncio.sleep(retry_delay)
                         continue
                     return None
                 
@@ -669,11 +857,13 @@ class JupiterClient:
                 
                 if not meta:
                     if attempt < max_retries - 1:
-                        await asyncio.sleep(2)
+                        await asyncio.sleep(retry_delay)
                         continue
                     return None
                 
                 sol_received = 0.0
+                pre_sol = 0.0
+                post_sol = 0.0
                 tokens_sold = 0
                 token_mint = None
                 
@@ -720,7 +910,7 @@ class JupiterClient:
                 # Se não conseguiu valores, tenta via Solscan API pública
                 if (sol_received == 0 and tokens_sold == 0) or attempt == max_retries - 1:
                     try:
-                        async with aiohttp.ClientSession() as session:
+                        async with shared_session() as session:
                             # API pública do Solscan (sem autenticação)
                             url = f"https://public-api.solscan.io/transaction/{tx_signature}"
                             headers = {
@@ -746,6 +936,8 @@ class JupiterClient:
                 # Retorna mesmo se não conseguiu todos os valores (pode ser útil)
                 return {
                     'sol_received': sol_received,
+                    'balance_before': pre_sol,
+                    'balance_after': post_sol,
                     'tokens_sold': tokens_sold,
                     'real_price': real_price,
                     'token_mint': token_mint,
@@ -754,14 +946,24 @@ class JupiterClient:
                 
             except Exception as e:
                 if attempt < max_retries - 1:
-                    await asyncio.sleep(2)
+                    await asyncio.sleep(retry_delay)
                     continue
                 print(f"⚠️  Erro ao obter detalhes da transação {tx_signature[:8]}...: {e}")
                 return None
         
         return None
     
+    def get_endpoint_stats(self) -> Dict:
+        """Latência e vitórias por endpoint da Jupiter (quote e swap)"""
+        return {
+            'quote': quote_hedger.get_stats(),
+            'swap': swap_hedger.get_stats(),
+            'send': self.broadcaster.get_stats()
+        }
+    
     async def close(self):
         """Close RPC client"""
+        await self.broadcaster.stop()
+        await self.confirmations.stop()
         await self.client.close()
 
@@ -0,0 +1,149 @@
+"""
+Instrumentação de latência do caminho de compra (mensagem → assinatura)
+Cada estágio é medido com relógio monotônico e agregado em histogramas por estágio (p50/p95/p99)
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+LATENCY_STATS_FILE = 'latency_stats.json'
+MAX_SAMPLES_PER_STAGE = 1000  # Janela de amostras recentes por estágio
+MAX_RECENT_TRACES = 50  # Últimos sinais completos mantidos para inspeção
+
+class LatencyTrace:
+    """Linha do tempo de um sinal: cada mark() registra o tempo gasto desde a marca anterior"""
+    def __init__(self, label: str = None):
+        self.label = label
+        self.started_at = time.perf_counter()
+        self._last = self.started_at
+        self.stages: Dict[str, float] = {}  # {estagio: ms} (estágios repetidos são somados)
+        self.order: List[str] = []
+
+    def mark(self, stage: str):
+        """Fecha o estágio atual (tempo desde a última marca)"""
+        now = time.perf_counter()
+        elapsed_ms = (now - self._last) * 1000
+        self._last = now
+        if stage not in self.stages:
+            self.stages[stage] = 0.0
+            self.order.append(stage)
+        self.stages[stage] += elapsed_ms
+
+    def total_ms(self) -> float:
+        """Tempo total desde o início do trace até a última marca"""
+        return (self._last - self.started_at) * 1000
+
+    def ms_until(self, stage: str) -> float:
+        """Tempo acumulado do início até o fim do estágio informado (inclusive)"""
+        total = 0.0
+        for name in self.order:
+            total += self.stages[name]
+            if name == stage:
+                break
+        return total
+
+    def to_dict(self) -> Dict:
+        """Formato salvo junto com o trade e nas estatísticas"""
+        return {
+            'label': self.label,
+            'stages': {stage: round(self.stages[stage], 2) for stage in self.order},
+            'total_ms': round(self.total_ms(), 2)
+        }
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Percentil por nearest-rank (lista já ordenada)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class LatencyStats:
+    """Histogramas por estágio (janela das últimas N amostras)"""
+    def __init__(self, max_samples: int = MAX_SAMPLES_PER_STAGE):
+        self.max_samples = max_samples
+        self._samples: Dict[str, deque] = {}
+        self._stage_order: List[str] = []
+        self._recent = deque(maxlen=MAX_RECENT_TRACES)
+        self._lock = threading.Lock()
+        self.traces_count = 0
+        self._last_save = 0.0
+
+    def record(self, trace: LatencyTrace):
+        """Adiciona todos os estágios de um trace aos histogramas"""
+        data = trace.to_dict()
+        with self._lock:
+            self.traces_count += 1
+            for stage, ms in data['stages'].items():
+                self._add_sample(stage, ms)
+            self._add_sample('total', data['total_ms'])
+            self._recent.append(data)
+
+    def _add_sample(self, stage: str, ms: float):
+        if stage not in self._samples:
+            self._samples[stage] = deque(maxlen=self.max_samples)
+            self._stage_order.append(stage)
+        self._samples[stage].append(ms)
+
+    def summary(self) -> Dict:
+        """Retorna p50/p95/p99 por estágio"""
+        with self._lock:
+            stages = {}
+            for stage in self._stage_order:
+                values = sorted(self._samples[stage])
+                stages[stage] = {
+                    'count': len(values),
+                    'p50': round(percentile(values, 50), 2),
+                    'p95': round(percentile(values, 95), 2),
+                    'p99': round(percentile(values, 99), 2),
+                    'max': round(values[-1], 2) if values else 0.0,
+                    'mean': round(sum(values) / len(values), 2) if values else 0.0
+                }
+            return {
+                'traces_count': self.traces_count,
+                'stages': stages,
+                'recent': list(self._recent),
+                'updated_at': time.time()
+            }
+
+    def should_save(self, min_interval: float = 5.0) -> bool:
+        """Evita gravar o arquivo a cada mensagem (reserva o próximo save se estiver na hora)"""
+        now = time.monotonic()
+        if now - self._last_save >= min_interval:
+            self._last_save = now
+            return True
+        return False
+
+    def save(self, path: str = LATENCY_STATS_FILE):
+        """Salva resumo em disco (escrita atômica) para a interface web"""
+        data = self.summary()
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️  Erro ao salvar estatísticas de latência: {e}")
+
+# Instância global (singleton)
+_latency_stats = None
+
+def get_latency_stats() -> LatencyStats:
+    """Retorna estatísticas de latência do processo (singleton)"""
+    global _latency_stats
+    if _latency_stats is None:
+        _latency_stats = LatencyStats()
+    return _latency_stats
+
+def load_latency_summary(path: str = LATENCY_STATS_FILE) -> Optional[Dict]:
+    """Lê o resumo salvo pelo bot (usado pela interface web)"""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return None
+    return None
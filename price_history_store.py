@@ -0,0 +1,208 @@
+"""
+Histórico de preços dos tokens detectados (colunar, só-append)
+Cada token tem um buffer circular com preços (float64) e horários (int64, ms) em arrays
+contíguos; cada ponto novo é anexado a um arquivo binário de registros fixos - atualizar é
+O(1) e quem lê (gráficos, intelligence_analyzer) recebe os arrays prontos, sem JSON.
+Bot e interface web gravam no mesmo arquivo: gravação e leitura pegam um lock compartilhado
+no arquivo .lock ao lado e a compactação um exclusivo - nenhum registro se perde na troca.
+"""
+import os
+import struct
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+import config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Registro: mint (44 bytes, base58 com padding) + horário em ms + preço
+RECORD = struct.Struct('<44sqd')
+COMPACT_RATIO = 4  # Reescreve o arquivo quando tem X vezes mais registros que os buffers guardam
+
+class PriceRing:
+    """Buffer circular de (horário ms, preço) com capacidade fixa"""
+    __slots__ = ('capacity', 'timestamps', 'prices', 'start', 'count')
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = array('q', bytes(8 * capacity))
+        self.prices = array('d', bytes(8 * capacity))
+        self.start = 0
+        self.count = 0
+
+    def append(self, timestamp_ms: int, price: float):
+        index = (self.start + self.count) % self.capacity
+        self.timestamps[index] = timestamp_ms
+        self.prices[index] = price
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity  # Sobrescreve o mais antigo
+
+    def arrays(self) -> Tuple[array, array]:
+        """Cópia em ordem cronológica (timestamps, preços)"""
+        end = self.start + self.count
+        if end <= self.capacity:
+            return self.timestamps[self.start:end], self.prices[self.start:end]
+        wrap = end - self.capacity
+        return (self.timestamps[self.start:] + self.timestamps[:wrap],
+                self.prices[self.start:] + self.prices[:wrap])
+
+class PriceHistoryStore:
+    def __init__(self, path: str = None, capacity: int = None):
+        """
+        Args:
+            path: Arquivo de registros (padrão: PRICE_HISTORY_FILE)
+            capacity: Pontos mantidos por token (padrão: PRICE_HISTORY_POINTS)
+        """
+        self.path = path or config.PRICE_HISTORY_FILE
+        self.lock_path = f"{self.path}.lock"
+        self.capacity = capacity or config.PRICE_HISTORY_POINTS
+        self._lock = threading.RLock()
+        self._rings: Dict[str, PriceRing] = {}  # Índice por mint
+        self._offset = 0  # Até onde o arquivo já foi lido
+        self._inode = None
+        self._records = 0  # Registros no arquivo (para decidir a compactação)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = False):
+        """Lock entre processos no arquivo .lock (Windows: sempre exclusivo)"""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                yield
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)  # Fechar libera o flock
+
+    def _catch_up(self):
+        """Lê registros anexados por outro processo (ou tudo, se o arquivo foi compactado/trocado)"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino == self._inode and 0 <= stat.st_size - self._offset < RECORD.size:
+            return  # Nada novo - sem lock
+        with self._file_lock():
+            self._catch_up_locked()
+
+    def _catch_up_locked(self):
+        """_catch_up com o lock do arquivo já pego (o arquivo não é trocado durante a leitura)"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._rings = {}
+            self._offset = 0
+            self._records = 0
+            self._inode = stat.st_ino
+        if stat.st_size - self._offset < RECORD.size:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read(stat.st_size - self._offset)
+        usable = len(data) - len(data) % RECORD.size  # Ignora registro incompleto (sendo gravado)
+        for mint, timestamp_ms, price in RECORD.iter_unpack(memoryview(data)[:usable]):
+            self._ring(mint.rstrip(b'\0').decode('ascii')).append(timestamp_ms, price)
+        self._offset += usable
+        self._records += usable // RECORD.size
+
+    def _ring(self, mint: str) -> PriceRing:
+        ring = self._rings.get(mint)
+        if ring is None:
+            ring = self._rings[mint] = PriceRing(self.capacity)
+        return ring
+
+    def append(self, mint: str, price: float, timestamp: float = None):
+        """Adiciona um ponto (timestamp em segundos epoch; padrão: agora)"""
+        self.append_many([(mint, price, timestamp)])
+
+    def append_many(self, points: Iterable[Tuple[str, float, Optional[float]]]):
+        """Adiciona vários pontos (mint, preço, timestamp) numa única gravação"""
+        now = time.time()
+        data = b''.join(
+            RECORD.pack(mint.encode('ascii'), int((now if timestamp is None else timestamp) * 1000), price)
+            for mint, price, timestamp in points
+        )
+        if not data:
+            return
+        with self._lock:
+            # O_APPEND + registros de tamanho fixo: gravações de processos diferentes não se misturam;
+            # o lock compartilhado impede que a compactação troque o arquivo no meio da gravação
+            with self._file_lock():
+                fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+                try:
+                    os.write(fd, data)
+                finally:
+                    os.close(fd)
+            self._catch_up()  # Lê o próprio registro (e os de outros processos) na ordem do arquivo
+            if self._records > COMPACT_RATIO * max(1, len(self._rings)) * self.capacity:
+                self.compact()
+
+    def get_arrays(self, mint: str) -> Tuple[array, array]:
+        """Histórico em ordem cronológica: (timestamps em ms, preços) - arrays vazios se não houver"""
+        with self._lock:
+            self._catch_up()
+            ring = self._rings.get(mint)
+            if ring is None:
+                return array('q'), array('d')
+            return ring.arrays()
+
+    def has(self, mint: str) -> bool:
+        with self._lock:
+            self._catch_up()
+            return mint in self._rings
+
+    def compact(self):
+        """Reescreve o arquivo só com o que os buffers guardam (troca atômica)
+        Com o lock exclusivo nenhum outro processo grava entre a última leitura e a troca
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            self._catch_up_locked()
+            tmp_path = f"{self.path}.tmp"
+            records = 0
+            with open(tmp_path, 'wb') as f:
+                for mint, ring in self._rings.items():
+                    encoded = mint.encode('ascii')
+                    for timestamp_ms, price in zip(*ring.arrays()):
+                        f.write(RECORD.pack(encoded, timestamp_ms, price))
+                        records += 1
+            os.replace(tmp_path, self.path)
+            stat = os.stat(self.path)
+            self._inode = stat.st_ino
+            self._offset = stat.st_size
+            self._records = records
+
+    def forget(self, keep_mints):
+        """Descarta tokens fora de keep_mints (sai do arquivo na próxima compactação)"""
+        with self._lock:
+            self._catch_up()
+            keep = set(keep_mints)
+            self._rings = {mint: ring for mint, ring in self._rings.items() if mint in keep}
+
+# Instância global (singleton)
+_price_history_store: Optional[PriceHistoryStore] = None
+_store_lock = threading.Lock()
+
+def get_price_history_store() -> PriceHistoryStore:
+    """Retorna histórico de preços do processo (singleton)"""
+    global _price_history_store
+    if _price_history_store is None:
+        with _store_lock:
+            if _price_history_store is None:
+                _price_history_store = PriceHistoryStore()
+    return _price_history_store
@@ -1,59 +1,248 @@
 """
 Monitor de preços de tokens - busca preço de múltiplas fontes
+Preços ficam em cache por PRICE_CACHE_TTL_SECONDS e buscas simultâneas do mesmo token
+compartilham uma única requisição (bot, interface web e compra manual não duplicam chamadas)
 """
+import asyncio
+import statistics
+import threading
+import time
+import weakref
 import aiohttp
+from http_session import shared_session
 import config
+from typing import Dict, List, Optional
+
+JUPITER_BATCH_SIZE = 100  # Jupiter/BirdEye aceitam até 100 ids por requisição
+DEXSCREENER_BATCH_SIZE = 30  # DexScreener aceita até 30 endereços por requisição
+MAX_CACHE_ENTRIES = 5000  # Acima disso, entradas vencidas são descartadas
+
+# Cache compartilhado por todas as instâncias do processo: {token: (preço, momento da busca)}
+_price_cache: Dict[str, tuple] = {}
+_cache_lock = threading.Lock()
+
+# Buscas em andamento por event loop: {token: future/task com o preço}
+_inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = weakref.WeakKeyDictionary()
+
+_stats_lock = threading.Lock()
+_stats = {
+    'cache': {'hits': 0, 'misses': 0, 'coalesced': 0},
+    'sources': {},  # {fonte: {'requests', 'hits', 'misses', 'total_ms', 'max_ms'}}
+    # Modo consenso: como cada preço foi decidido
+    'consensus': {'agreed': 0, 'single_source': 0, 'disagreed': 0, 'no_price': 0, 'deadline_hits': 0, 'early_exits': 0}
+}
+
+# Circuit breaker por fonte (modo consenso): {fonte: {'state', 'failures', 'open_until', 'trips', 'probing'}}
+_breakers: Dict[str, Dict] = {}
+
+class PriceSourceError(Exception):
+    """Fonte de preço não respondeu (status HTTP diferente de 200)"""
+
+async def _fetch_json(url: str, headers: Dict = None) -> Dict:
+    """GET na API de preço (timeout de 10s); status diferente de 200 levanta PriceSourceError"""
+    async with shared_session() as session:
+        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            if response.status != 200:
+                raise PriceSourceError(f"HTTP {response.status}")
+            return await response.json()
+
+def _cache_get(token_address: str, max_age: float) -> Optional[float]:
+    with _cache_lock:
+        entry = _price_cache.get(token_address)
+    if entry and time.monotonic() - entry[1] <= max_age:
+        return entry[0]
+    return None
+
+def _cache_put(prices: Dict[str, float]):
+    now = time.monotonic()
+    with _cache_lock:
+        for token_address, price in prices.items():
+            if price and price > 0:
+                _price_cache[token_address] = (price, now)
+        if len(_price_cache) > MAX_CACHE_ENTRIES:
+            max_age = max(config.PRICE_CACHE_TTL_SECONDS, 1) * 10
+            for token_address in [t for t, (_, at) in _price_cache.items() if now - at > max_age]:
+                del _price_cache[token_address]
+
+def _count_cache(key: str, amount: int = 1):
+    with _stats_lock:
+        _stats['cache'][key] += amount
+
+def _record_source(source: str, elapsed_ms: float, requested: int, found: int):
+    with _stats_lock:
+        stats = _stats['sources'].setdefault(
+            source, {'requests': 0, 'hits': 0, 'misses': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        )
+        stats['requests'] += 1
+        stats['hits'] += found
+        stats['misses'] += requested - found
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+def _count_consensus(key: str, amount: int = 1):
+    with _stats_lock:
+        _stats['consensus'][key] += amount
+
+def _breaker(source: str) -> Dict:
+    return _breakers.setdefault(source, {'state': 'closed', 'failures': 0, 'open_until': 0.0, 'trips': 0, 'probing': False})
+
+def _source_available(source: str) -> bool:
+    """Fonte com circuito aberto é pulada até o fim do cooldown; depois recebe UMA tentativa
+    (half_open) - as outras buscas continuam pulando a fonte até essa tentativa terminar"""
+    with _stats_lock:
+        breaker = _breaker(source)
+        if breaker['state'] == 'open':
+            if time.monotonic() < breaker['open_until']:
+                return False
+            breaker['state'] = 'half_open'
+            breaker['probing'] = False
+        if breaker['state'] == 'half_open':
+            if breaker['probing']:
+                return False
+            breaker['probing'] = True
+        return True
+
+def _source_released(source: str):
+    """Tentativa cancelada antes de terminar (saída antecipada): libera para a próxima busca"""
+    with _stats_lock:
+        _breaker(source)['probing'] = False
+
+def _source_succeeded(source: str):
+    with _stats_lock:
+        breaker = _breaker(source)
+        breaker['state'] = 'closed'
+        breaker['failures'] = 0
+        breaker['probing'] = False
+
+def _source_failed(source: str):
+    """Timeout, erro ou status HTTP != 200: após PRICE_BREAKER_FAILURES seguidos (ou 1 em half_open) abre o circuito"""
+    with _stats_lock:
+        breaker = _breaker(source)
+        breaker['failures'] += 1
+        breaker['probing'] = False
+        if breaker['state'] == 'half_open' or breaker['failures'] >= config.PRICE_BREAKER_FAILURES:
+            breaker['state'] = 'open'
+            breaker['open_until'] = time.monotonic() + config.PRICE_BREAKER_COOLDOWN_SECONDS
+            breaker['failures'] = 0
+            breaker['trips'] += 1
+            print(f"⚠️  Fonte de preço '{source}' desativada por {config.PRICE_BREAKER_COOLDOWN_SECONDS:.0f}s (falhas seguidas)")
+
+def _agreeing_prices(prices: List[float]) -> List[float]:
+    """Maior grupo de preços que concordam entre si dentro de PRICE_CONSENSUS_TOLERANCE"""
+    best = []
+    tolerance = config.PRICE_CONSENSUS_TOLERANCE
+    for anchor in prices:
+        group = [price for price in prices if abs(price - anchor) <= anchor * tolerance]
+        if len(group) > len(best):
+            best = group
+    return best
+
+def _aggregate_prices(by_source: Dict[str, float], priority: List[str]) -> Optional[float]:
+    """Preço final do consenso
+    - 2+ fontes concordando: mediana do grupo que concorda
+    - só 1 fonte: usa ela
+    - fontes discordando: usa a de maior prioridade (BirdEye > Jupiter > DexScreener)
+    """
+    if not by_source:
+        _count_consensus('no_price')
+        return None
+    agreeing = _agreeing_prices(list(by_source.values()))
+    if len(agreeing) >= 2:
+        _count_consensus('agreed')
+        return statistics.median(agreeing)
+    if len(by_source) == 1:
+        _count_consensus('single_source')
+        return next(iter(by_source.values()))
+    _count_consensus('disagreed')
+    for source in priority:
+        if source in by_source:
+            return by_source[source]
+    return next(iter(by_source.values()))
+
+def _get_inflight() -> Dict[str, asyncio.Future]:
+    loop = asyncio.get_running_loop()
+    inflight = _inflight.get(loop)
+    if inflight is None:
+        inflight = {}
+        _inflight[loop] = inflight
+    return inflight
+
+def get_price_stats() -> Dict:
+    """Contadores do cache e de cada fonte de preço (hits = tokens precificados)"""
+    with _stats_lock:
+        cache = dict(_stats['cache'])
+        sources = {}
+        for source, stats in _stats['sources'].items():
+            sources[source] = {
+                'requests': stats['requests'],
+                'hits': stats['hits'],
+                'misses': stats['misses'],
+                'avg_ms': round(stats['total_ms'] / stats['requests'], 1) if stats['requests'] else 0.0,
+                'max_ms': round(stats['max_ms'], 1)
+            }
+        consensus = dict(_stats['consensus'])
+        breakers = {
+            source: {
+                'state': breaker['state'],
+                'trips': breaker['trips'],
+                'open_for_seconds': round(max(0.0, breaker['open_until'] - time.monotonic()), 1) if breaker['state'] == 'open' else 0.0
+            }
+            for source, breaker in _breakers.items()
+        }
+    lookups = cache['hits'] + cache['misses'] + cache['coalesced']
+    cache['hit_ratio'] = round((cache['hits'] + cache['coalesced']) / lookups, 4) if lookups else 0.0
+    with _cache_lock:
+        cache['entries'] = len(_price_cache)
+    cache['ttl_seconds'] = config.PRICE_CACHE_TTL_SECONDS
+    return {'mode': config.PRICE_MODE, 'cache': cache, 'sources': sources, 'consensus': consensus, 'breakers': breakers}
 
 class PriceMonitor:
     def __init__(self):
         self.birdeye_api_key = config.BIRDEYE_API_KEY if hasattr(config, 'BIRDEYE_API_KEY') else ''
     
-    async def get_token_price_birdeye(self, token_address: str) -> float:
-        """Busca preço usando BirdEye API"""
+    async def get_token_price_birdeye(self, token_address: str, raise_errors: bool = False) -> float:
+        """Busca preço usando BirdEye API
+        Args:
+            raise_errors: Propaga erro/status != 200 em vez de retornar None (modo consenso: conta no circuit breaker)
+        """
         if not self.birdeye_api_key:
             return None
         
         try:
             url = f"https://public-api.birdeye.so/v1/token/price?address={token_address}"
             headers = {"X-API-KEY": self.birdeye_api_key}
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return float(data.get('data', {}).get('value', 0))
-        except:
+            data = await _fetch_json(url, headers)
+            return float(data.get('data', {}).get('value', 0))
+        except Exception:
+            if raise_errors:
+                raise
             return None
     
-    async def get_token_price_jupiter(self, token_address: str) -> float:
-        """Busca preço usando Jupiter Price API"""
+    async def get_token_price_jupiter(self, token_address: str, raise_errors: bool = False) -> float:
+        """Busca preço usando Jupiter Price API (raise_errors: ver get_token_price_birdeye)"""
         try:
             url = f"https://price.jup.ag/v4/price?ids={token_address}"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        price_data = data.get('data', {}).get(token_address, {})
-                        return float(price_data.get('price', 0))
-        except:
+            data = await _fetch_json(url)
+            price_data = data.get('data', {}).get(token_address, {})
+            return float(price_data.get('price', 0))
+        except Exception:
+            if raise_errors:
+                raise
             return None
     
-    async def get_token_price_dexscreener(self, token_address: str) -> float:
-        """Busca preço usando DexScreener API"""
+    async def get_token_price_dexscreener(self, token_address: str, raise_errors: bool = False) -> float:
+        """Busca preço usando DexScreener API (raise_errors: ver get_token_price_birdeye)"""
         try:
             url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        pairs = data.get('pairs', [])
-                        if pairs and len(pairs) > 0:
-                            # Pega o preço do primeiro par (geralmente o mais líquido)
-                            price = float(pairs[0].get('priceUsd', 0))
-                            return price
-        except:
+            data = await _fetch_json(url)
+            pairs = data.get('pairs', [])
+            if pairs and len(pairs) > 0:
+                # Pega o preço do primeiro par (geralmente o mais líquido)
+                price = float(pairs[0].get('priceUsd', 0))
+                return price
+        except Exception:
+            if raise_errors:
+                raise
             return None
     
     async def get_token_price_alchemy(self, token_address: str) -> float:
@@ -66,7 +255,54 @@ class PriceMonitor:
         except:
             return None
     
-    async def get_token_price(self, token_address: str) -> float:
+    async def get_token_price(self, token_address: str, max_age: float = None) -> float:
+        """
+        Busca preço do token (cache + busca única compartilhada entre chamadas simultâneas)
+        Args:
+            max_age: Idade máxima aceita do preço em cache (padrão: PRICE_CACHE_TTL_SECONDS; 0 = sempre busca)
+        """
+        max_age = config.PRICE_CACHE_TTL_SECONDS if max_age is None else max_age
+        price = _cache_get(token_address, max_age)
+        if price is not None:
+            _count_cache('hits')
+            return price
+        
+        inflight = _get_inflight()
+        pending = inflight.get(token_address)
+        if pending is not None:
+            # Alguém já está buscando este token - espera o mesmo resultado
+            _count_cache('coalesced')
+            return await asyncio.shield(pending)
+        
+        _count_cache('misses')
+        task = asyncio.create_task(self._fetch_and_cache(token_address))
+        inflight[token_address] = task
+        
+        def done(t):
+            if inflight.get(token_address) is t:
+                del inflight[token_address]
+        task.add_done_callback(done)
+        return await asyncio.shield(task)
+    
+    async def _fetch_and_cache(self, token_address: str) -> float:
+        price = await self._fetch_token_price(token_address)
+        if price:
+            _cache_put({token_address: price})
+        return price
+    
+    async def _timed(self, source: str, coro, requested: int = 1):
+        """Executa a consulta a uma fonte registrando latência e tokens encontrados"""
+        started_at = time.perf_counter()
+        result = await coro
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        if isinstance(result, dict):
+            found = sum(1 for price in result.values() if price and price > 0)
+        else:
+            found = 1 if result and result > 0 else 0
+        _record_source(source, elapsed_ms, requested, found)
+        return result
+    
+    async def _fetch_token_price(self, token_address: str) -> float:
         """
         Busca preço do token usando múltiplas fontes com fallback
         Ordem: BirdEye > Jupiter > DexScreener
@@ -77,29 +313,301 @@ class PriceMonitor:
         - BirdEye: Mais preciso, requer API key
         - Jupiter: Gratuita, boa cobertura
         - DexScreener: Gratuita, fallback
+        
+        Com PRICE_MODE=consensus consulta todas as fontes ao mesmo tempo (ver _fetch_consensus)
         """
+        if config.PRICE_MODE == 'consensus':
+            prices = await self._fetch_consensus(self._single_sources(), [token_address])
+            return prices.get(token_address)
+        
         # Tenta BirdEye primeiro (se tiver API key)
         if self.birdeye_api_key:
-            price = await self.get_token_price_birdeye(token_address)
+            price = await self._timed('birdeye', self.get_token_price_birdeye(token_address))
             if price and price > 0:
                 return price
         
         # Tenta Jupiter (gratuita, boa cobertura)
-        price = await self.get_token_price_jupiter(token_address)
+        price = await self._timed('jupiter', self.get_token_price_jupiter(token_address))
         if price and price > 0:
             return price
         
         # Tenta DexScreener (fallback)
-        price = await self.get_token_price_dexscreener(token_address)
+        price = await self._timed('dexscreener', self.get_token_price_dexscreener(token_address))
         if price and price > 0:
             return price
         
         return None
+    
+    async def get_token_prices_birdeye(self, token_addresses: List[str], raise_errors: bool = False) -> Dict[str, float]:
+        """Busca preços de vários tokens usando BirdEye multi_price
+        Args:
+            raise_errors: Propaga o erro se nenhum lote respondeu (modo consenso: conta no circuit breaker);
+                          False: lotes com erro/status != 200 são pulados
+        """
+        prices = {}
+        if not self.birdeye_api_key:
+            return prices
+        headers = {"X-API-KEY": self.birdeye_api_key}
+        error = None
+        answered = 0
+        for i in range(0, len(token_addresses), JUPITER_BATCH_SIZE):
+            batch = token_addresses[i:i + JUPITER_BATCH_SIZE]
+            try:
+                url = f"https://public-api.birdeye.so/defi/multi_price?list_address={','.join(batch)}"
+                data = await _fetch_json(url, headers)
+                answered += 1
+                for mint, info in (data.get('data') or {}).items():
+                    if info and info.get('value'):
+                        prices[mint] = float(info['value'])
+            except Exception as e:
+                error = e
+                continue
+        if raise_errors and error is not None and not answered:
+            raise error
+        return prices
+    
+    async def get_token_prices_jupiter(self, token_addresses: List[str], raise_errors: bool = False) -> Dict[str, float]:
+        """Busca preços de vários tokens usando Jupiter Price API (ids separados por vírgula)
+        raise_errors: ver get_token_prices_birdeye
+        """
+        prices = {}
+        error = None
+        answered = 0
+        for i in range(0, len(token_addresses), JUPITER_BATCH_SIZE):
+            batch = token_addresses[i:i + JUPITER_BATCH_SIZE]
+            try:
+                url = f"https://price.jup.ag/v4/price?ids={','.join(batch)}"
+                data = await _fetch_json(url)
+                answered += 1
+                for mint, info in (data.get('data') or {}).items():
+                    if info and info.get('price'):
+                        prices[mint] = float(info['price'])
+            except Exception as e:
+                error = e
+                continue
+        if raise_errors and error is not None and not answered:
+            raise error
+        return prices
+    
+    async def get_token_prices_dexscreener(self, token_addresses: List[str], raise_errors: bool = False) -> Dict[str, float]:
+        """Busca preços de vários tokens usando DexScreener (par mais líquido de cada token)
+        raise_errors: ver get_token_prices_birdeye
+        """
+        prices = {}
+        error = None
+        answered = 0
+        for i in range(0, len(token_addresses), DEXSCREENER_BATCH_SIZE):
+            batch = token_addresses[i:i + DEXSCREENER_BATCH_SIZE]
+            try:
+                url = f"https://api.dexscreener.com/latest/dex/tokens/{','.join(batch)}"
+                data = await _fetch_json(url)
+                answered += 1
+                best_liquidity = {}
+                for pair in data.get('pairs') or []:
+                    mint = (pair.get('baseToken') or {}).get('address')
+                    if mint not in batch or not pair.get('priceUsd'):
+                        continue
+                    liquidity = float((pair.get('liquidity') or {}).get('usd') or 0)
+                    if mint not in prices or liquidity > best_liquidity[mint]:
+                        prices[mint] = float(pair['priceUsd'])
+                        best_liquidity[mint] = liquidity
+            except Exception as e:
+                error = e
+                continue
+        if raise_errors and error is not None and not answered:
+            raise error
+        return prices
+    
+    async def get_token_prices(self, token_addresses: List[str], max_age: float = None) -> Dict[str, float]:
+        """
+        Busca preços de vários tokens de uma vez (usa o cache e junta-se a buscas já em andamento)
+        Returns: {token_address: preço} (tokens sem preço ficam de fora)
+        """
+        max_age = config.PRICE_CACHE_TTL_SECONDS if max_age is None else max_age
+        prices = {}
+        waiting = {}
+        to_fetch = []
+        inflight = _get_inflight()
+        for token_address in dict.fromkeys(token_addresses):
+            price = _cache_get(token_address, max_age)
+            if price is not None:
+                _count_cache('hits')
+                prices[token_address] = price
+            elif token_address in inflight:
+                _count_cache('coalesced')
+                waiting[token_address] = inflight[token_address]
+            else:
+                to_fetch.append(token_address)
+        
+        if to_fetch:
+            _count_cache('misses', len(to_fetch))
+            task = asyncio.create_task(self._fetch_token_prices(to_fetch))
+            # Um future por token para que buscas individuais simultâneas aproveitem o lote
+            loop = asyncio.get_running_loop()
+            for token_address in to_fetch:
+                future = loop.create_future()
+                inflight[token_address] = future
+                waiting[token_address] = future
+            
+            def resolve(t):
+                for token_address in to_fetch:
+                    future = waiting[token_address]
+                    if inflight.get(token_address) is future:
+                        del inflight[token_address]
+                    if future.done():
+                        continue
+                    if t.cancelled():
+                        future.cancel()
+                    elif t.exception() is not None:
+                        future.set_exception(t.exception())
+                    else:
+                        future.set_result(t.result().get(token_address))
+            task.add_done_callback(resolve)
+        
+        if waiting:
+            results = await asyncio.gather(*(asyncio.shield(f) for f in waiting.values()), return_exceptions=True)
+            for token_address, price in zip(waiting.keys(), results):
+                if isinstance(price, (int, float)) and price > 0:
+                    prices[token_address] = price
+        return prices
+    
+    async def get_token_prices_timed(self, token_addresses: List[str], concurrency: int = None):
+        """
+        Busca em lote e, para os tokens que ficaram sem preço, busca individual em paralelo (limitada)
+        Returns: ({token: preço}, {token: {'ms': tempo até ter o resultado, 'via': 'batch'|'single'|None}})
+        """
+        unique = list(dict.fromkeys(token_addresses))
+        started_at = time.perf_counter()
+        try:
+            prices = await self.get_token_prices(unique)
+        except Exception as e:
+            print(f"⚠️  Busca de preços em lote falhou ({e}) - buscando um a um")
+            prices = {}
+        batch_ms = round((time.perf_counter() - started_at) * 1000, 1)
+        timings = {token_address: {'ms': batch_ms, 'via': 'batch'} for token_address in prices}
 
+        semaphore = asyncio.Semaphore(concurrency or config.PRICE_REFRESH_CONCURRENCY)
 
+        async def fetch_single(token_address: str):
+            async with semaphore:
+                try:
+                    price = await self.get_token_price(token_address)
+                except Exception:
+                    price = None
+            elapsed_ms = round((time.perf_counter() - started_at) * 1000, 1)
+            if price and price > 0:
+                prices[token_address] = price
+                timings[token_address] = {'ms': elapsed_ms, 'via': 'single'}
+            else:
+                timings[token_address] = {'ms': elapsed_ms, 'via': None}
 
+        await asyncio.gather(*(fetch_single(t) for t in unique if t not in prices))
+        return prices, timings
 
-
-
-
-
+    async def _fetch_token_prices(self, token_addresses: List[str]) -> Dict[str, float]:
+        """
+        Busca em lote (mesma ordem de fontes de get_token_price)
+        Cada fonte recebe só os tokens que as anteriores não conseguiram precificar, sempre em lote -
+        o número de requisições não cresce com o número de posições.
+        """
+        if config.PRICE_MODE == 'consensus':
+            prices = await self._fetch_consensus(self._batch_sources(), list(token_addresses))
+            _cache_put(prices)
+            return prices
+        
+        pending = list(token_addresses)
+        prices = {}
+        for name, source in self._batch_sources():
+            if not pending:
+                break
+            found = await self._timed(name, source(pending), requested=len(pending))
+            for mint in pending:
+                price = found.get(mint)
+                if price and price > 0:
+                    prices[mint] = price
+            pending = [mint for mint in pending if mint not in prices]
+        
+        _cache_put(prices)
+        return prices
+    
+    def _batch_sources(self) -> list:
+        """Fontes em lote na ordem de prioridade: [(nome, fn(tokens, raise_errors=False) -> {token: preço})]"""
+        sources = [('jupiter', self.get_token_prices_jupiter), ('dexscreener', self.get_token_prices_dexscreener)]
+        if self.birdeye_api_key:
+            sources.insert(0, ('birdeye', self.get_token_prices_birdeye))
+        return sources
+    
+    def _single_sources(self) -> list:
+        """Fontes de um token só, no mesmo formato das fontes em lote"""
+        def as_batch(fetch):
+            async def fetch_one(token_addresses: List[str], raise_errors: bool = False) -> Dict[str, float]:
+                price = await fetch(token_addresses[0], raise_errors=raise_errors)
+                return {token_addresses[0]: price} if price and price > 0 else {}
+            return fetch_one
+        sources = [('jupiter', as_batch(self.get_token_price_jupiter)), ('dexscreener', as_batch(self.get_token_price_dexscreener))]
+        if self.birdeye_api_key:
+            sources.insert(0, ('birdeye', as_batch(self.get_token_price_birdeye)))
+        return sources
+    
+    async def _fetch_consensus(self, sources: list, token_addresses: List[str]) -> Dict[str, float]:
+        """
+        Consulta todas as fontes ao mesmo tempo com um único prazo (PRICE_CONSENSUS_DEADLINE_MS)
+        Retorna antes do prazo se todos os tokens já tiverem PRICE_CONSENSUS_MIN_AGREE fontes concordando.
+        Fonte que estoura o prazo, dá erro ou responde status != 200 conta como falha no circuit breaker
+        (token sem preço numa resposta válida não é falha - a fonte só não conhece o token).
+        """
+        priority = [name for name, _ in sources]
+        available = [(name, fetch) for name, fetch in sources if _source_available(name)]
+        if not available:
+            available = sources  # Todas com circuito aberto: tenta mesmo assim
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + config.PRICE_CONSENSUS_DEADLINE_MS / 1000
+        tasks = {
+            asyncio.create_task(self._timed(name, fetch(token_addresses, raise_errors=True), requested=len(token_addresses))): name
+            for name, fetch in available
+        }
+        quotes: Dict[str, Dict[str, float]] = {token_address: {} for token_address in token_addresses}
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks[task]
+                    if task.exception() is not None:
+                        _source_failed(name)
+                        continue
+                    _source_succeeded(name)
+                    for token_address, price in (task.result() or {}).items():
+                        if token_address in quotes and price and price > 0:
+                            quotes[token_address][name] = price
+                
+                if pending and all(
+                    len(_agreeing_prices(list(by_source.values()))) >= config.PRICE_CONSENSUS_MIN_AGREE
+                    for by_source in quotes.values()
+                ):
+                    _count_consensus('early_exits')
+                    break
+        finally:
+            if pending:
+                if loop.time() >= deadline:
+                    _count_consensus('deadline_hits')
+                    for task in pending:
+                        _source_failed(tasks[task])
+                else:
+                    # Saída antecipada/cancelamento: a tentativa não terminou, não é falha nem sucesso
+                    for task in pending:
+                        _source_released(tasks[task])
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        prices = {}
+        for token_address, by_source in quotes.items():
+            price = _aggregate_prices(by_source, priority)
+            if price:
+                prices[token_address] = price
+        return prices
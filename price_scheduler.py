@@ -0,0 +1,91 @@
+"""
+Agendador central de preços das posições abertas
+Um único loop busca o preço de todos os tokens acompanhados em lote (PriceMonitor.get_token_prices)
+e repassa para a avaliação de cada posição - o custo em API não cresce com o número de posições
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+from price_monitor import PriceMonitor
+
+# Callback recebe o preço atual (None se nenhuma fonte conseguiu precificar o token)
+PriceCallback = Callable[[Optional[float]], Awaitable[None]]
+
+class PriceScheduler:
+    def __init__(self, price_monitor: PriceMonitor, interval: float = 10.0):
+        """
+        Args:
+            price_monitor: Monitor usado para buscar preços em lote
+            interval: Segundos entre ciclos de busca
+        """
+        self.price_monitor = price_monitor
+        self.interval = interval
+        self.subscribers: Dict[str, PriceCallback] = {}  # {contract_address: callback}
+        self._evaluations: Dict[str, asyncio.Task] = {}  # Avaliação em andamento por token
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {'ticks': 0, 'tokens_priced': 0, 'tokens_missing': 0, 'skipped_busy': 0, 'last_tick_ms': 0.0}
+
+    def subscribe(self, contract_address: str, callback: PriceCallback):
+        """Passa a buscar o preço do token e chamar callback a cada ciclo"""
+        self.subscribers[contract_address] = callback
+
+    def unsubscribe(self, contract_address: str):
+        self.subscribers.pop(contract_address, None)
+
+    def start(self):
+        """Inicia o loop (chamar de dentro do event loop; chamadas repetidas são ignoradas)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            started_at = time.monotonic()
+            if self.subscribers:
+                try:
+                    await self.tick()
+                except Exception as e:
+                    print(f"❌ Erro no ciclo de preços: {e}")
+            elapsed = time.monotonic() - started_at
+            await asyncio.sleep(max(0.0, self.interval - elapsed))
+
+    async def tick(self):
+        """Um ciclo: busca todos os preços em lote e dispara a avaliação de cada posição"""
+        started_at = time.perf_counter()
+        contract_addresses = list(self.subscribers.keys())
+        prices = await self.price_monitor.get_token_prices(contract_addresses)
+        self.stats['ticks'] += 1
+        self.stats['tokens_priced'] += len(prices)
+        self.stats['tokens_missing'] += len(contract_addresses) - len(prices)
+        self.stats['last_tick_ms'] = round((time.perf_counter() - started_at) * 1000, 1)
+
+        for contract_address in contract_addresses:
+            callback = self.subscribers.get(contract_address)
+            if callback is None:
+                continue  # Removido enquanto buscava preços
+            running = self._evaluations.get(contract_address)
+            if running is not None and not running.done():
+                # Avaliação anterior ainda executando (ex: venda em andamento) - não empilha
+                self.stats['skipped_busy'] += 1
+                continue
+            # Cada posição avalia em paralelo: uma venda lenta não atrasa as outras
+            task = asyncio.create_task(callback(prices.get(contract_address)))
+            self._evaluations[contract_address] = task
+            task.add_done_callback(lambda t, ca=contract_address: self._evaluation_done(ca, t))
+
+    def _evaluation_done(self, contract_address: str, task: asyncio.Task):
+        if self._evaluations.get(contract_address) is task:
+            del self._evaluations[contract_address]
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Erro ao avaliar posição {contract_address}: {task.exception()}")
+
+    async def stop(self):
+        """Para o loop e cancela avaliações em andamento"""
+        tasks = list(self._evaluations.values())
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._evaluations.clear()
@@ -0,0 +1,171 @@
+"""
+Cache de arquivos de estado (bot_state.json, token_blacklist.json, .env, trading_config.json)
+Cada arquivo é lido e interpretado uma vez e fica em memória; só é relido quando muda.
+Mudanças são detectadas por inotify (Linux, via ctypes) ou, em outros sistemas, por uma
+thread que compara mtime/tamanho - ler o estado no caminho quente vira leitura de memória.
+"""
+import ctypes
+import ctypes.util
+import os
+import struct
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+POLL_INTERVAL = 0.5  # Segundos entre verificações no modo sem inotify
+
+# Eventos inotify que indicam conteúdo novo (gravação concluída, troca atômica, criação, remoção)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+def _file_signature(path: str) -> Optional[Tuple]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+class CachedFile:
+    """Valor interpretado de um arquivo, recarregado só depois de uma mudança"""
+    def __init__(self, path: str, loader: Callable[[str], Any]):
+        self.path = path
+        self.loader = loader
+        self.version = 0  # Quantas vezes foi (re)carregado
+        self._value = None
+        self._stale = True
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if self._stale:
+            with self._lock:
+                if self._stale:
+                    # Limpa antes de ler: mudança durante a leitura marca de novo
+                    self._stale = False
+                    self._signature = _file_signature(self.path)
+                    self._value = self.loader(self.path)
+                    self.version += 1
+        return self._value
+
+    def invalidate(self):
+        """Força releitura no próximo get (quem grava o arquivo chama logo após gravar)"""
+        self._stale = True
+
+class StateCache:
+    def __init__(self):
+        self._files: Dict[str, CachedFile] = {}  # {caminho absoluto: arquivo}
+        self._lock = threading.Lock()
+        self._inotify_fd = None
+        self._watch_dirs: Dict[int, str] = {}  # {wd: diretório}
+        self._dir_watches: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self.backend = None  # 'inotify' ou 'polling'
+
+    def watch(self, path: str, loader: Callable[[str], Any]) -> CachedFile:
+        """Passa a manter o arquivo em cache (chamadas repetidas retornam o mesmo objeto)"""
+        path = os.path.abspath(path)
+        with self._lock:
+            cached = self._files.get(path)
+            if cached is not None:
+                return cached
+            cached = CachedFile(path, loader)
+            self._files[path] = cached
+            self._start()
+            if self.backend == 'inotify':
+                self._add_inotify_watch(os.path.dirname(path))
+            return cached
+
+    def invalidate(self, path: str):
+        cached = self._files.get(os.path.abspath(path))
+        if cached is not None:
+            cached.invalidate()
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        if self._init_inotify():
+            self.backend = 'inotify'
+            target = self._inotify_loop
+        else:
+            self.backend = 'polling'
+            target = self._poll_loop
+        self._thread = threading.Thread(target=target, name='state-cache', daemon=True)
+        self._thread.start()
+
+    def _init_inotify(self) -> bool:
+        if not hasattr(os, 'O_CLOEXEC'):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            init = libc.inotify_init1
+            self._add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError):
+            return False
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        fd = init(os.O_CLOEXEC)
+        if fd < 0:
+            return False
+        self._inotify_fd = fd
+        return True
+
+    def _add_inotify_watch(self, directory: str):
+        # Observa o diretório: trocas atômicas (os.replace) criam um arquivo novo no lugar
+        if directory in self._dir_watches:
+            return
+        wd = self._add_watch(self._inotify_fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            print(f"⚠️  inotify indisponível para {directory} (errno {ctypes.get_errno()}) - usando verificação periódica")
+            return
+        self._dir_watches[directory] = wd
+        self._watch_dirs[wd] = directory
+
+    def _inotify_loop(self):
+        while True:
+            try:
+                data = os.read(self._inotify_fd, 64 * 1024)
+            except OSError as e:
+                print(f"⚠️  Erro lendo eventos inotify ({e}) - usando verificação periódica")
+                self.backend = 'polling'
+                self._poll_loop()
+                return
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b'\0')
+                offset += name_len
+                directory = self._watch_dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                cached = self._files.get(os.path.join(directory, os.fsdecode(name)))
+                if cached is not None:
+                    cached.invalidate()
+
+    def _poll_loop(self):
+        stop = threading.Event()
+        while not stop.wait(POLL_INTERVAL):
+            for cached in list(self._files.values()):
+                if not cached._stale and _file_signature(cached.path) != cached._signature:
+                    cached.invalidate()
+
+# Instância global (singleton)
+_state_cache = None
+_state_cache_lock = threading.Lock()
+
+def get_state_cache() -> StateCache:
+    """Retorna cache de estado do processo (singleton)"""
+    global _state_cache
+    if _state_cache is None:
+        with _state_cache_lock:
+            if _state_cache is None:
+                _state_cache = StateCache()
+    return _state_cache
+
+def watch_file(path: str, loader: Callable[[str], Any]) -> CachedFile:
+    """Atalho: get_state_cache().watch(path, loader)"""
+    return get_state_cache().watch(path, loader)
@@ -3,8 +3,11 @@ Gerenciador de Take Profit - monitora preços e executa vendas parciais
 """
 import asyncio
 from typing import Dict
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 from price_monitor import PriceMonitor
+from price_scheduler import PriceScheduler
+from trigger_index import PositionTriggers
+from deadline_timer import DeadlineTimer
 from jupiter_client import JupiterClient
 import config
 from trade_tracker_integration import log_trade_update, log_trade_sold
@@ -14,11 +17,15 @@ class TakeProfitManager:
         self.jupiter = jupiter_client
         self.price_monitor = PriceMonitor()
         self.positions: Dict[str, dict] = {}  # {contract_address: position_info}
-        self.monitoring_tasks: Dict[str, asyncio.Task] = {}
+        # Um único loop busca preços de todas as posições em lote
+        self.scheduler = PriceScheduler(self.price_monitor, interval=config.PRICE_POLL_INTERVAL_SECONDS)
+        # Prazos do stop loss por tempo disparam na hora, mesmo sem preço novo
+        self.timers = DeadlineTimer()
     
     def add_position(self, contract_address: str, symbol: str, amount_tokens: int, 
                      entry_price: float, score: int):
         """Adiciona uma nova posição para monitoramento"""
+        bought_at = datetime.now(timezone.utc)
         position = {
             'symbol': symbol,
             'amount_tokens': amount_tokens,
@@ -26,215 +33,311 @@ class TakeProfitManager:
             'entry_price': entry_price,
             'score': score,
             'tps_executed': [],
-            'bought_at': datetime.now(timezone.utc),  # Timestamp da compra
-            'max_multiple_reached': 1.0  # Rastreia o maior múltiplo atingido
+            'bought_at': bought_at,  # Timestamp da compra
+            'max_multiple_reached': 1.0,  # Rastreia o maior múltiplo atingido
+            'last_price': None,  # Último preço válido recebido
+            'lock': asyncio.Lock(),  # Ciclo de preço e prazo nunca avaliam a posição ao mesmo tempo
+            # Níveis de take profit pendentes e prazo do stop loss (só os cruzados são avaliados)
+            'triggers': PositionTriggers(
+                stop_deadline=bought_at + timedelta(minutes=config.STOP_LOSS_TIME_MINUTES),
+                stop_multiple=config.STOP_LOSS_MIN_MULTIPLE
+            )
         }
         self.positions[contract_address] = position
         
-        # Inicia tarefa de monitoramento
-        task = asyncio.create_task(self._monitor_position(contract_address))
-        self.monitoring_tasks[contract_address] = task
+        # Passa a receber o preço do token a cada ciclo do agendador
+        self.scheduler.subscribe(
+            contract_address,
+            lambda current_price, ca=contract_address: self._evaluate_position(ca, current_price)
+        )
+        self.scheduler.start()
+        self.timers.schedule_at(
+            contract_address,
+            position['triggers'].stop_deadline,
+            lambda ca=contract_address: self._on_stop_deadline(ca)
+        )
+    
+    def _remove_position(self, contract_address: str):
+        """Para de monitorar a posição"""
+        self.positions.pop(contract_address, None)
+        self.scheduler.unsubscribe(contract_address)
+        self.timers.cancel(contract_address)
+    
+    async def stop(self):
+        """Para o monitoramento de todas as posições"""
+        await self.scheduler.stop()
+        await self.timers.stop()
     
-    async def _monitor_position(self, contract_address: str):
-        """Monitora uma posição e executa vendas quando atingir take profits"""
+    async def _on_stop_deadline(self, contract_address: str):
+        """Prazo do stop loss por tempo: avalia com o último preço conhecido (ou busca um agora)"""
         position = self.positions.get(contract_address)
         if not position:
             return
-        
-        while contract_address in self.positions:
+        current_price = position.get('last_price')
+        if not current_price:
             try:
-                # Busca preço atual
                 current_price = await self.price_monitor.get_token_price(contract_address)
-                
-                if not current_price or current_price <= 0:
-                    await asyncio.sleep(10)
-                    continue
-                
-                # Calcula múltiplo (com proteção contra valores inválidos)
-                if position['entry_price'] <= 0 or current_price <= 0:
-                    await asyncio.sleep(10)
-                    continue
-                
-                # Validação: Se entry_price for muito pequeno (< 1e-8), provavelmente está errado
-                # Tenta buscar preço inicial do token detectado como fallback
-                if position['entry_price'] < 1e-8:
-                    try:
-                        from detected_tokens_tracker import get_all_detected_tokens
-                        detected_tokens = get_all_detected_tokens(limit=100)
-                        for token in detected_tokens:
-                            if token.get('contract_address') == contract_address:
-                                initial_price = token.get('initial_price', 0)
-                                if initial_price > 1e-8:
-                                    print(f"🔧 {position['symbol']}: Corrigindo entry price inválido ({position['entry_price']:.10f}) → ${initial_price:.10f}")
-                                    position['entry_price'] = initial_price
-                                    # Atualiza também no tracker para persistir a correção
-                                    try:
-                                        from trade_tracker_integration import get_tracker
-                                        tracker = get_tracker()
-                                        tracker.update_active_trade(contract_address, current_price=current_price)
-                                    except:
-                                        pass
-                                    break
-                    except Exception as e:
-                        # Silencioso - não queremos spam de erros
-                        pass
-                
-                # Se ainda estiver inválido, pula esta iteração (mas reduz frequência de logs)
-                if position['entry_price'] < 1e-8:
-                    # Log apenas a cada 10 iterações para não spammar
-                    if not hasattr(position, '_invalid_price_log_count'):
-                        position['_invalid_price_log_count'] = 0
-                    position['_invalid_price_log_count'] += 1
-                    if position['_invalid_price_log_count'] % 10 == 1:
-                        print(f"⚠️  {position['symbol']}: Entry price ainda inválido após correção. Aguardando...")
-                    await asyncio.sleep(10)
-                    continue
-                
-                # Reset contador se preço válido
-                if hasattr(position, '_invalid_price_log_count'):
-                    del position['_invalid_price_log_count']
-                
-                multiple = current_price / position['entry_price']
-                percent_change = (multiple - 1) * 100
-                
-                # Proteção: se múltiplo for absurdo (>1000x), provavelmente é erro de preço
-                # Tenta corrigir usando preço inicial do token detectado
-                if multiple > 1000:
-                    # Log apenas a cada 5 iterações para não spammar
-                    if not hasattr(position, '_absurd_multiple_log_count'):
-                        position['_absurd_multiple_log_count'] = 0
-                    position['_absurd_multiple_log_count'] += 1
-                    
-                    if position['_absurd_multiple_log_count'] % 5 == 1:
-                        print(f"⚠️  {position['symbol']}: Múltiplo absurdo ({multiple:.2f}x) - Entry: ${position['entry_price']:.10f}, Current: ${current_price:.10f}")
-                        # Tenta corrigir uma vez
+            except Exception:
+                current_price = None
+        if current_price and current_price > 0:
+            await self._evaluate_position(contract_address, current_price)
+            return
+        
+        # Nenhuma cotação desde a compra: nunca foi visto acima de 1.1x, então o stop vale
+        async with position['lock']:
+            if self.positions.get(contract_address) is not position or position['remaining_amount'] <= 0:
+                return
+            print(f"\n⏰ STOP LOSS por tempo: {position['symbol']} sem cotação em {config.STOP_LOSS_TIME_MINUTES} minutos")
+            print(f"   Vendendo 100% (preço registrado = preço de entrada)...\n")
+            await self._execute_stop_loss(contract_address, position, position['entry_price'])
+            self._remove_position(contract_address)
+    
+    async def manual_sell(self, contract_address: str, sell_percent: float) -> dict:
+        """Venda manual (pedida pela interface web) de uma posição monitorada
+        Vende sell_percent% dos tokens restantes com a posição travada (não concorre com TP/stop loss)
+        Returns: resultado da venda, ou None se o token não está sendo monitorado
+        """
+        position = self.positions.get(contract_address)
+        if not position:
+            return None
+        async with position['lock']:
+            if self.positions.get(contract_address) is not position:
+                return None
+            amount_to_sell = int((position['remaining_amount'] * sell_percent) / 100)
+            if amount_to_sell <= 0:
+                raise Exception("Quantidade a vender é zero ou negativa")
+
+            print(f"\n🖐️  VENDA MANUAL de {position['symbol']}: {sell_percent}% dos tokens restantes")
+            tx_signature, quote = await self.jupiter.sell_token(contract_address, amount_to_sell)
+            real_sol_received = quote.get('real_out_amount_sol', 0)
+            tokens_sold = min(quote.get('real_in_amount_tokens', amount_to_sell), position['remaining_amount'])
+            # Preço em dólares do monitoramento (calculated_price do Jupiter está em SOL/token)
+            sell_price = position.get('last_price') or position['entry_price']
+
+            position['remaining_amount'] -= tokens_sold
+            remaining_percent = (position['remaining_amount'] / position['amount_tokens']) * 100
+            is_full_sale = sell_percent >= 100 or remaining_percent <= 0.1
+            print(f"✅ Venda manual executada! TX: {tx_signature} - SOL recebido: {real_sol_received:.6f}")
+
+            if is_full_sale:
+                log_trade_sold(
+                    contract_address,
+                    sell_price,
+                    total_sold_percent=100.0,
+                    reason='manual',
+                    time_to_sell=(datetime.now(timezone.utc) - position['bought_at']).total_seconds() / 60,
+                    peak_multiple=position.get('max_multiple_reached', 1.0),
+                    real_sol_received=real_sol_received
+                )
+                self._remove_position(contract_address)
+            else:
+                position['tps_executed'].append({
+                    'type': 'manual_sell',
+                    'percent': (tokens_sold / position['amount_tokens']) * 100,  # Percentual do total original
+                    'price': sell_price,
+                    'timestamp': datetime.now(timezone.utc).isoformat(),
+                    'tx': tx_signature,
+                    'sol_received': real_sol_received
+                })
+                log_trade_update(contract_address, sell_price, remaining_percent, position['tps_executed'])
+
+            return {
+                'success': True,
+                'tx_signature': tx_signature,
+                'tokens_sold': tokens_sold,
+                'sol_received': real_sol_received,
+                'sell_price': sell_price,
+                'remaining_percent': 0.0 if is_full_sale else remaining_percent,
+                'is_full_sale': is_full_sale
+            }
+
+    async def _evaluate_position(self, contract_address: str, current_price: float):
+        """Avalia uma posição com o preço do ciclo (uma avaliação por vez por posição)"""
+        position = self.positions.get(contract_address)
+        if not position:
+            return
+        async with position['lock']:
+            if self.positions.get(contract_address) is not position:
+                return  # Vendida enquanto esperava
+            if current_price and current_price > 0:
+                position['last_price'] = current_price
+            await self._check_position(contract_address, current_price)
+    
+    async def _check_position(self, contract_address: str, current_price: float):
+        """Executa vendas quando atingir take profits ou o stop loss por tempo"""
+        position = self.positions.get(contract_address)
+        if not position:
+            return
+        
+        try:
+            if not current_price or current_price <= 0:
+                return
+            
+            # Calcula múltiplo (com proteção contra valores inválidos)
+            if position['entry_price'] <= 0 or current_price <= 0:
+                return
+            
+            # Validação: Se entry_price for muito pequeno (< 1e-8), provavelmente está errado
+            # Tenta buscar preço inicial do token detectado como fallback
+            if position['entry_price'] < 1e-8:
+                try:
+                    from detected_tokens_tracker import get_detected_token
+                    token = get_detected_token(contract_address)
+                    initial_price = token.get('initial_price', 0) if token else 0
+                    if initial_price > 1e-8:
+                        print(f"🔧 {position['symbol']}: Corrigindo entry price inválido ({position['entry_price']:.10f}) → ${initial_price:.10f}")
+                        position['entry_price'] = initial_price
+                        # Atualiza também no tracker para persistir a correção
                         try:
-                            from detected_tokens_tracker import get_all_detected_tokens
-                            detected_tokens = get_all_detected_tokens(limit=100)
-                            for token in detected_tokens:
-                                if token.get('contract_address') == contract_address:
-                                    initial_price = token.get('initial_price', 0)
-                                    if initial_price > 1e-8 and abs(initial_price - position['entry_price']) > 1e-8:
-                                        print(f"🔧 Corrigindo entry price: ${position['entry_price']:.10f} → ${initial_price:.10f}")
-                                        position['entry_price'] = initial_price
-                                        # Recalcula múltiplo
-                                        multiple = current_price / initial_price
-                                        if multiple <= 1000:
-                                            print(f"✅ Correção aplicada! Novo múltiplo: {multiple:.3f}x")
-                                            position['_absurd_multiple_log_count'] = 0  # Reset contador
-                                            break
+                            from trade_tracker_integration import get_tracker
+                            tracker = get_tracker()
+                            tracker.update_active_trade(contract_address, current_price=current_price)
                         except:
                             pass
-                    
-                    # Se ainda absurdo, ignora
-                    if multiple > 1000:
-                        await asyncio.sleep(10)
-                        continue
-                
-                # Atualiza maior múltiplo atingido e registra quando atingiu o pico
-                if multiple > position['max_multiple_reached']:
-                    position['max_multiple_reached'] = multiple
-                    # Registra quando atingiu o pico (primeira vez que bateu este recorde)
-                    if 'peak_time' not in position:
-                        position['peak_time'] = datetime.now(timezone.utc)
+                except Exception as e:
+                    # Silencioso - não queremos spam de erros
+                    pass
+            
+            # Se ainda estiver inválido, pula esta iteração (mas reduz frequência de logs)
+            if position['entry_price'] < 1e-8:
+                # Log apenas a cada 10 iterações para não spammar
+                if not hasattr(position, '_invalid_price_log_count'):
+                    position['_invalid_price_log_count'] = 0
+                position['_invalid_price_log_count'] += 1
+                if position['_invalid_price_log_count'] % 10 == 1:
+                    print(f"⚠️  {position['symbol']}: Entry price ainda inválido após correção. Aguardando...")
+                return
+            
+            # Reset contador se preço válido
+            if hasattr(position, '_invalid_price_log_count'):
+                del position['_invalid_price_log_count']
+            
+            multiple = current_price / position['entry_price']
+            percent_change = (multiple - 1) * 100
+            
+            # Proteção: se múltiplo for absurdo (>1000x), provavelmente é erro de preço
+            # Tenta corrigir usando preço inicial do token detectado
+            if multiple > 1000:
+                # Log apenas a cada 5 iterações para não spammar
+                if not hasattr(position, '_absurd_multiple_log_count'):
+                    position['_absurd_multiple_log_count'] = 0
+                position['_absurd_multiple_log_count'] += 1
                 
-                # Calcula tempo desde a compra
-                time_since_buy = datetime.now(timezone.utc) - position['bought_at']
-                minutes_since_buy = time_since_buy.total_seconds() / 60
+                if position['_absurd_multiple_log_count'] % 5 == 1:
+                    print(f"⚠️  {position['symbol']}: Múltiplo absurdo ({multiple:.2f}x) - Entry: ${position['entry_price']:.10f}, Current: ${current_price:.10f}")
+                    # Tenta corrigir uma vez
+                    try:
+                        from detected_tokens_tracker import get_detected_token
+                        token = get_detected_token(contract_address)
+                        initial_price = token.get('initial_price', 0) if token else 0
+                        if initial_price > 1e-8 and abs(initial_price - position['entry_price']) > 1e-8:
+                            print(f"🔧 Corrigindo entry price: ${position['entry_price']:.10f} → ${initial_price:.10f}")
+                            position['entry_price'] = initial_price
+                            # Recalcula múltiplo
+                            multiple = current_price / initial_price
+                            if multiple <= 1000:
+                                print(f"✅ Correção aplicada! Novo múltiplo: {multiple:.3f}x")
+                                position['_absurd_multiple_log_count'] = 0  # Reset contador
+                    except:
+                        pass
                 
-                # Log atualização
-                remaining_percent = (position['remaining_amount'] / position['amount_tokens']) * 100
-                log_trade_update(
-                    contract_address,
-                    current_price,
-                    remaining_percent,
-                    position['tps_executed']
-                )
+                # Se ainda absurdo, ignora
+                if multiple > 1000:
+                    return
+            
+            # Atualiza maior múltiplo atingido e registra quando atingiu o pico
+            if multiple > position['max_multiple_reached']:
+                position['max_multiple_reached'] = multiple
+                # Registra quando atingiu o pico (primeira vez que bateu este recorde)
+                if 'peak_time' not in position:
+                    position['peak_time'] = datetime.now(timezone.utc)
+            
+            # Calcula tempo desde a compra
+            now = datetime.now(timezone.utc)
+            time_since_buy = now - position['bought_at']
+            minutes_since_buy = time_since_buy.total_seconds() / 60
+            
+            # Log atualização
+            remaining_percent = (position['remaining_amount'] / position['amount_tokens']) * 100
+            log_trade_update(
+                contract_address,
+                current_price,
+                remaining_percent,
+                position['tps_executed']
+            )
+            
+            # STOP LOSS POR TEMPO: Se passou X minutos e não subiu significativamente, vende tudo
+            # Baseado na média: tokens que dão certo começam a subir em 1-5 minutos
+            # Se não subiu em 5 minutos, provavelmente não vai subir
+            max_reached = position.get('max_multiple_reached', 1.0)
+            # Condição de venda (após o prazo):
+            # 1. Se nunca subiu acima de 1.1x (nunca teve movimento significativo) OU
+            # 2. Se caiu abaixo do múltiplo mínimo configurado
+            stop_reason = position['triggers'].stop_loss_reason(multiple, max_reached, now)
+            if minutes_since_buy >= config.STOP_LOSS_TIME_MINUTES:
+                # Log para debug (apenas a cada minuto para não poluir)
+                if int(minutes_since_buy) % 1 == 0 and minutes_since_buy < config.STOP_LOSS_TIME_MINUTES + 1:
+                    print(f"⏱️  {position['symbol']}: {minutes_since_buy:.1f} min | Múltiplo: {multiple:.3f}x | Máx: {max_reached:.3f}x")
                 
-                # STOP LOSS POR TEMPO: Se passou X minutos e não subiu significativamente, vende tudo
-                # Baseado na média: tokens que dão certo começam a subir em 1-5 minutos
-                # Se não subiu em 5 minutos, provavelmente não vai subir
-                if minutes_since_buy >= config.STOP_LOSS_TIME_MINUTES:
-                    max_reached = position.get('max_multiple_reached', 1.0)
-                    
-                    # Log para debug (apenas a cada minuto para não poluir)
-                    if int(minutes_since_buy) % 1 == 0 and minutes_since_buy < config.STOP_LOSS_TIME_MINUTES + 1:
-                        print(f"⏱️  {position['symbol']}: {minutes_since_buy:.1f} min | Múltiplo: {multiple:.3f}x | Máx: {max_reached:.3f}x")
-                    
-                    # Condição de venda: 
-                    # 1. Se nunca subiu acima de 1.1x (nunca teve movimento significativo) OU
-                    # 2. Se caiu abaixo do múltiplo mínimo configurado
-                    never_moved = max_reached < 1.1  # Nunca subiu acima de 10%
-                    below_minimum = multiple < config.STOP_LOSS_MIN_MULTIPLE  # Caiu abaixo do mínimo
-                    should_sell = never_moved or below_minimum
+                if stop_reason:
+                    never_moved = stop_reason == 'never_moved'
+                    print(f"\n⏰ STOP LOSS por tempo: {position['symbol']} não subiu em {config.STOP_LOSS_TIME_MINUTES} minutos")
+                    print(f"   Tempo desde compra: {minutes_since_buy:.1f} minutos")
+                    print(f"   Múltiplo atual: {multiple:.3f}x")
+                    print(f"   Máximo atingido: {max_reached:.3f}x")
+                    print(f"   Condição: {'Nunca subiu acima de 1.1x' if never_moved else f'Caiu abaixo de {config.STOP_LOSS_MIN_MULTIPLE}x'}")
+                    print(f"   Vendendo 100% para evitar perdas maiores...\n")
                     
-                    if should_sell:
-                        print(f"\n⏰ STOP LOSS por tempo: {position['symbol']} não subiu em {config.STOP_LOSS_TIME_MINUTES} minutos")
-                        print(f"   Tempo desde compra: {minutes_since_buy:.1f} minutos")
-                        print(f"   Múltiplo atual: {multiple:.3f}x")
-                        print(f"   Máximo atingido: {max_reached:.3f}x")
-                        print(f"   Condição: {'Nunca subiu acima de 1.1x' if never_moved else f'Caiu abaixo de {config.STOP_LOSS_MIN_MULTIPLE}x'}")
-                        print(f"   Vendendo 100% para evitar perdas maiores...\n")
-                        
-                        # Calcula tempos antes de vender
-                        sold_at = datetime.now(timezone.utc)
-                        time_to_sell = (sold_at - position['bought_at']).total_seconds() / 60  # minutos
-                        time_to_peak = None
-                        if 'peak_time' in position:
-                            time_to_peak = (position['peak_time'] - position['bought_at']).total_seconds() / 60  # minutos
-                        
-                        # Vende tudo
-                        await self._execute_stop_loss(
-                            contract_address, 
-                            position, 
-                            current_price,
-                            time_to_peak=time_to_peak,
-                            time_to_sell=time_to_sell
-                        )
-                        
-                        # Remove da lista
-                        if contract_address in self.positions:
-                            del self.positions[contract_address]
-                        if contract_address in self.monitoring_tasks:
-                            del self.monitoring_tasks[contract_address]
-                        break
-                
-                # NOVA ESTRATÉGIA DE TAKE PROFIT:
-                # 1. Quando atinge 2x (100%): vende 50% para recuperar investimento (tirar risco)
-                # 2. A cada 100% adicional (3x, 4x, 5x...): vende 10% dos tokens restantes
-                
-                # Verifica take profits escalonados
-                await self._check_scaled_take_profits(contract_address, position, multiple, current_price)
-                
-                # Se vendeu tudo (via Stop Loss), remove da lista
-                if position['remaining_amount'] <= 0:
-                    # Calcula tempos antes de remover
+                    # Calcula tempos antes de vender
                     sold_at = datetime.now(timezone.utc)
                     time_to_sell = (sold_at - position['bought_at']).total_seconds() / 60  # minutos
                     time_to_peak = None
                     if 'peak_time' in position:
                         time_to_peak = (position['peak_time'] - position['bought_at']).total_seconds() / 60  # minutos
                     
-                    log_trade_sold(
+                    # Vende tudo
+                    await self._execute_stop_loss(
                         contract_address, 
-                        current_price, 
-                        reason='take_profit',
+                        position, 
+                        current_price,
                         time_to_peak=time_to_peak,
-                        time_to_sell=time_to_sell,
-                        peak_multiple=position.get('max_multiple_reached', 1.0)
+                        time_to_sell=time_to_sell
                     )
-                    print(f"✅ Posição {position['symbol']} completamente vendida!")
                     
-                    del self.positions[contract_address]
-                    if contract_address in self.monitoring_tasks:
-                        del self.monitoring_tasks[contract_address]
-                    break
+                    # Remove da lista
+                    self._remove_position(contract_address)
+                    return
+            
+            # NOVA ESTRATÉGIA DE TAKE PROFIT:
+            # 1. Quando atinge 2x (100%): vende 50% para recuperar investimento (tirar risco)
+            # 2. A cada 100% adicional (3x, 4x, 5x...): vende 10% dos tokens restantes
+            
+            # Verifica take profits escalonados
+            await self._check_scaled_take_profits(contract_address, position, multiple, current_price)
+            
+            # Se vendeu tudo (via Stop Loss), remove da lista
+            if position['remaining_amount'] <= 0:
+                # Calcula tempos antes de remover
+                sold_at = datetime.now(timezone.utc)
+                time_to_sell = (sold_at - position['bought_at']).total_seconds() / 60  # minutos
+                time_to_peak = None
+                if 'peak_time' in position:
+                    time_to_peak = (position['peak_time'] - position['bought_at']).total_seconds() / 60  # minutos
                 
-                await asyncio.sleep(10)  # Verifica a cada 10 segundos
+                log_trade_sold(
+                    contract_address, 
+                    current_price, 
+                    reason='take_profit',
+                    time_to_peak=time_to_peak,
+                    time_to_sell=time_to_sell,
+                    peak_multiple=position.get('max_multiple_reached', 1.0)
+                )
+                print(f"✅ Posição {position['symbol']} completamente vendida!")
                 
-            except Exception as e:
-                print(f"❌ Erro ao monitorar posição {contract_address}: {e}")
-                await asyncio.sleep(10)
+                self._remove_position(contract_address)
+            
+        except Exception as e:
+            print(f"❌ Erro ao monitorar posição {contract_address}: {e}")
     
     def _get_take_profits_for_score(self, score: int) -> list:
         """Retorna lista de take profits baseado no score"""
@@ -263,31 +366,19 @@ class TakeProfitManager:
         - 2x (100%): vende 50% para recuperar investimento
         - 3x, 4x, 5x... (a cada 100% adicional): vende 10% dos tokens restantes
         """
-        # Garante que temos a lista de múltiplos onde já vendemos
+        # Garante que temos a lista de múltiplos onde já vendemos (histórico)
         if 'tp_multiples_executed' not in position:
             position['tp_multiples_executed'] = []
         
-        executed_multiples = position['tp_multiples_executed']
-        
-        # 1. Primeira venda: 2x (100% de alta) - vende 50% para recuperar investimento
-        if multiple >= 2.0 and 2.0 not in executed_multiples:
-            sell_percent = 50.0  # Vende 50% para recuperar o investimento
-            await self._execute_scaled_tp(contract_address, position, 2.0, sell_percent, current_price, 'TP1 (2x - Recuperar Risco)')
-            executed_multiples.append(2.0)
-            return  # Retorna para evitar múltiplas vendas no mesmo ciclo
-        
-        # 2. Vendas subsequentes: a cada múltiplo inteiro adicional (3x, 4x, 5x...), vende 10% do restante
-        # Calcula qual múltiplo inteiro estamos (3, 4, 5, etc)
-        integer_multiple = int(multiple)
+        # Só o menor nível pendente é comparado - níveis ainda não cruzados não custam nada
+        # (10% é dos tokens RESTANTES, não do total original)
+        trigger = position['triggers'].next_take_profit(multiple)
+        if trigger is None:
+            return
         
-        # Para cada múltiplo de 3x em diante
-        for target_multiple in range(3, integer_multiple + 1):
-            if target_multiple not in executed_multiples and multiple >= target_multiple:
-                # Vende 10% dos tokens RESTANTES (não do total original)
-                sell_percent = 10.0
-                await self._execute_scaled_tp(contract_address, position, target_multiple, sell_percent, current_price, f'TP{target_multiple-1} ({target_multiple}x - Venda Parcial)')
-                executed_multiples.append(target_multiple)
-                return  # Retorna para evitar múltiplas vendas no mesmo ciclo
+        # Um nível por ciclo para evitar múltiplas vendas no mesmo ciclo
+        await self._execute_scaled_tp(contract_address, position, trigger['multiple'], trigger['percent'], current_price, trigger['description'])
+        position['tp_multiples_executed'].append(trigger['multiple'])
     
     async def _execute_scaled_tp(self, contract_address: str, position: dict, 
                                  multiple_target: float, sell_percent: float, 
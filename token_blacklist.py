@@ -4,14 +4,15 @@ Sistema de blacklist de tokens (lookup O(1) - muito rápido)
 import os
 import json
 from pathlib import Path
+from state_cache import get_state_cache, watch_file
 
 BLACKLIST_FILE = 'token_blacklist.json'
 
-def load_blacklist():
+def load_blacklist(path: str = BLACKLIST_FILE):
     """Carrega blacklist do arquivo (muito rápido - apenas leitura)"""
-    if os.path.exists(BLACKLIST_FILE):
+    if os.path.exists(path):
         try:
-            with open(BLACKLIST_FILE, 'r') as f:
+            with open(path, 'r') as f:
                 data = json.load(f)
                 # Converte para set para lookup O(1)
                 return set(data.get('addresses', []))
@@ -23,11 +24,11 @@ def save_blacklist(blacklist_set):
     """Salva blacklist (só quando adiciona/remove - não durante compra)"""
     with open(BLACKLIST_FILE, 'w') as f:
         json.dump({'addresses': list(blacklist_set)}, f, indent=2)
+    get_state_cache().invalidate(BLACKLIST_FILE)
 
 def is_blacklisted(contract_address: str) -> bool:
-    """Verifica se token está na blacklist (O(1) - instantâneo)"""
-    blacklist = load_blacklist()
-    return contract_address in blacklist
+    """Verifica se token está na blacklist (O(1) - instantâneo, sem ler o arquivo)"""
+    return contract_address in get_blacklist_cache()
 
 def add_to_blacklist(contract_address: str):
     """Adiciona token à blacklist"""
@@ -41,20 +42,14 @@ def remove_from_blacklist(contract_address: str):
     blacklist.discard(contract_address)
     save_blacklist(blacklist)
 
-# Cache da blacklist (carrega uma vez, atualiza quando necessário)
-_blacklist_cache = None
-
 def get_blacklist_cache():
-    """Retorna cache da blacklist (muito rápido)"""
-    global _blacklist_cache
-    if _blacklist_cache is None:
-        _blacklist_cache = load_blacklist()
-    return _blacklist_cache
+    """Retorna cache da blacklist (muito rápido - relido só quando o arquivo muda)"""
+    return watch_file(BLACKLIST_FILE, load_blacklist).get()
 
 def refresh_blacklist_cache():
-    """Atualiza cache (chamar quando adiciona/remove)"""
-    global _blacklist_cache
-    _blacklist_cache = load_blacklist()
+    """Força releitura do cache"""
+    get_state_cache().invalidate(BLACKLIST_FILE)
+    return get_blacklist_cache()
 
 
 
@@ -0,0 +1,360 @@
+"""
+Estatísticas do histórico de trades mantidas incrementalmente (o que /api/stats mostra)
+Somas, contagens, grupos por score e por dia e os 5 melhores/piores são atualizados a cada
+compra, atualização de preço e venda - consultar custa O(trades ativos), não O(histórico).
+compute_stats() refaz tudo do zero e serve de referência para conferir os agregados.
+
+Uso manual:
+    python trade_stats.py verificar   # confere os agregados contra o recálculo completo do banco
+"""
+import bisect
+import sys
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Dict, List, Optional
+
+TOP_K = 5  # Melhores/piores tokens mostrados na análise de performance
+
+def _amount(trade: Dict) -> float:
+    # Trades antigos têm amount_usdc
+    return trade.get('amount_sol', trade.get('amount_usdc', 0) / 100.0)
+
+def _profit(trade: Dict) -> float:
+    return trade.get('profit_loss_sol', trade.get('profit_loss_usdc', 0) / 100.0)
+
+def _day(trade: Dict) -> str:
+    return (trade.get('timestamp') or '')[:10]
+
+def _score_range(score: int) -> str:
+    if 15 <= score <= 17:
+        return '15-17'
+    if 18 <= score <= 19:
+        return '18-19'
+    if 20 <= score <= 21:
+        return '20-21'
+    if score < 15:
+        return '<15'
+    return 'other'
+
+def _rank_key(trade: Dict) -> tuple:
+    # Maior lucro primeiro; empate: vendido antes primeiro (independe da ordem de carga)
+    return (-_profit(trade), trade.get('sold_at') or '')
+
+def _performer(trade: Dict) -> Dict:
+    return {
+        'symbol': trade['symbol'],
+        'score': trade.get('score', 0),
+        'profit_loss': round(_profit(trade), 4),
+        'time_to_peak': trade.get('time_to_peak'),
+        'time_to_sell': trade.get('time_to_sell'),
+        'peak_multiple': trade.get('peak_multiple'),
+        'final_multiple': round(trade.get('final_price', 0) / trade.get('entry_price', 1), 4) if trade.get('entry_price') else None
+    }
+
+def _active_entry(trade: Dict) -> Dict:
+    amount = _amount(trade)
+    current_value = amount * trade['multiple'] * (trade.get('remaining_percent', 100) / 100)
+    return {
+        'symbol': trade['symbol'],
+        'score': trade.get('score', 0),
+        'profit_loss': current_value - amount,
+        'percent': trade.get('percent_change', 0),
+        'multiple': trade.get('multiple', 1.0)
+    }
+
+def _new_score_bucket() -> Dict:
+    return {'count': 0, 'profitable': 0, 'total_profit': 0.0, 'total_invested': 0.0, 'total_return': 0.0}
+
+def _finish_score_analysis(score_analysis: Dict) -> Dict:
+    """Calcula ROI médio e win rate por range (sobre cópias)"""
+    result = {}
+    for score_range, data in score_analysis.items():
+        data = dict(data)
+        data['win_rate'] = (data['profitable'] / data['count'] * 100) if data['count'] > 0 else 0
+        data['avg_roi'] = (data['total_profit'] / data['total_invested'] * 100) if data['total_invested'] > 0 else 0
+        result[score_range] = data
+    return result
+
+def _average(total: float, count: int, digits: int) -> Optional[float]:
+    return round(total / count, digits) if count else None
+
+def _build_stats(active_count, sold_count, active_invested, active_current, sold_profit, sold_value,
+                 profitable, with_result, today_count, total_trades, today_profit, score_analysis,
+                 active_analysis, peak, sell, peak_multiple, best, worst) -> Dict:
+    """Monta a resposta de /api/stats (mesmo formato para o cálculo incremental e o completo)"""
+    win_rate = (profitable / with_result * 100) if with_result > 0 else 0
+    avg_roi = (sold_profit / sold_value * 100) if sold_value > 0 else 0
+    return {
+        'active_count': active_count,
+        'sold_count': sold_count,
+        'total_active_invested': active_invested,
+        'total_active_current': active_current,
+        'total_active_profit_loss': active_current - active_invested,
+        'total_sold_profit_loss': sold_profit,
+        'total_sold_value': sold_value,
+        'overall_profit_loss': (active_current - active_invested) + sold_profit,
+        'win_rate': round(win_rate, 2),
+        'avg_roi': round(avg_roi, 2),
+        'profitable_trades': profitable,
+        'losing_trades': with_result - profitable,
+        'today_tokens_bought': today_count,
+        'total_tokens_bought': total_trades,
+        'today_profit': round(today_profit, 4),
+        'score_analysis': _finish_score_analysis(score_analysis),
+        'active_analysis': active_analysis,
+        'performance_analysis': {
+            'best_tokens': best,
+            'worst_tokens': worst,
+            'avg_time_to_peak': _average(peak[0], peak[1], 2),
+            'avg_time_to_sell': _average(sell[0], sell[1], 2),
+            'avg_peak_multiple': _average(peak_multiple[0], peak_multiple[1], 4),
+            'tokens_with_peak_data': peak[1],
+            'tokens_with_sell_data': sell[1]
+        }
+    }
+
+def compute_stats(active: List[Dict], sold: List[Dict], today: str = None) -> Dict:
+    """Recalcula todas as estatísticas do zero (referência para conferir TradeStats)"""
+    today = today or date.today().isoformat()
+    score_analysis = {}
+    for trade in sold:
+        bucket = score_analysis.setdefault(_score_range(trade.get('score', 0)), _new_score_bucket())
+        profit = _profit(trade)
+        bucket['count'] += 1
+        bucket['total_profit'] += profit
+        bucket['total_invested'] += _amount(trade)
+        bucket['total_return'] += _amount(trade) + profit
+        if profit > 0:
+            bucket['profitable'] += 1
+
+    def timing(field):
+        values = [t[field] for t in sold if t.get(field) is not None]
+        return (sum(values), len(values))
+
+    ranked = sorted(sold, key=_rank_key)
+    return _build_stats(
+        active_count=len(active),
+        sold_count=len(sold),
+        active_invested=sum(_amount(t) for t in active),
+        active_current=sum(_amount(t) * t['multiple'] * (t.get('remaining_percent', 100) / 100) for t in active),
+        sold_profit=sum(_profit(t) for t in sold),
+        sold_value=sum(t.get('final_value_sol', t.get('final_value_usdc', 0) / 100.0) for t in sold),
+        profitable=sum(1 for t in sold if _profit(t) > 0),
+        with_result=sum(1 for t in sold if 'profit_loss_sol' in t or 'profit_loss_usdc' in t),
+        today_count=sum(1 for t in active + sold if _day(t) == today),
+        total_trades=len(active) + len(sold),
+        today_profit=(
+            sum(_amount(t) * (t['multiple'] - 1) * (t.get('remaining_percent', 100) / 100) for t in active if _day(t) == today)
+            + sum(_profit(t) for t in sold if _day(t) == today)
+        ),
+        score_analysis=score_analysis,
+        active_analysis=[_active_entry(t) for t in active],
+        peak=timing('time_to_peak'),
+        sell=timing('time_to_sell'),
+        peak_multiple=timing('peak_multiple'),
+        best=[_performer(t) for t in ranked[:TOP_K]] if sold else [],
+        worst=[_performer(t) for t in ranked[-TOP_K:]] if sold else []
+    )
+
+class TradeStats:
+    """Agregados das estatísticas, atualizados a cada mudança de trade"""
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._active: Dict[str, Dict] = {}  # {contract_address: trade} (referência - o tracker altera no lugar)
+        self._active_parts: Dict[str, tuple] = {}  # {contract_address: (investido, valor atual, dia, lucro do dia)}
+        self.active_invested = 0.0
+        self.active_current = 0.0
+        self.active_profit_by_day = defaultdict(float)
+        self.bought_by_day = Counter()  # Compras por dia (ativos + vendidos)
+        self.sold_count = 0
+        self.sold_profit = 0.0
+        self.sold_value = 0.0
+        self.profitable = 0
+        self.with_result = 0
+        self.sold_profit_by_day = defaultdict(float)
+        self.score_analysis: Dict[str, Dict] = {}
+        self.peak = [0.0, 0]  # [soma, quantidade] de time_to_peak
+        self.sell = [0.0, 0]
+        self.peak_multiple = [0.0, 0]
+        self._best: List[tuple] = []  # [(chave, resumo)] ordenado - mantém só os TOP_K primeiros
+        self._worst: List[tuple] = []  # Idem - mantém só os TOP_K últimos
+
+    def rebuild(self, active: List[Dict], sold: List[Dict]):
+        """Recomeça a partir do histórico completo (carga do banco)"""
+        self.reset()
+        for trade in sold:
+            self.add_sold(trade)
+        for trade in active:
+            self.add_active(trade)
+
+    @staticmethod
+    def _parts(trade: Dict) -> tuple:
+        amount = _amount(trade)
+        remaining = trade.get('remaining_percent', 100) / 100
+        return (amount, amount * trade['multiple'] * remaining, _day(trade), amount * (trade['multiple'] - 1) * remaining)
+
+    def add_active(self, trade: Dict):
+        ca = trade.get('contract_address')
+        if ca in self._active:
+            self.update_active(trade)
+            return
+        parts = self._parts(trade)
+        self._active[ca] = trade
+        self._active_parts[ca] = parts
+        self.active_invested += parts[0]
+        self.active_current += parts[1]
+        self.active_profit_by_day[parts[2]] += parts[3]
+        self.bought_by_day[parts[2]] += 1
+
+    def update_active(self, trade: Dict):
+        """Preço ou vendas parciais mudaram (aplica só a diferença)"""
+        ca = trade.get('contract_address')
+        old = self._active_parts.get(ca)
+        if old is None:
+            return
+        new = self._parts(trade)
+        self._active[ca] = trade
+        self._active_parts[ca] = new
+        self.active_invested += new[0] - old[0]
+        self.active_current += new[1] - old[1]
+        self.active_profit_by_day[old[2]] -= old[3]
+        self.active_profit_by_day[new[2]] += new[3]
+        if new[2] != old[2]:
+            self.bought_by_day[old[2]] -= 1
+            self.bought_by_day[new[2]] += 1
+
+    def remove_active(self, ca: str) -> bool:
+        parts = self._active_parts.pop(ca, None)
+        if parts is None:
+            return False
+        del self._active[ca]
+        self.active_invested -= parts[0]
+        self.active_current -= parts[1]
+        self.active_profit_by_day[parts[2]] -= parts[3]
+        self.bought_by_day[parts[2]] -= 1
+        if not self._active:
+            # Sem ativos as somas são exatamente zero (descarta o resíduo de ponto flutuante)
+            self.active_invested = self.active_current = 0.0
+            self.active_profit_by_day.clear()
+        return True
+
+    def add_sold(self, trade: Dict):
+        """Trade vendido (total ou venda parcial registrada como vendido)"""
+        profit = _profit(trade)
+        amount = _amount(trade)
+        self.sold_count += 1
+        self.sold_profit += profit
+        self.sold_value += trade.get('final_value_sol', trade.get('final_value_usdc', 0) / 100.0)
+        if profit > 0:
+            self.profitable += 1
+        if 'profit_loss_sol' in trade or 'profit_loss_usdc' in trade:
+            self.with_result += 1
+        day = _day(trade)
+        self.sold_profit_by_day[day] += profit
+        self.bought_by_day[day] += 1
+
+        bucket = self.score_analysis.setdefault(_score_range(trade.get('score', 0)), _new_score_bucket())
+        bucket['count'] += 1
+        bucket['total_profit'] += profit
+        bucket['total_invested'] += amount
+        bucket['total_return'] += amount + profit
+        if profit > 0:
+            bucket['profitable'] += 1
+
+        for field, total in (('time_to_peak', self.peak), ('time_to_sell', self.sell), ('peak_multiple', self.peak_multiple)):
+            if trade.get(field) is not None:
+                total[0] += trade[field]
+                total[1] += 1
+
+        key = _rank_key(trade)
+        summary = _performer(trade)
+        self._insert_ranked(self._best, key, summary)
+        if len(self._best) > TOP_K:
+            self._best.pop()
+        self._insert_ranked(self._worst, key, summary)
+        if len(self._worst) > TOP_K:
+            self._worst.pop(0)
+
+    @staticmethod
+    def _insert_ranked(ranking: List[tuple], key: tuple, summary: Dict):
+        # No máximo TOP_K + 1 itens: inserção ordenada é O(1) na prática
+        position = bisect.bisect_right([k for k, _ in ranking], key)
+        ranking.insert(position, (key, summary))
+
+    def move_to_sold(self, ca: str, sold_trade: Dict):
+        self.remove_active(ca)
+        self.add_sold(sold_trade)
+
+    def snapshot(self, today: str = None) -> Dict:
+        """Estatísticas no formato de /api/stats"""
+        today = today or date.today().isoformat()
+        return _build_stats(
+            active_count=len(self._active),
+            sold_count=self.sold_count,
+            active_invested=self.active_invested,
+            active_current=self.active_current,
+            sold_profit=self.sold_profit,
+            sold_value=self.sold_value,
+            profitable=self.profitable,
+            with_result=self.with_result,
+            today_count=self.bought_by_day.get(today, 0),
+            total_trades=len(self._active) + self.sold_count,
+            today_profit=self.active_profit_by_day.get(today, 0.0) + self.sold_profit_by_day.get(today, 0.0),
+            score_analysis=self.score_analysis,
+            active_analysis=[_active_entry(t) for t in self._active.values()],
+            peak=self.peak,
+            sell=self.sell,
+            peak_multiple=self.peak_multiple,
+            best=[dict(summary) for _, summary in self._best],
+            worst=[dict(summary) for _, summary in self._worst]
+        )
+
+def compare_stats(expected: Dict, actual: Dict, tolerance: float = 1e-6, path: str = '') -> List[str]:
+    """Lista as diferenças entre duas estatísticas (números comparados com tolerância relativa)"""
+    differences = []
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual), key=str):
+            if key not in expected or key not in actual:
+                differences.append(f"{path}{key}: só em {'recálculo' if key in expected else 'agregados'}")
+                continue
+            differences += compare_stats(expected[key], actual[key], tolerance, f"{path}{key}.")
+    elif isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            differences.append(f"{path.rstrip('.')}: {len(expected)} itens no recálculo, {len(actual)} nos agregados")
+        else:
+            for index, (a, b) in enumerate(zip(expected, actual)):
+                differences += compare_stats(a, b, tolerance, f"{path}{index}.")
+    elif isinstance(expected, float) or isinstance(actual, float):
+        if not (isinstance(expected, (int, float)) and isinstance(actual, (int, float))) or \
+                abs(expected - actual) > tolerance * max(1.0, abs(expected), abs(actual)):
+            differences.append(f"{path.rstrip('.')}: recálculo={expected} agregados={actual}")
+    elif expected != actual:
+        differences.append(f"{path.rstrip('.')}: recálculo={expected} agregados={actual}")
+    return differences
+
+def verify_stats(stats: TradeStats, active: List[Dict], sold: List[Dict]) -> List[str]:
+    """Confere os agregados contra o recálculo completo dos mesmos trades"""
+    return compare_stats(compute_stats(active, sold), stats.snapshot())
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'verificar'
+    if command != 'verificar':
+        print("Uso: python trade_stats.py verificar")
+        sys.exit(1)
+    from trade_store import TradeStore
+    store = TradeStore()
+    rows = store.load()
+    store.close()
+    active = [trade for _, trade in rows['active']]
+    sold = [trade for _, trade in rows['sold']]
+    stats = TradeStats()
+    stats.rebuild(active, sold)
+    differences = verify_stats(stats, active, sold)
+    if differences:
+        print(f"❌ {len(differences)} diferenças entre agregados e recálculo:")
+        for difference in differences:
+            print(f"   {difference}")
+        sys.exit(1)
+    print(f"✅ Agregados conferem com o recálculo ({len(active)} ativos, {len(sold)} vendidos)")
@@ -0,0 +1,306 @@
+"""
+Armazenamento do histórico de trades em SQLite (modo WAL)
+Cada trade é uma linha (campos de busca indexados + o trade completo em JSON): atualizar um
+trade grava uma linha em vez de reescrever o histórico inteiro, e no modo WAL quem lê
+(interface web) nunca bloqueia quem escreve (bot).
+
+Uso manual:
+    python trade_store.py importar [trades_history.json]                # importa o JSON antigo (só com o banco vazio)
+    python trade_store.py importar arquivo.json --substituir            # troca todo o histórico pelo JSON (bot parado)
+    python trade_store.py exportar [arquivo.json]                       # gera um JSON no formato antigo
+
+Scripts de manutenção (corrigir_*, converter_*, update_sell_prices) editam o banco com
+TradeHistoryEdit: carregam o histórico no formato antigo e gravam só as linhas alteradas.
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+import config
+
+TRADES_JSON_FILE = 'trades_history.json'  # Formato antigo
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    contract_address TEXT NOT NULL,
+    status TEXT NOT NULL,
+    timestamp TEXT,
+    sold_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_contract_address ON trades(contract_address);
+CREATE INDEX IF NOT EXISTS idx_trades_status ON trades(status, id);
+CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades(timestamp);
+CREATE INDEX IF NOT EXISTS idx_trades_sold_at ON trades(sold_at);
+"""
+
+class TradeStore:
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: Arquivo do banco (padrão: TRADES_DB_FILE; criado se não existir)
+        """
+        self.path = path or config.TRADES_DB_FILE
+        self._lock = threading.RLock()  # Uma conexão por instância, compartilhada entre threads
+        # isolation_level=None: sem transações implícitas - cada escrita abre a sua com BEGIN
+        self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=FULL')  # Compra/venda gravada = durável
+        self._conn.execute('PRAGMA busy_timeout=10000')
+        self._conn.executescript(SCHEMA)
+        self._own_commits = 0  # data_version não muda com as gravações desta conexão - contadas aqui
+
+    def data_version(self) -> Tuple[int, int]:
+        """Muda sempre que o banco é alterado (por esta ou por outra conexão/processo) - leitura O(1)"""
+        with self._lock:
+            return self._conn.execute('PRAGMA data_version').fetchone()[0], self._own_commits
+
+    def _write(self, statements: List[Tuple[str, tuple]]) -> List[sqlite3.Cursor]:
+        """Executa os comandos numa única transação"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                cursors = [self._conn.execute(sql, params) for sql, params in statements]
+                self._conn.execute('COMMIT')
+                self._own_commits += 1
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            return cursors
+
+    @staticmethod
+    def _row_params(trade: Dict) -> tuple:
+        return (
+            trade.get('contract_address', ''),
+            trade.get('timestamp'),
+            trade.get('sold_at'),
+            json.dumps(trade, ensure_ascii=False)
+        )
+
+    def load(self) -> Dict[str, List[Tuple[int, Dict]]]:
+        """Todos os trades por status, na ordem de inserção: {'active': [(id, trade)], 'sold': [...]}"""
+        result = {'active': [], 'sold': []}
+        with self._lock:
+            rows = self._conn.execute('SELECT id, status, data FROM trades ORDER BY id').fetchall()
+        for row_id, status, data in rows:
+            result.setdefault(status, []).append((row_id, json.loads(data)))
+        return result
+
+    def count(self, status: str = None) -> int:
+        with self._lock:
+            if status is None:
+                return self._conn.execute('SELECT COUNT(*) FROM trades').fetchone()[0]
+            return self._conn.execute('SELECT COUNT(*) FROM trades WHERE status = ?', (status,)).fetchone()[0]
+
+    def insert(self, status: str, trade: Dict) -> int:
+        """Insere trade e retorna o id da linha"""
+        cursor = self._write([(
+            'INSERT INTO trades (contract_address, timestamp, sold_at, data, status) VALUES (?, ?, ?, ?, ?)',
+            self._row_params(trade) + (status,)
+        )])[0]
+        return cursor.lastrowid
+
+    def update(self, row_id: int, trade: Dict) -> bool:
+        """Regrava um trade ativo (False se a linha não está mais ativa - ex: vendido pela interface)"""
+        return self.update_many([(row_id, trade)]) == 1
+
+    def update_many(self, rows: List[Tuple[int, Dict]]) -> int:
+        """Regrava vários trades ativos numa transação e retorna quantos foram atualizados"""
+        if not rows:
+            return 0
+        cursors = self._write([
+            (
+                "UPDATE trades SET contract_address = ?, timestamp = ?, sold_at = ?, data = ? WHERE id = ? AND status = 'active'",
+                self._row_params(trade) + (row_id,)
+            )
+            for row_id, trade in rows
+        ])
+        return sum(cursor.rowcount for cursor in cursors)
+
+    def update_prices_many(self, rows: List[Tuple[int, float, float, float]]) -> int:
+        """Grava só os campos de preço (current_price, multiple, percent_change) de trades ativos
+        O resto da linha fica como está no banco - uma venda parcial gravada pelo bot nesse meio
+        tempo não é desfeita. rows: [(id, current_price, multiple, percent_change)]
+        """
+        if not rows:
+            return 0
+        cursors = self._write([
+            (
+                "UPDATE trades SET data = json_set(data, '$.current_price', ?, '$.multiple', ?, '$.percent_change', ?) "
+                "WHERE id = ? AND status = 'active'",
+                (current_price, multiple, percent_change, row_id)
+            )
+            for row_id, current_price, multiple, percent_change in rows
+        ])
+        return sum(cursor.rowcount for cursor in cursors)
+
+    def mark_sold(self, row_id: int, sold_trade: Dict) -> bool:
+        """Move trade ativo para vendido (uma linha)"""
+        cursor = self._write([(
+            "UPDATE trades SET contract_address = ?, timestamp = ?, sold_at = ?, data = ?, status = 'sold' "
+            "WHERE id = ? AND status = 'active'",
+            self._row_params(sold_trade) + (row_id,)
+        )])[0]
+        return cursor.rowcount == 1
+
+    def rewrite(self, rows: List[Tuple[int, Dict]]) -> int:
+        """Regrava trades (ativos ou vendidos) mantendo id e status e retorna quantos foram gravados"""
+        if not rows:
+            return 0
+        cursors = self._write([
+            (
+                'UPDATE trades SET contract_address = ?, timestamp = ?, sold_at = ?, data = ? WHERE id = ?',
+                self._row_params(trade) + (row_id,)
+            )
+            for row_id, trade in rows
+        ])
+        return sum(cursor.rowcount for cursor in cursors)
+
+    def replace_all(self, trades: Dict[str, List[Dict]]) -> Dict[str, List[int]]:
+        """Substitui todo o histórico (reset ou importação) e retorna os ids por status"""
+        statements = [('DELETE FROM trades', ())]
+        order = []
+        for status in ('active', 'sold'):
+            for trade in trades.get(status, []):
+                statements.append((
+                    'INSERT INTO trades (contract_address, timestamp, sold_at, data, status) VALUES (?, ?, ?, ?, ?)',
+                    self._row_params(trade) + (status,)
+                ))
+                order.append(status)
+        cursors = self._write(statements)[1:]
+        ids = {'active': [], 'sold': []}
+        for status, cursor in zip(order, cursors):
+            ids[status].append(cursor.lastrowid)
+        return ids
+
+    def import_json(self, path: str = TRADES_JSON_FILE, only_if_empty: bool = True) -> int:
+        """Importa o histórico do JSON antigo e retorna quantos trades entraram
+        Args:
+            only_if_empty: Só importa se o banco estiver vazio (evita duplicar ao rodar de novo)
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'r', encoding='utf-8') as f:
+            trades = json.load(f)
+        with self._lock:
+            # Verificação e importação na mesma transação: bot e interface podem iniciar juntos
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                if only_if_empty and self._conn.execute('SELECT COUNT(*) FROM trades').fetchone()[0] > 0:
+                    self._conn.execute('ROLLBACK')
+                    return 0
+                imported = 0
+                for status in ('active', 'sold'):
+                    for trade in trades.get(status, []):
+                        self._conn.execute(
+                            'INSERT INTO trades (contract_address, timestamp, sold_at, data, status) VALUES (?, ?, ?, ?, ?)',
+                            self._row_params(trade) + (status,)
+                        )
+                        imported += 1
+                self._conn.execute('COMMIT')
+                self._own_commits += 1
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return imported
+
+    def load_trades(self) -> Dict[str, List[Dict]]:
+        """Histórico no formato antigo ({'active': [...], 'sold': [...]}), sem os ids"""
+        return {status: [trade for _, trade in rows] for status, rows in self.load().items()}
+
+    def export_json(self, path: str) -> int:
+        """Grava o histórico no formato antigo ({'active': [...], 'sold': [...]}) e retorna o total"""
+        trades = self.load_trades()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(trades, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return sum(len(rows) for rows in trades.values())
+
+    def backup(self, path: str):
+        """Cópia consistente do banco (pode ser feita com o bot rodando)"""
+        target = sqlite3.connect(path)
+        try:
+            with self._lock:
+                self._conn.backup(target)
+        finally:
+            target.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def read_trade_history(path: str = None) -> Optional[Dict[str, List[Dict]]]:
+    """Leitura avulsa do histórico para os scripts de verificação (None se o banco não existe)"""
+    path = path or config.TRADES_DB_FILE
+    if not os.path.exists(path):
+        return None
+    store = TradeStore(path)
+    try:
+        return store.load_trades()
+    finally:
+        store.close()
+
+class TradeHistoryEdit:
+    """Edição do histórico pelos scripts de manutenção
+    trades = {'active': [...], 'sold': [...]} (mesmo formato do JSON antigo); alterar os dicts
+    e chamar commit() grava só as linhas que mudaram, cada uma no seu id. Trades ativos ficam
+    em memória no bot - corrija ativos com o bot parado, senão a próxima gravação dele desfaz.
+    """
+    def __init__(self, store: TradeStore = None):
+        self.store = store or TradeStore()
+        self.store.import_json()  # Banco novo: traz o JSON antigo primeiro (como TradeTracker)
+        rows = self.store.load()
+        self._rows = [(row_id, trade) for status in ('active', 'sold') for row_id, trade in rows.get(status, [])]
+        self._original = {row_id: json.dumps(trade, sort_keys=True) for row_id, trade in self._rows}
+        self.trades = {status: [trade for _, trade in rows.get(status, [])] for status in ('active', 'sold')}
+
+    def changed(self) -> List[Tuple[int, Dict]]:
+        return [(row_id, trade) for row_id, trade in self._rows
+                if json.dumps(trade, sort_keys=True) != self._original[row_id]]
+
+    def commit(self) -> int:
+        """Grava as alterações numa transação e retorna quantos trades foram gravados"""
+        changed = self.changed()
+        written = self.store.rewrite(changed)
+        for row_id, trade in changed:
+            self._original[row_id] = json.dumps(trade, sort_keys=True)
+        return written
+
+    def close(self):
+        self.store.close()
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'importar'
+    store = TradeStore()
+    if command == 'importar':
+        args = [arg for arg in sys.argv[2:] if not arg.startswith('--')]
+        source = args[0] if args else TRADES_JSON_FILE
+        if '--substituir' in sys.argv:
+            # Reimporta um export editado: apaga o histórico atual e grava o do arquivo
+            if not os.path.exists(source):
+                print(f"❌ {source} não existe")
+            else:
+                backup_path = f"{store.path}.antes_de_importar"
+                store.backup(backup_path)
+                with open(source, 'r', encoding='utf-8') as f:
+                    ids = store.replace_all(json.load(f))
+                print(f"✅ Histórico substituído por {source}: {len(ids['active'])} ativos, {len(ids['sold'])} vendidos "
+                      f"(backup do anterior em {backup_path})")
+            store.close()
+            sys.exit(0)
+        imported = store.import_json(source)
+        if imported:
+            print(f"✅ {imported} trades importados de {source} para {store.path}")
+        else:
+            print(f"ℹ️  Nada importado ({store.path} já tem {store.count()} trades ou {source} não existe)")
+            print("   Para trocar o histórico pelo arquivo: python trade_store.py importar arquivo.json --substituir")
+    elif command == 'exportar':
+        target = sys.argv[2] if len(sys.argv) > 2 else TRADES_JSON_FILE
+        print(f"✅ {store.export_json(target)} trades exportados para {target}")
+    else:
+        print("Uso: python trade_store.py [importar|exportar] [arquivo.json] [--substituir]")
+    store.close()
@@ -5,6 +5,7 @@ Importe este módulo no bot.py para salvar trades automaticamente
 from web_interface import TradeTracker
 import threading
 from daily_loss_limit import add_trade_result
+from event_bus import publish
 
 # Instância global do tracker
 _tracker = None
@@ -19,30 +20,47 @@ def get_tracker():
                 _tracker = TradeTracker()
     return _tracker
 
+def close_tracker():
+    """Grava atualizações pendentes do histórico (chamar ao encerrar o bot)"""
+    if _tracker is not None:
+        _tracker.close()
+
 def log_trade_bought(symbol: str, ca: str, entry_price: float, 
-                    amount_sol: float, score: int, tx: str, amount_tokens: int = None):
+                    amount_sol: float, score: int, tx: str, amount_tokens: int = None,
+                    latency: dict = None):
     """Log quando um trade é comprado
     Args:
         amount_sol: Quantidade em SOL
         amount_tokens: Quantidade de tokens comprados (raw amount) - não usado por enquanto
+        latency: Latência por estágio do sinal até a assinatura (opcional)
     """
     tracker = get_tracker()
-    tracker.add_active_trade(symbol, ca, entry_price, amount_sol, score, tx)
+    trade = tracker.add_active_trade(symbol, ca, entry_price, amount_sol, score, tx, latency=latency)
+    publish('trade_bought', trade)
     print(f"📝 Trade salvo no histórico: {symbol} ({amount_sol} SOL)")
     
     # Marca token como comprado no tracker
     try:
-        from detected_tokens_tracker import mark_token_as_bought
-        mark_token_as_bought(ca)
+        from detection_writer import get_detection_writer
+        writer = get_detection_writer()
+        if writer.running:
+            # Bot: enfileira junto com as detecções (mantém ordem e não bloqueia)
+            writer.submit_bought(ca)
+        else:
+            from detected_tokens_tracker import mark_token_as_bought
+            mark_token_as_bought(ca)
     except:
         pass  # Não bloqueia se der erro
 
 def log_trade_update(ca: str, current_price: float = None,
                     remaining_percent: float = None,
                     tps_executed: list = None):
-    """Log quando um trade é atualizado (preço, vendas parciais)"""
+    """Log quando um trade é atualizado (preço, vendas parciais) - retorna o trade ou None se não está ativo"""
     tracker = get_tracker()
-    tracker.update_active_trade(ca, current_price, remaining_percent, tps_executed)
+    trade = tracker.update_active_trade(ca, current_price, remaining_percent, tps_executed)
+    if trade:
+        publish('trade_updated', trade)
+    return trade
 
 def log_trade_sold(ca: str, final_price: float = None, total_sold_percent: float = 100.0, 
                    reason: str = None, time_to_peak: float = None, time_to_sell: float = None,
@@ -59,6 +77,7 @@ def log_trade_sold(ca: str, final_price: float = None, total_sold_percent: float
     trade = tracker.move_to_sold(ca, final_price, total_sold_percent, reason, 
                                   time_to_peak, time_to_sell, peak_multiple, real_sol_received)
     if trade:
+        publish('trade_sold', trade)
         # Adiciona resultado ao limite diário (assíncrono - não bloqueia)
         try:
             # Usa profit_loss_sol diretamente (ou converte de USDC se for trade antigo)
@@ -2,9 +2,11 @@
 Gerenciador de configurações de trading (TPs e Stop Loss)
 Permite ajustar configurações via interface web
 """
+import copy
 import json
 import os
 from typing import Dict, List
+from state_cache import get_state_cache, watch_file
 
 CONFIG_FILE = 'trading_config.json'
 
@@ -34,13 +36,18 @@ DEFAULT_CONFIG = {
 }
 
 def load_config() -> Dict:
-    """Carrega configurações do arquivo"""
-    if os.path.exists(CONFIG_FILE):
+    """Carrega configurações (em cache - o arquivo só é relido quando muda)
+    Retorna cópia: quem altera e salva não mexe no cache
+    """
+    return copy.deepcopy(watch_file(CONFIG_FILE, _read_config).get())
+
+def _read_config(path: str) -> Dict:
+    if os.path.exists(path):
         try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            with open(path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
                 # Mescla com padrões para garantir que todas as chaves existam
-                merged = DEFAULT_CONFIG.copy()
+                merged = copy.deepcopy(DEFAULT_CONFIG)
                 merged.update(config)
                 # Mescla take_profits e stop_loss também
                 if 'take_profits' in config:
@@ -49,13 +56,14 @@ def load_config() -> Dict:
                     merged['stop_loss'].update(config['stop_loss'])
                 return merged
         except:
-            return DEFAULT_CONFIG.copy()
-    return DEFAULT_CONFIG.copy()
+            return copy.deepcopy(DEFAULT_CONFIG)
+    return copy.deepcopy(DEFAULT_CONFIG)
 
 def save_config(config: Dict):
     """Salva configurações no arquivo"""
     with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
         json.dump(config, f, indent=2, ensure_ascii=False)
+    get_state_cache().invalidate(CONFIG_FILE)
 
 def get_take_profits_for_score(score: int) -> List[Dict]:
     """Retorna lista de take profits para um score"""
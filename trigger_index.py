@@ -0,0 +1,67 @@
+"""
+Índice de gatilhos de uma posição (take profit escalonado e stop loss por tempo)
+Os níveis de take profit pendentes ficam num heap ordenado pelo múltiplo: a cada preço só o
+menor nível pendente é comparado, e a escada (3x, 4x, 5x...) é gerada sob demanda conforme o
+preço sobe - custo O(log n) por atualização mesmo com escadas longas.
+"""
+import heapq
+from datetime import datetime
+from typing import Dict, Optional
+
+# Estratégia escalonada
+FIRST_TP_MULTIPLE = 2.0  # 2x (100%): vende 50% para recuperar o investimento
+FIRST_TP_PERCENT = 50.0
+LADDER_START_MULTIPLE = 3  # A partir de 3x, a cada múltiplo inteiro...
+LADDER_SELL_PERCENT = 10.0  # ...vende 10% dos tokens restantes
+NEVER_MOVED_MULTIPLE = 1.1  # Abaixo disso o token "nunca se mexeu" (stop loss por tempo)
+
+class PositionTriggers:
+    def __init__(self, stop_deadline: datetime, stop_multiple: float):
+        """
+        Args:
+            stop_deadline: Momento a partir do qual o stop loss por tempo fica armado
+            stop_multiple: Múltiplo mínimo após o prazo (abaixo dele vende tudo)
+        """
+        self.stop_deadline = stop_deadline
+        self.stop_multiple = stop_multiple
+        self.moved = False  # Já passou de NEVER_MOVED_MULTIPLE alguma vez
+        self._pending = [FIRST_TP_MULTIPLE]  # Heap de níveis de take profit ainda não executados
+        self._next_ladder = LADDER_START_MULTIPLE  # Próximo degrau ainda não gerado
+
+    def _extend_ladder(self, multiple: float):
+        """Gera os degraus da escada até o múltiplo atual (só os que podem ter sido cruzados)"""
+        while self._next_ladder <= multiple:
+            heapq.heappush(self._pending, float(self._next_ladder))
+            self._next_ladder += 1
+
+    def stop_loss_reason(self, multiple: float, max_multiple: float, now: datetime) -> Optional[str]:
+        """Retorna o motivo do stop loss por tempo, ou None se não deve vender"""
+        if max_multiple >= NEVER_MOVED_MULTIPLE:
+            self.moved = True
+        if now < self.stop_deadline:
+            return None
+        if not self.moved:
+            return 'never_moved'
+        if multiple < self.stop_multiple:
+            return 'below_minimum'
+        return None
+
+    def next_take_profit(self, multiple: float) -> Optional[Dict]:
+        """Retira e retorna o menor nível cruzado pelo múltiplo atual (um por atualização)
+        Returns: {'multiple', 'percent', 'description'} ou None
+        """
+        self._extend_ladder(multiple)
+        if not self._pending or multiple < self._pending[0]:
+            return None
+        level = heapq.heappop(self._pending)
+        if level == FIRST_TP_MULTIPLE:
+            return {'multiple': level, 'percent': FIRST_TP_PERCENT, 'description': 'TP1 (2x - Recuperar Risco)'}
+        target = int(level)
+        return {
+            'multiple': target,
+            'percent': LADDER_SELL_PERCENT,
+            'description': f'TP{target-1} ({target}x - Venda Parcial)'
+        }
+
+    def pending_count(self) -> int:
+        return len(self._pending)
@@ -0,0 +1,221 @@
+"""
+Envio de transações para vários RPCs ao mesmo tempo
+A mesma transação assinada vai para todos os endpoints de SEND_RPC_URLS em paralelo e é
+reenviada periodicamente até confirmar ou o blockhash expirar (aumenta a chance de entrar
+em slots congestionados). Registra qual endpoint aceitou primeiro.
+"""
+import asyncio
+import base64
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+import aiohttp
+from http_session import shared_session
+from confirmation_tracker import ConfirmationTracker, ConfirmationTimeoutError, TransactionFailedError
+
+MAX_RECENT_RESULTS = 200  # Resultados por assinatura mantidos para consulta
+
+class TransactionBroadcaster:
+    def __init__(self, urls: List[str], confirmations: ConfirmationTracker, skip_preflight: bool = False,
+                 rebroadcast_interval: float = 2.0, max_lifetime: float = 60.0):
+        """
+        Args:
+            urls: Endpoints RPC que recebem a transação
+            confirmations: Rastreador usado para saber quando parar de reenviar
+            skip_preflight: Pula a simulação no RPC (mais rápido, mas erros só aparecem on-chain)
+            rebroadcast_interval: Segundos entre reenvios (0 = não reenvia)
+            max_lifetime: Tempo máximo reenviando quando não se sabe o lastValidBlockHeight
+        """
+        self.urls = list(dict.fromkeys(urls))  # Remove duplicados mantendo a ordem
+        self.confirmations = confirmations
+        self.skip_preflight = skip_preflight
+        self.rebroadcast_interval = rebroadcast_interval
+        self.max_lifetime = max_lifetime
+        self.endpoints = {
+            url: {'sent': 0, 'acks': 0, 'errors': 0, 'first_acks': 0, 'ack_ms_total': 0.0}
+            for url in self.urls
+        }
+        # Nome exibido de cada endpoint (só o host - a URL pode conter API key)
+        self.labels = {}
+        for index, url in enumerate(self.urls):
+            label = urlparse(url).netloc or f"rpc{index}"
+            self.labels[url] = label if label not in self.labels.values() else f"{label}#{index}"
+        self.results: "OrderedDict[str, Dict]" = OrderedDict()  # {assinatura: resultado do envio}
+        self._rebroadcasts = set()
+        self._request_id = 0
+
+    async def send(self, raw_transaction: bytes, signature: str, last_valid_block_height: int = None) -> str:
+        """Envia para todos os endpoints e retorna assim que o primeiro aceitar
+        Os envios mais lentos continuam em segundo plano (cada RPC a mais aumenta a chance de entrar).
+        Raises: Exception com o erro do RPC (ex: simulação 0x1771) se nenhum endpoint aceitar
+        """
+        encoded = base64.b64encode(raw_transaction).decode('ascii')
+        started_at = time.perf_counter()
+        result = {'first_ack': None, 'first_ack_ms': None, 'acks': [], 'errors': {}, 'rebroadcasts': 0}
+        self._remember(signature, result)
+
+        tasks = [
+            asyncio.create_task(self._send_one(url, encoded, preflight=not self.skip_preflight))
+            for url in self.urls
+        ]
+        url_by_task = dict(zip(tasks, self.urls))
+        first_error = None
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url = url_by_task[task]
+                if task.exception() is not None:
+                    result['errors'][self.labels[url]] = str(task.exception())[:300]
+                    first_error = first_error or task.exception()
+                    continue
+                elapsed_ms = (time.perf_counter() - started_at) * 1000
+                result['acks'].append(self.labels[url])
+                if result['first_ack'] is None:
+                    result['first_ack'] = self.labels[url]
+                    result['first_ack_ms'] = round(elapsed_ms, 1)
+                    self.endpoints[url]['first_acks'] += 1
+            if result['first_ack'] is not None:
+                break
+
+        if result['first_ack'] is None:
+            raise first_error or Exception("Nenhum RPC aceitou a transação")
+
+        # Demais envios e reenvios seguem em segundo plano
+        task = asyncio.create_task(self._finish(signature, encoded, pending, url_by_task, started_at, last_valid_block_height))
+        self._rebroadcasts.add(task)
+        task.add_done_callback(self._rebroadcasts.discard)
+        return signature
+
+    async def _finish(self, signature: str, encoded: str, pending: set, url_by_task: Dict,
+                      started_at: float, last_valid_block_height: Optional[int]):
+        """Coleta os envios restantes e reenvia até confirmar ou expirar"""
+        result = self.results.get(signature)
+        try:
+            if pending:
+                await asyncio.wait(pending)
+                for task in pending:
+                    url = url_by_task[task]
+                    if task.exception() is None and result is not None:
+                        result['acks'].append(self.labels[url])
+                    elif result is not None:
+                        result['errors'][self.labels[url]] = str(task.exception())[:300]
+            if self.rebroadcast_interval > 0:
+                await self._rebroadcast(signature, encoded, started_at, last_valid_block_height, result)
+        except asyncio.CancelledError:
+            for task in pending:
+                task.cancel()
+            raise
+        except Exception as e:
+            print(f"⚠️  Erro ao reenviar transação {signature[:8]}...: {e}")
+
+    async def _rebroadcast(self, signature: str, encoded: str, started_at: float,
+                           last_valid_block_height: Optional[int], result: Optional[Dict]):
+        confirmed = asyncio.create_task(
+            self.confirmations.wait_for(signature, commitment='processed', timeout=self.max_lifetime)
+        )
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(asyncio.shield(confirmed), self.rebroadcast_interval)
+                    return  # Entrou na blockchain
+                except asyncio.TimeoutError:
+                    pass
+                except (ConfirmationTimeoutError, TransactionFailedError):
+                    return  # Expirou ou falhou on-chain - reenviar não adianta
+
+                if last_valid_block_height is not None:
+                    block_height = await self._get_block_height()
+                    if block_height is not None and block_height > last_valid_block_height:
+                        return  # Blockhash expirou
+                elif time.perf_counter() - started_at > self.max_lifetime:
+                    return
+
+                # Reenvio sem simulação (a primeira já passou)
+                await asyncio.gather(
+                    *(self._send_one(url, encoded, preflight=False) for url in self.urls),
+                    return_exceptions=True
+                )
+                if result is not None:
+                    result['rebroadcasts'] += 1
+        finally:
+            if not confirmed.done():
+                confirmed.cancel()
+            await asyncio.gather(confirmed, return_exceptions=True)
+
+    async def _send_one(self, url: str, encoded: str, preflight: bool) -> str:
+        """sendTransaction em um endpoint (JSON-RPC cru)"""
+        options = {'encoding': 'base64', 'skipPreflight': not preflight}
+        if preflight:
+            options['preflightCommitment'] = 'processed'
+        if self.rebroadcast_interval > 0:
+            options['maxRetries'] = 0  # O reenvio é feito aqui, não pela fila do RPC
+        started_at = time.perf_counter()
+        stats = self.endpoints[url]
+        stats['sent'] += 1
+        try:
+            data = await self._rpc(url, 'sendTransaction', [encoded, options])
+        except Exception:
+            stats['errors'] += 1
+            raise
+        stats['acks'] += 1
+        stats['ack_ms_total'] += (time.perf_counter() - started_at) * 1000
+        return data
+
+    async def _get_block_height(self) -> Optional[int]:
+        for url in self.urls:
+            try:
+                return await self._rpc(url, 'getBlockHeight', [{'commitment': 'processed'}])
+            except Exception:
+                continue
+        return None
+
+    async def _rpc(self, url: str, method: str, params: list):
+        self._request_id += 1
+        payload = {'jsonrpc': '2.0', 'id': self._request_id, 'method': method, 'params': params}
+        async with shared_session() as session:
+            async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                data = await response.json(content_type=None)
+        if 'error' in data:
+            error = data['error']
+            message = str(error)
+            if isinstance(error, dict):
+                message = error.get('message', message)
+                # Logs da simulação trazem o erro do programa (ex: custom program error: 0x1771)
+                details = error.get('data')
+                logs = details.get('logs') if isinstance(details, dict) else None
+                if logs:
+                    message = f"{message} | {' '.join(logs[-5:])}"
+            raise Exception(f"RPC {method} falhou: {message}")
+        return data['result']
+
+    def _remember(self, signature: str, result: Dict):
+        self.results[signature] = result
+        while len(self.results) > MAX_RECENT_RESULTS:
+            self.results.popitem(last=False)
+
+    def get_result(self, signature: str) -> Optional[Dict]:
+        """Resultado do envio de uma assinatura (endpoint que aceitou primeiro, reenvios...)"""
+        return self.results.get(signature)
+
+    def get_stats(self) -> Dict:
+        """Resumo por endpoint"""
+        return {
+            self.labels[url]: {
+                'sent': stats['sent'],
+                'acks': stats['acks'],
+                'errors': stats['errors'],
+                'first_acks': stats['first_acks'],
+                'avg_ack_ms': round(stats['ack_ms_total'] / stats['acks'], 1) if stats['acks'] else None
+            }
+            for url, stats in self.endpoints.items()
+        }
+
+    async def stop(self):
+        """Cancela reenvios em andamento"""
+        tasks = list(self._rebroadcasts)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
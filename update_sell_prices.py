@@ -1,15 +1,15 @@
 """
 Atualiza preços de venda dos tokens vendidos baseado em transações reais da carteira
 """
-import asyncio
 import aiohttp
-import json
+from http_session import shared_session, run_sync
 from solana.rpc.async_api import AsyncClient
 from solders.keypair import Keypair
 from base58 import b58decode
 import config
 from typing import Dict, List, Optional
 from datetime import datetime
+from trade_store import TradeHistoryEdit
 
 def _load_keypair() -> Keypair:
     """Load keypair from private key"""
@@ -50,7 +50,7 @@ async def get_sell_transactions_from_solscan(wallet_address: str, limit: int = 1
             'User-Agent': 'Mozilla/5.0'
         }
         
-        async with aiohttp.ClientSession() as session:
+        async with shared_session() as session:
             async with session.get(url, params=params, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -200,7 +200,7 @@ async def get_sol_price_usd() -> float:
     """Busca preço atual do SOL em USD"""
     try:
         url = "https://price.jup.ag/v4/price?ids=So11111111111111111111111111111111111111112"
-        async with aiohttp.ClientSession() as session:
+        async with shared_session() as session:
             async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -212,17 +212,11 @@ async def get_sol_price_usd() -> float:
 
 async def update_sell_prices_from_wallet():
     """Atualiza preços de venda dos tokens vendidos baseado em transações reais"""
+    history = None
     try:
-        # Carrega trades
-        trades_file = 'trades_history.json'
-        if not os.path.exists(trades_file):
-            print("⚠️  Arquivo trades_history.json não encontrado")
-            return
-        
-        with open(trades_file, 'r', encoding='utf-8') as f:
-            trades_data = json.load(f)
-        
-        sold_trades = trades_data.get('sold', [])
+        # Carrega trades (banco SQLite do histórico)
+        history = TradeHistoryEdit()
+        sold_trades = history.trades['sold']
         if not sold_trades:
             print("ℹ️  Nenhum token vendido encontrado")
             return
@@ -286,8 +280,7 @@ async def update_sell_prices_from_wallet():
         
         # Salva atualizações
         if updated_count > 0:
-            with open(trades_file, 'w', encoding='utf-8') as f:
-                json.dump(trades_data, f, indent=2, ensure_ascii=False)
+            history.commit()
             print(f"\n✅ {updated_count} preços de venda atualizados!")
         else:
             print("\nℹ️  Nenhum preço foi atualizado (não encontrou matches)")
@@ -296,11 +289,14 @@ async def update_sell_prices_from_wallet():
         import traceback
         print(f"❌ Erro ao atualizar preços de venda: {e}")
         print(traceback.format_exc())
+    finally:
+        if history is not None:
+            history.close()
 
 def update_sell_prices_sync():
     """Wrapper síncrono"""
     import os
-    return asyncio.run(update_sell_prices_from_wallet())
+    return run_sync(update_sell_prices_from_wallet())
 
 if __name__ == "__main__":
     update_sell_prices_sync()
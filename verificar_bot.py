@@ -4,6 +4,7 @@ Script para verificar se o bot está vendo tokens
 import os
 import json
 from datetime import datetime
+from trade_store import read_trade_history
 
 print("="*60)
 print("VERIFICAÇÃO DO BOT")
@@ -25,10 +26,8 @@ if os.path.exists('last_token_detected.json'):
     print(f"Detectado em: {token.get('detected_at', 'N/A')}")
     
     # Verifica se comprou
-    if os.path.exists('trades_history.json'):
-        with open('trades_history.json', 'r', encoding='utf-8') as f:
-            trades = json.load(f)
-        
+    trades = read_trade_history()
+    if trades is not None:
         ca = token.get('contract_address')
         comprado = False
         for trade in trades.get('active', []) + trades.get('sold', []):
@@ -1,11 +1,10 @@
 """
 Script para verificar se o stop loss está funcionando
 """
-import json
-import os
 import sys
 import io
 from datetime import datetime, timezone
+from trade_store import read_trade_history
 
 # Configura encoding para Windows
 if sys.stdout.encoding != 'utf-8':
@@ -19,13 +18,11 @@ def verificar_posicoes():
     print()
     
     # Verifica trades ativos
-    if not os.path.exists('trades_history.json'):
-        print("❌ Arquivo trades_history.json não encontrado")
+    trades = read_trade_history()
+    if trades is None:
+        print("❌ Banco de trades não encontrado")
         return
     
-    with open('trades_history.json', 'r', encoding='utf-8') as f:
-        trades = json.load(f)
-    
     active = trades.get('active', [])
     
     if len(active) == 0:
@@ -6,6 +6,7 @@ import io
 import os
 import json
 from datetime import datetime
+from trade_store import read_trade_history
 
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
@@ -55,10 +56,8 @@ def verificar():
     
     # Verifica se comprou
     comprado = False
-    if os.path.exists('trades_history.json'):
-        with open('trades_history.json', 'r', encoding='utf-8') as f:
-            trades = json.load(f)
-        
+    trades = read_trade_history()
+    if trades is not None:
         ca = token.get('contract_address')
         
         # Verifica em tokens ativos
@@ -1,8 +1,18 @@
 """
 Utilitário para verificar saldos da carteira Solana
+
+WalletBalanceService mantém o saldo SOL em memória: um loop em segundo plano relê via RPC a
+cada WALLET_BALANCE_REFRESH_SECONDS e cada swap confirmado ajusta o valor na hora (variação
+real da transação). O caminho de compra e o dashboard leem o saldo instantaneamente, com a
+idade do valor - sem ida e volta ao RPC só para conferir fundos.
 """
 import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
 from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
 from solders.keypair import Keypair
 from base58 import b58decode
 import config
@@ -11,9 +21,16 @@ import config
 SOL_MINT = "So11111111111111111111111111111111111111112"  # Wrapped SOL
 USDC_MINT = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"  # USDC
 
+_keypair: Optional[Keypair] = None
+
 def _load_keypair() -> Keypair:
-    """Load keypair from private key"""
-    private_key = config.SOLANA_PRIVATE_KEY
+    """Load keypair from private key (decodificada uma vez por processo)"""
+    global _keypair
+    if _keypair is None:
+        _keypair = _decode_keypair(config.SOLANA_PRIVATE_KEY)
+    return _keypair
+
+def _decode_keypair(private_key) -> Keypair:
     try:
         if isinstance(private_key, str):
             if len(private_key) == 88:  # Base58 encoded
@@ -65,3 +82,142 @@ def get_wallet_balance_sync() -> dict:
     """Retorna saldos da carteira (sync wrapper)"""
     return asyncio.run(get_wallet_balance())
 
+class WalletBalanceService:
+    def __init__(self, refresh_interval: float = None, max_age: float = None):
+        """
+        Args:
+            refresh_interval: Segundos entre leituras via RPC (padrão: WALLET_BALANCE_REFRESH_SECONDS)
+            max_age: Idade a partir da qual o valor é marcado como 'stale' (padrão: WALLET_BALANCE_MAX_AGE_SECONDS)
+        """
+        self.refresh_interval = refresh_interval or config.WALLET_BALANCE_REFRESH_SECONDS
+        self.max_age = max_age or config.WALLET_BALANCE_MAX_AGE_SECONDS
+        self._lock = threading.Lock()  # Leitores podem estar em outra thread (rotas Flask)
+        self._sol: Optional[float] = None
+        self._updated_at: Optional[float] = None  # time.time() da última leitura/ajuste
+        self._source: Optional[str] = None  # 'rpc' ou 'swap' (ajuste local)
+        self._generation = 0  # Incrementa a cada ajuste local (descarta leitura RPC iniciada antes)
+        self.last_rpc_request_at: Optional[float] = None  # Início da leitura RPC que gerou o valor atual
+        self.last_rpc_slot: Optional[int] = None  # Slot da leitura RPC que gerou o valor atual
+        self._adjusted_slot = 0  # Slot do swap mais recente aplicado localmente
+        self._client: Optional[AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self._first_refresh: Optional[asyncio.Future] = None
+        self.stats = {'refreshes': 0, 'refresh_errors': 0, 'discarded_refreshes': 0, 'adjustments': 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Inicia o loop de atualização (chamar de dentro do event loop; chamadas repetidas são ignoradas)"""
+        if not self.running:
+            self._first_refresh = asyncio.get_running_loop().create_future()
+            self._task = asyncio.create_task(self._run())
+
+    async def ensure_started(self, timeout: float = 10.0):
+        """Inicia o loop (se preciso) e espera a primeira leitura - depois disso retorna na hora"""
+        self.start()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._first_refresh), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️  Saldo da carteira ainda não lido após {timeout:g}s")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.stats['refresh_errors'] += 1
+                print(f"⚠️  Erro ao atualizar saldo da carteira: {e}")
+            finally:
+                if not self._first_refresh.done():
+                    self._first_refresh.set_result(None)
+            await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self) -> Optional[Dict]:
+        """Lê o saldo via RPC agora"""
+        if self._client is None:
+            # Mesmo commitment das confirmações dos swaps (o padrão do AsyncClient é finalized,
+            # que ainda não enxerga um swap já ajustado localmente)
+            self._client = AsyncClient(config.RPC_URL, commitment=Commitment(config.CONFIRMATION_COMMITMENT))
+        generation = self._generation
+        started_at = time.time()
+        response = await self._client.get_balance(_load_keypair().pubkey())
+        slot = response.context.slot
+        with self._lock:
+            if generation != self._generation or slot < self._adjusted_slot:
+                # Um swap foi aplicado enquanto a leitura estava em andamento, ou o nó RPC ainda
+                # não chegou no slot dele - o valor local é mais novo
+                self.stats['discarded_refreshes'] += 1
+            else:
+                self._sol = response.value / 1e9  # Converter lamports para SOL
+                self._updated_at = time.time()
+                self._source = 'rpc'
+                self.last_rpc_request_at = started_at
+                self.last_rpc_slot = slot
+                self.stats['refreshes'] += 1
+        return self.get()
+
+    def apply_delta(self, sol_delta: float, slot: int = None):
+        """Ajusta o saldo com a variação real de um swap confirmado (negativo = gastou)
+        Args:
+            slot: Slot da transação - leituras RPC de slots anteriores passam a ser descartadas
+        """
+        with self._lock:
+            if slot:
+                self._adjusted_slot = max(self._adjusted_slot, slot)
+            if self._sol is None:
+                return
+            self._sol += sol_delta
+            self._updated_at = time.time()
+            self._source = 'swap'
+            self._generation += 1
+            self.stats['adjustments'] += 1
+
+    @property
+    def sol(self) -> Optional[float]:
+        return self._sol
+
+    def get(self) -> Optional[Dict]:
+        """Saldo em memória com a idade do valor (None se ainda não foi lido)"""
+        with self._lock:
+            if self._sol is None:
+                return None
+            age = time.time() - self._updated_at
+            return {
+                'sol': self._sol,
+                'usdc': 0.0,
+                'wallet_address': str(_load_keypair().pubkey()),
+                'other_tokens_count': 0,
+                'updated_at': datetime.fromtimestamp(self._updated_at, timezone.utc).isoformat(),
+                'age_seconds': round(age, 1),
+                'stale': age > self.max_age,
+                'source': self._source
+            }
+
+    async def stop(self):
+        """Para o loop de atualização e fecha o cliente RPC"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+# Instância global (singleton)
+_service: Optional[WalletBalanceService] = None
+_service_lock = threading.Lock()
+
+def get_wallet_balance_service() -> WalletBalanceService:
+    """Retorna o serviço de saldo do processo (o loop só inicia com start()/ensure_started())"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = WalletBalanceService()
+    return _service
+
@@ -1,8 +1,8 @@
 """
 Busca tokens SPL da carteira e calcula valores via Jupiter API
 """
-import asyncio
 import aiohttp
+from http_session import shared_session, run_sync
 from solana.rpc.async_api import AsyncClient
 from solders.keypair import Keypair
 from base58 import b58decode
@@ -118,7 +118,7 @@ async def get_token_price(token_mint: str) -> Optional[float]:
     """Busca preço de um token via Jupiter Price API"""
     try:
         url = f"https://price.jup.ag/v4/price?ids={token_mint}"
-        async with aiohttp.ClientSession() as session:
+        async with shared_session() as session:
             async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -143,7 +143,7 @@ async def get_token_prices_batch(token_mints: List[str]) -> Dict[str, float]:
             ids = ','.join(batch)
             
             url = f"https://price.jup.ag/v4/price?ids={ids}"
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
                     if response.status == 200:
                         data = await response.json()
@@ -160,7 +160,7 @@ async def get_token_info(token_mint: str) -> Dict:
     try:
         # Tenta buscar da Jupiter Token List
         url = "https://token.jup.ag/all"
-        async with aiohttp.ClientSession() as session:
+        async with shared_session() as session:
             async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
                 if response.status == 200:
                     tokens = await response.json()
@@ -183,5 +183,5 @@ async def get_token_info(token_mint: str) -> Dict:
 
 def get_wallet_tokens_sync() -> List[Dict]:
     """Wrapper síncrono"""
-    return asyncio.run(get_wallet_tokens())
+    return run_sync(get_wallet_tokens())
 
@@ -1,8 +1,8 @@
 """
 Busca transações de venda da carteira para calcular preços reais de venda
 """
-import asyncio
 import aiohttp
+from http_session import shared_session, run_sync
 from solana.rpc.async_api import AsyncClient
 from solders.keypair import Keypair
 from base58 import b58decode
@@ -183,7 +183,7 @@ async def get_sell_price_from_solscan(contract_address: str, wallet_address: str
         # Busca transações da carteira no Solscan
         url = f"https://api.solscan.io/account/transactions?account={wallet_address}&limit=50"
         
-        async with aiohttp.ClientSession() as session:
+        async with shared_session() as session:
             async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -200,7 +200,7 @@ async def get_sell_price_from_solscan(contract_address: str, wallet_address: str
 
 def get_sell_transactions_sync(limit: int = 50) -> List[Dict]:
     """Wrapper síncrono"""
-    return asyncio.run(get_sell_transactions(limit))
+    return run_sync(get_sell_transactions(limit))
 
 
 
@@ -2,49 +2,146 @@
 Interface Web para monitorar trades do bot
 Acesse: http://localhost:5000
 """
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
 from flask_cors import CORS
 import json
 import os
+import queue
+import threading
 from datetime import datetime, timezone
 from typing import Dict, List
 from bot_control import get_bot_state, set_bot_state
 from last_token_detected import get_last_token
-from wallet_balance import get_wallet_balance_sync
-import asyncio
+from wallet_balance import get_wallet_balance_service
+from http_session import get_http_stats
+from async_worker import get_async_worker
+from event_bus import EventBusClient, EventFanout, LiveView
 
 app = Flask(__name__)
 CORS(app)
 
-# Arquivo para salvar histórico de trades
+# Histórico antigo em JSON (importado para o banco SQLite na primeira execução - ver trade_store.py)
 TRADES_FILE = 'trades_history.json'
 
 class TradeTracker:
-    def __init__(self):
+    def __init__(self, flush_interval: float = None, db_path: str = None):
+        """
+        Args:
+            flush_interval: Segundos entre gravações de atualizações de preço (padrão: TRADES_FLUSH_INTERVAL_SECONDS)
+            db_path: Banco SQLite do histórico (padrão: TRADES_DB_FILE)
+        """
+        import config
+        from trade_store import TradeStore
+        from trade_stats import TradeStats
         self.trades_file = TRADES_FILE
+        self.flush_interval = config.TRADES_FLUSH_INTERVAL_SECONDS if flush_interval is None else flush_interval
+        self.store = TradeStore(db_path)
+        self._lock = threading.RLock()
+        self._active_rows: Dict[str, tuple] = {}  # {contract_address: (id da linha, trade)}
+        self._dirty = set()  # Trades ativos com atualizações em memória ainda não gravadas
+        self._flusher: threading.Thread = None
+        self._stop_flusher = threading.Event()
+        self.stats = TradeStats()  # Agregados de get_stats (atualizados a cada mudança)
+        self._loaded_version = None  # data_version do banco na última leitura completa
+        imported = self.store.import_json(self.trades_file)
+        if imported:
+            print(f"📦 {imported} trades importados de {self.trades_file} para {self.store.path}")
+        self.trades = {'active': [], 'sold': []}
         self.load_trades()
     
     def load_trades(self):
-        """Carrega histórico de trades do arquivo"""
-        if os.path.exists(self.trades_file):
-            try:
-                with open(self.trades_file, 'r', encoding='utf-8') as f:
-                    self.trades = json.load(f)
-            except:
-                self.trades = {'active': [], 'sold': []}
-        else:
-            self.trades = {'active': [], 'sold': []}
+        """Carrega histórico de trades do banco"""
+        # Grava o que está pendente antes, senão a recarga descartaria as atualizações em memória
+        self.flush()
+        try:
+            version = self.store.data_version()  # Antes da leitura: mudança durante ela recarrega de novo
+            rows = self.store.load()
+        except Exception as e:
+            print(f"⚠️  Erro ao carregar histórico de trades: {e}")
+            return
+        with self._lock:
+            self._loaded_version = version
+            self.trades = {'active': [trade for _, trade in rows['active']], 'sold': [trade for _, trade in rows['sold']]}
+            self._active_rows = {}
+            for row_id, trade in rows['active']:
+                self._active_rows.setdefault(trade.get('contract_address'), (row_id, trade))
+            self.stats.rebuild(self.trades['active'], self.trades['sold'])
+    
+    def refresh(self):
+        """Recarrega só se o banco mudou desde a última leitura (consulta O(1), não cresce com o histórico)"""
+        if self.store.data_version() != self._loaded_version:
+            self.load_trades()
     
     def save_trades(self):
-        """Salva histórico de trades no arquivo"""
-        with open(self.trades_file, 'w', encoding='utf-8') as f:
-            json.dump(self.trades, f, indent=2, ensure_ascii=False)
+        """Regrava o histórico inteiro a partir de self.trades
+        Só para quem altera self.trades diretamente - os métodos abaixo gravam apenas a linha alterada
+        """
+        with self._lock:
+            ids = self.store.replace_all(self.trades)
+            self._active_rows = {}
+            for row_id, trade in zip(ids['active'], self.trades['active']):
+                self._active_rows.setdefault(trade.get('contract_address'), (row_id, trade))
+            self._dirty.clear()
+            self.stats.rebuild(self.trades['active'], self.trades['sold'])
+    
+    def mark_dirty(self, ca: str):
+        """Registra alteração em memória - gravada pelo flush periódico (junta várias numa transação)"""
+        with self._lock:
+            self._dirty.add(ca)
+            if self.flush_interval <= 0:
+                self.flush()
+                return
+        self._ensure_flusher()
+    
+    def flush(self):
+        """Grava agora os trades ativos com alterações pendentes (uma linha cada)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            rows = [self._active_rows[ca] for ca in self._dirty if ca in self._active_rows]
+            self._dirty.clear()
+            self.store.update_many(rows)
+    
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._stop_flusher.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name='trades-flush', daemon=True)
+            self._flusher.start()
+    
+    def _flush_loop(self):
+        while not self._stop_flusher.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️  Erro ao gravar histórico de trades: {e}")
+    
+    def close(self):
+        """Para o flush periódico e grava o que estiver pendente"""
+        self._stop_flusher.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+            self._flusher = None
+        self.flush()
+    
+    def get_active_trade(self, ca: str) -> Dict:
+        """Trade ativo do token (busca O(1))"""
+        entry = self._active_rows.get(ca)
+        return entry[1] if entry else None
+    
+    def add_sold_trade(self, trade: Dict) -> Dict:
+        """Registra uma venda (ex: venda parcial manual) direto no histórico de vendidos"""
+        with self._lock:
+            self.store.insert('sold', trade)
+            self.trades['sold'].append(trade)
+            self.stats.add_sold(trade)
+        return trade
     
     def add_active_trade(self, symbol: str, ca: str, entry_price: float, 
-                        amount_sol: float, score: int, tx: str):
+                        amount_sol: float, score: int, tx: str, latency: Dict = None):
         """Adiciona trade ativo
         Args:
             amount_sol: Quantidade investida em SOL
+            latency: Latência por estágio do sinal até a assinatura (LatencyTrace.to_dict())
         """
         trade = {
             'symbol': symbol,
@@ -60,40 +157,81 @@ class TradeTracker:
             'remaining_percent': 100.0,
             'tps_executed': []
         }
-        self.trades['active'].append(trade)
-        self.save_trades()
+        if latency:
+            trade['latency_ms'] = latency
+        with self._lock:
+            row_id = self.store.insert('active', trade)
+            self.trades['active'].append(trade)
+            self._active_rows[ca] = (row_id, trade)
+            self.stats.add_active(trade)
         return trade
     
     def update_active_trade(self, ca: str, current_price: float = None, 
                            remaining_percent: float = None, 
                            tps_executed: List = None):
-        """Atualiza trade ativo"""
-        for trade in self.trades['active']:
-            if trade['contract_address'] == ca:
-                if current_price is not None:
-                    trade['current_price'] = current_price
-                    trade['multiple'] = current_price / trade['entry_price']
-                    trade['percent_change'] = (trade['multiple'] - 1) * 100
-                if remaining_percent is not None:
-                    trade['remaining_percent'] = remaining_percent
-                if tps_executed is not None:
-                    trade['tps_executed'] = tps_executed
-                self.save_trades()
-                return trade
-        return None
+        """Atualiza trade ativo
+        Só preço: fica em memória até o próximo flush. Venda parcial (restante ou TPs mudaram): grava na hora.
+        """
+        with self._lock:
+            entry = self._active_rows.get(ca)
+            if entry is None:
+                return None
+            row_id, trade = entry
+            filled = (
+                (remaining_percent is not None and remaining_percent != trade.get('remaining_percent'))
+                or (tps_executed is not None and tps_executed != trade.get('tps_executed'))
+            )
+            if current_price is not None:
+                trade['current_price'] = current_price
+                trade['multiple'] = current_price / trade['entry_price']
+                trade['percent_change'] = (trade['multiple'] - 1) * 100
+            if remaining_percent is not None:
+                trade['remaining_percent'] = remaining_percent
+            if tps_executed is not None:
+                # Cópia: a lista da posição continua mudando e precisa ser comparada no próximo ciclo
+                trade['tps_executed'] = list(tps_executed)
+            self.stats.update_active(trade)
+            if filled:
+                self._dirty.discard(ca)
+                self.store.update(row_id, trade)
+            else:
+                self.mark_dirty(ca)
+            return trade
+    
+    def update_prices(self, prices: Dict[str, float]) -> int:
+        """Aplica preços de vários trades ativos e grava todos numa única transação
+        Só os campos de preço vão para o banco (vendas parciais gravadas por outro processo ficam)
+        Returns: quantos trades foram atualizados
+        """
+        with self._lock:
+            rows = []
+            for ca, current_price in prices.items():
+                entry = self._active_rows.get(ca)
+                if entry is None or not current_price or current_price <= 0:
+                    continue
+                row_id, trade = entry
+                trade['current_price'] = current_price
+                trade['multiple'] = current_price / trade['entry_price']
+                trade['percent_change'] = (trade['multiple'] - 1) * 100
+                self.stats.update_active(trade)
+                rows.append((row_id, current_price, trade['multiple'], trade['percent_change']))
+            return self.store.update_prices_many(rows)
     
     def move_to_sold(self, ca: str, final_price: float = None, total_sold_percent: float = 100.0, 
                      reason: str = None, time_to_peak: float = None, time_to_sell: float = None,
-                     peak_multiple: float = None):
+                     peak_multiple: float = None, real_sol_received: float = None):
         """Move trade de ativo para vendido
         Args:
             reason: Motivo da venda (ex: 'stop_loss_time', 'take_profit', etc)
             time_to_peak: Tempo em minutos até atingir o pico
             time_to_sell: Tempo em minutos até vender completamente
             peak_multiple: Maior múltiplo atingido
+            real_sol_received: SOL real recebido na venda final (saldo da carteira)
         """
-        for i, trade in enumerate(self.trades['active']):
-            if trade['contract_address'] == ca:
+        with self._lock:
+            entry = self._active_rows.get(ca)
+            if entry is not None:
+                row_id, trade = entry
                 sold_trade = trade.copy()
                 sold_trade['final_price'] = final_price or trade['current_price']
                 sold_trade['sold_at'] = datetime.now().isoformat()
@@ -107,6 +245,8 @@ class TradeTracker:
                     sold_trade['time_to_sell'] = round(time_to_sell, 2)  # minutos
                 if peak_multiple is not None:
                     sold_trade['peak_multiple'] = round(peak_multiple, 4)
+                if real_sol_received is not None:
+                    sold_trade['real_sol_received'] = real_sol_received
                 
                 # Calcula preço médio ponderado se houver vendas parciais
                 average_sell_price = final_price
@@ -153,216 +293,82 @@ class TradeTracker:
                 sold_trade['profit_loss_percent'] = profit_loss_percent
                 sold_trade['final_value_sol'] = final_value_sol
                 
+                self.store.mark_sold(row_id, sold_trade)
                 self.trades['sold'].append(sold_trade)
-                self.trades['active'].pop(i)
-                self.save_trades()
+                self.trades['active'].remove(trade)
+                del self._active_rows[ca]
+                self._dirty.discard(ca)
+                self.stats.move_to_sold(ca, sold_trade)
                 return sold_trade
         return None
     
     def get_stats(self):
-        """Retorna estatísticas gerais (em SOL)"""
-        from datetime import datetime, date
-        
-        active = self.trades['active']
-        sold = self.trades['sold']
-        all_trades = active + sold
-        
-        # Usa amount_sol (pode ter trades antigos com amount_usdc, usa fallback)
-        total_active_value = sum(t.get('amount_sol', t.get('amount_usdc', 0) / 100.0) for t in active)
-        total_active_current = sum(
-            (t.get('amount_sol', t.get('amount_usdc', 0) / 100.0)) * t['multiple'] * (t['remaining_percent'] / 100) 
-            for t in active
-        )
-        
-        # Para trades vendidos, usa profit_loss_sol ou converte de USDC se antigo
-        total_sold_profit = sum(t.get('profit_loss_sol', t.get('profit_loss_usdc', 0) / 100.0) for t in sold)
-        total_sold_value = sum(t.get('final_value_sol', t.get('final_value_usdc', 0) / 100.0) for t in sold)
-        
-        # Calcula win rate (trades lucrativos vs total)
-        profitable_trades = sum(1 for t in sold if t.get('profit_loss_sol', t.get('profit_loss_usdc', 0) / 100.0) > 0)
-        total_sold_with_result = len([t for t in sold if 'profit_loss_sol' in t or 'profit_loss_usdc' in t])
-        win_rate = (profitable_trades / total_sold_with_result * 100) if total_sold_with_result > 0 else 0
-        
-        # ROI médio (apenas trades vendidos)
-        avg_roi = (total_sold_profit / total_sold_value * 100) if total_sold_value > 0 else 0
-        
-        # Estatísticas do dia
-        today = date.today().isoformat()
-        today_trades = [t for t in all_trades if t.get('timestamp', '').startswith(today)]
-        today_count = len(today_trades)
-        
-        # Lucros/perdas do dia (ativos + vendidos)
-        today_active_profit = sum(
-            (t.get('amount_sol', t.get('amount_usdc', 0) / 100.0)) * (t['multiple'] - 1) * (t.get('remaining_percent', 100) / 100)
-            for t in today_trades if t in active
-        )
-        today_sold_profit = sum(
-            t.get('profit_loss_sol', t.get('profit_loss_usdc', 0) / 100.0)
-            for t in today_trades if t in sold
-        )
-        today_total_profit = today_active_profit + today_sold_profit
-        
-        # Total de tokens comprados (histórico)
-        total_tokens_bought = len(all_trades)
-        
-        # Análise por score (apenas vendidos) - agrupa em ranges
-        score_analysis = {}
-        for trade in sold:
-            score = trade.get('score', 0)
-            profit = trade.get('profit_loss_sol', trade.get('profit_loss_usdc', 0) / 100.0)
-            entry_value = trade.get('amount_sol', trade.get('amount_usdc', 0) / 100.0)
-            
-            # Agrupa por range de score
-            if 15 <= score <= 17:
-                score_range = '15-17'
-            elif 18 <= score <= 19:
-                score_range = '18-19'
-            elif 20 <= score <= 21:
-                score_range = '20-21'
-            elif score < 15:
-                score_range = '<15'
-            else:
-                score_range = 'other'
-            
-            if score_range not in score_analysis:
-                score_analysis[score_range] = {
-                    'count': 0, 
-                    'profitable': 0, 
-                    'total_profit': 0.0,
-                    'total_invested': 0.0,
-                    'total_return': 0.0
-                }
-            
-            score_analysis[score_range]['count'] += 1
-            score_analysis[score_range]['total_profit'] += profit
-            score_analysis[score_range]['total_invested'] += entry_value
-            score_analysis[score_range]['total_return'] += (entry_value + profit)
-            
-            if profit > 0:
-                score_analysis[score_range]['profitable'] += 1
-        
-        # Calcula ROI médio e win rate por range
-        for score_range, data in score_analysis.items():
-            if data['count'] > 0:
-                data['win_rate'] = (data['profitable'] / data['count'] * 100) if data['count'] > 0 else 0
-                data['avg_roi'] = ((data['total_profit'] / data['total_invested'] * 100) if data['total_invested'] > 0 else 0)
-            else:
-                data['win_rate'] = 0
-                data['avg_roi'] = 0
-        
-        # Análise de tokens ativos (lucro/perda atual)
-        active_analysis = []
-        for trade in active:
-            amount = trade.get('amount_sol', trade.get('amount_usdc', 0) / 100.0)
-            current_value = amount * trade['multiple'] * (trade.get('remaining_percent', 100) / 100)
-            profit_loss = current_value - amount
-            active_analysis.append({
-                'symbol': trade['symbol'],
-                'score': trade.get('score', 0),
-                'profit_loss': profit_loss,
-                'percent': trade.get('percent_change', 0),
-                'multiple': trade.get('multiple', 1.0)
-            })
-        
-        # Análise de performance com métricas de tempo (apenas tokens vendidos)
-        performance_analysis = {
-            'best_tokens': [],
-            'worst_tokens': [],
-            'avg_time_to_peak': None,
-            'avg_time_to_sell': None,
-            'avg_peak_multiple': None,
-            'tokens_with_peak_data': 0,
-            'tokens_with_sell_data': 0
-        }
-        
-        if len(sold) > 0:
-            # Tokens com dados de tempo
-            tokens_with_peak = [t for t in sold if 'time_to_peak' in t and t['time_to_peak'] is not None]
-            tokens_with_sell = [t for t in sold if 'time_to_sell' in t and t['time_to_sell'] is not None]
-            tokens_with_peak_mult = [t for t in sold if 'peak_multiple' in t and t['peak_multiple'] is not None]
-            
-            performance_analysis['tokens_with_peak_data'] = len(tokens_with_peak)
-            performance_analysis['tokens_with_sell_data'] = len(tokens_with_sell)
-            
-            # Calcula médias
-            if tokens_with_peak:
-                performance_analysis['avg_time_to_peak'] = round(
-                    sum(t['time_to_peak'] for t in tokens_with_peak) / len(tokens_with_peak), 2
-                )
-            
-            if tokens_with_sell:
-                performance_analysis['avg_time_to_sell'] = round(
-                    sum(t['time_to_sell'] for t in tokens_with_sell) / len(tokens_with_sell), 2
-                )
-            
-            if tokens_with_peak_mult:
-                performance_analysis['avg_peak_multiple'] = round(
-                    sum(t['peak_multiple'] for t in tokens_with_peak_mult) / len(tokens_with_peak_mult), 4
-                )
-            
-            # Melhores e piores tokens (por lucro/perda)
-            sorted_by_profit = sorted(
-                sold, 
-                key=lambda t: t.get('profit_loss_sol', t.get('profit_loss_usdc', 0) / 100.0),
-                reverse=True
-            )
-            
-            # Top 5 melhores
-            performance_analysis['best_tokens'] = [
-                {
-                    'symbol': t['symbol'],
-                    'score': t.get('score', 0),
-                    'profit_loss': round(t.get('profit_loss_sol', t.get('profit_loss_usdc', 0) / 100.0), 4),
-                    'time_to_peak': t.get('time_to_peak'),
-                    'time_to_sell': t.get('time_to_sell'),
-                    'peak_multiple': t.get('peak_multiple'),
-                    'final_multiple': round(t.get('final_price', 0) / t.get('entry_price', 1), 4) if t.get('entry_price') else None
-                }
-                for t in sorted_by_profit[:5]
-            ]
-            
-            # Top 5 piores
-            performance_analysis['worst_tokens'] = [
-                {
-                    'symbol': t['symbol'],
-                    'score': t.get('score', 0),
-                    'profit_loss': round(t.get('profit_loss_sol', t.get('profit_loss_usdc', 0) / 100.0), 4),
-                    'time_to_peak': t.get('time_to_peak'),
-                    'time_to_sell': t.get('time_to_sell'),
-                    'peak_multiple': t.get('peak_multiple'),
-                    'final_multiple': round(t.get('final_price', 0) / t.get('entry_price', 1), 4) if t.get('entry_price') else None
-                }
-                for t in sorted_by_profit[-5:]
-            ]
-        
-        return {
-            'active_count': len(active),
-            'sold_count': len(sold),
-            'total_active_invested': total_active_value,
-            'total_active_current': total_active_current,
-            'total_active_profit_loss': total_active_current - total_active_value,
-            'total_sold_profit_loss': total_sold_profit,
-            'total_sold_value': total_sold_value,
-            'overall_profit_loss': (total_active_current - total_active_value) + total_sold_profit,
-            'win_rate': round(win_rate, 2),
-            'avg_roi': round(avg_roi, 2),
-            'profitable_trades': profitable_trades,
-            'losing_trades': total_sold_with_result - profitable_trades,
-            # Novas estatísticas
-            'today_tokens_bought': today_count,
-            'total_tokens_bought': total_tokens_bought,
-            'today_profit': round(today_total_profit, 4),
-            'score_analysis': score_analysis,
-            'active_analysis': active_analysis,
-            'performance_analysis': performance_analysis
-        }
+        """Retorna estatísticas gerais (em SOL) - agregados mantidos a cada mudança (ver trade_stats.py)"""
+        with self._lock:
+            return self.stats.snapshot()
 
 # Instância global do tracker
 tracker = TradeTracker()
 
+# Canal de eventos com o bot (ver event_bus.py) - conecta no primeiro acesso a uma rota
+live_view = LiveView()
+live_stream = EventFanout()  # Eventos repassados ao dashboard (/api/stream)
+_bus_client = None
+STREAM_KEEPALIVE_SECONDS = 15  # Comentário periódico no stream (detecta dashboard fechado)
+
+def get_bus_client() -> EventBusClient:
+    """Cliente do canal de eventos (thread de fundo que mantém live_view atualizada)"""
+    global _bus_client
+    if _bus_client is None:
+        _bus_client = EventBusClient()
+        _bus_client.on_connect(resync_live_view)
+        _bus_client.on_disconnect(_on_bus_disconnect)
+        _bus_client.subscribe(live_view.apply)
+        _bus_client.subscribe(live_stream.publish)  # Depois da visão: dashboard nunca fica à frente dela
+        _bus_client.start()
+    return _bus_client
+
+def resync_live_view():
+    """Recarrega a visão do banco (ao conectar e depois que a própria interface altera trades)"""
+    if _bus_client is None or not _bus_client.connected:
+        return
+    # Roda nas threads do Flask em paralelo com a thread do canal: eventos que chegarem durante a
+    # leitura são guardados pela visão e reaplicados no reset
+    live_view.begin_reload()
+    try:
+        tracker.load_trades()
+        bot_enabled = get_bot_state()
+    except Exception:
+        live_view.abort_reload()
+        raise
+    live_view.reset(tracker.trades['active'], bot_enabled, tracker.trades['sold'])
+    live_stream.publish('resync', {'connected': True})
+
+def _on_bus_disconnect():
+    live_view.desync()
+    live_stream.publish('bus', {'connected': False})  # Dashboard volta ao polling
+
+def bot_command(name: str, args: Dict = None, timeout: float = 5.0, idempotent: bool = True):
+    """Envia comando ao bot pelo canal de eventos
+    Returns: resposta do bot, ou None se ele não está conectado (a rota segue pelo arquivo)
+    Args:
+        idempotent: Sem resposta a tempo, trata como desconectado (repetir pelo arquivo é seguro)
+    """
+    try:
+        return get_bus_client().command(name, args, timeout)
+    except TimeoutError:
+        if idempotent:
+            return None
+        raise
+
+def _bot_command_ok(name: str, args: Dict = None) -> bool:
+    reply = bot_command(name, args)
+    return reply is not None and reply.get('ok')
+
 @app.route('/')
 def index():
     """Página principal"""
+    get_async_worker().start()  # Aquece JupiterClient/conexões antes da primeira operação manual
     return render_template('dashboard.html')
 
 @app.route('/favicon.ico')
@@ -373,48 +379,72 @@ def favicon():
 @app.route('/api/trades/active')
 def get_active_trades():
     """Retorna trades ativos"""
-    tracker.load_trades()  # Recarrega do arquivo para ter dados atualizados
+    get_bus_client()
+    if live_view.synced:
+        # Bot conectado: visão em memória atualizada pelos eventos (sem ler o banco)
+        return jsonify(live_view.active_trades())
+    tracker.refresh()  # Recarrega do banco só se ele mudou
     return jsonify(tracker.trades['active'])
 
+@app.route('/api/stream')
+def stream_events():
+    """Eventos do bot em tempo real (Server-Sent Events): trades, preços, vendas, detecções e estado
+    'resync' pede recarga completa; 'bus' com connected=false indica bot fora (dashboard usa polling)
+    """
+    get_bus_client()
+    subscriber = live_stream.subscribe()
+    
+    def generate():
+        try:
+            yield f"event: hello\ndata: {json.dumps({'connected': live_view.synced})}\n\n"
+            while True:
+                try:
+                    event, data = subscriber.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+        finally:
+            live_stream.unsubscribe(subscriber)
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/trades/active/update-prices', methods=['POST'])
 def update_active_trades_prices():
-    """Atualiza preços de todos os trades ativos"""
+    """Atualiza preços de todos os trades ativos
+    Todos os tokens são buscados juntos (lote + individuais em paralelo) e gravados numa transação
+    """
     try:
-        from price_monitor import PriceMonitor
-        import asyncio
+        import time
         
-        tracker.load_trades()
-        active_trades = tracker.trades.get('active', [])
-        
-        monitor = PriceMonitor()
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        started_at = time.perf_counter()
+        if live_view.synced:
+            active_trades = live_view.active_trades()
+        else:
+            tracker.load_trades()
+            active_trades = tracker.trades.get('active', [])
+        mints = [trade['contract_address'] for trade in active_trades if trade.get('contract_address')]
         
-        updated_count = 0
-        try:
-            for trade in active_trades:
-                ca = trade.get('contract_address')
-                if not ca:
-                    continue
-                
-                try:
-                    # Busca preço atual
-                    current_price = loop.run_until_complete(monitor.get_token_price(ca))
-                    
-                    if current_price and current_price > 0:
-                        # Atualiza trade com novo preço
-                        tracker.update_active_trade(ca, current_price=current_price)
-                        updated_count += 1
-                except Exception as e:
-                    # Continua com próximo trade se falhar
-                    continue
-        finally:
-            loop.close()
+        worker = get_async_worker()
+        prices, timings = worker.run(worker.price_monitor.get_token_prices_timed(mints))
+        prices = {ca: price for ca, price in prices.items() if price and price > 0}
+        # Com o bot rodando o preço vai para a cópia em memória dele (que grava o histórico e publica
+        # trade_updated); sem bot, a interface grava só os campos de preço no banco
+        reply = bot_command('update_trade_prices', {'prices': prices}) if prices else None
+        if reply is not None:
+            if not reply.get('ok'):
+                return jsonify({'success': False, 'error': reply.get('error')}), 502
+            updated_count = reply['result']['updated']
+        else:
+            updated_count = tracker.update_prices(prices)
         
         return jsonify({
             'success': True,
             'updated': updated_count,
             'total': len(active_trades),
+            'elapsed_ms': round((time.perf_counter() - started_at) * 1000, 1),
+            'timings': timings,  # {mint: {'ms': tempo até o preço, 'via': 'batch'|'single'|None}}
             'message': f'{updated_count} de {len(active_trades)} preços atualizados'
         })
     except Exception as e:
@@ -428,15 +458,31 @@ def update_active_trades_prices():
 @app.route('/api/trades/sold')
 def get_sold_trades():
     """Retorna trades vendidos"""
-    tracker.load_trades()  # Recarrega do arquivo para ter dados atualizados
+    tracker.refresh()  # Recarrega do banco só se ele mudou
     return jsonify(tracker.trades['sold'])
 
 @app.route('/api/stats')
 def get_stats():
     """Retorna estatísticas"""
-    tracker.load_trades()  # Recarrega do arquivo para ter dados atualizados
+    get_bus_client()
+    if live_view.synced:
+        # Bot conectado: agregados atualizados pelos eventos (sem ler o banco)
+        return jsonify(live_view.get_stats())
+    tracker.refresh()  # Recarrega do banco só se ele mudou (sem mudança: agregados já prontos)
     return jsonify(tracker.get_stats())
 
+@app.route('/api/stats/rebuild', methods=['POST'])
+def rebuild_stats():
+    """Confere os agregados de /api/stats contra um recálculo completo e os reconstrói do banco"""
+    from trade_stats import verify_stats
+    tracker.load_trades()
+    if live_view.synced:
+        differences = live_view.verify_stats(tracker.trades['sold'])
+        resync_live_view()
+    else:
+        differences = verify_stats(tracker.stats, tracker.trades['active'], tracker.trades['sold'])
+    return jsonify({'success': True, 'consistent': not differences, 'differences': differences})
+
 @app.route('/api/trades/all')
 def get_all_trades():
     """Retorna todos os trades"""
@@ -448,14 +494,14 @@ def reset_all_data():
     try:
         # Cria backup antes de resetar
         backup_file = f'trades_history_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-        if os.path.exists(TRADES_FILE):
-            import shutil
-            shutil.copy2(TRADES_FILE, backup_file)
+        if tracker.store.count() > 0:
+            tracker.store.export_json(backup_file)
             print(f"📦 Backup criado: {backup_file}")
         
         # Reseta os dados
         tracker.trades = {'active': [], 'sold': []}
         tracker.save_trades()
+        resync_live_view()
         
         # Reseta limite diário também
         try:
@@ -494,11 +540,8 @@ def mark_trade_sold():
             return jsonify({'error': 'Porcentagem de venda inválida (deve ser entre 1 e 100)'}), 400
         
         # Busca o trade ativo
-        trade = None
-        for t in tracker.trades['active']:
-            if t['contract_address'] == ca:
-                trade = t
-                break
+        tracker.load_trades()
+        trade = tracker.get_active_trade(ca)
         
         if not trade:
             return jsonify({'error': 'Token ativo não encontrado'}), 404
@@ -604,8 +647,7 @@ def mark_trade_sold():
             partial_sold_trade['average_sell_price'] = final_price  # Para venda parcial, é o preço único
             
             # Adiciona à lista de vendidos
-            tracker.trades['sold'].append(partial_sold_trade)
-            tracker.save_trades()
+            tracker.add_sold_trade(partial_sold_trade)
             
             sold_trade = partial_sold_trade
             
@@ -619,6 +661,7 @@ def mark_trade_sold():
                 'final_price': final_price,
                 'entry_price': trade['entry_price']
             }
+        resync_live_view()
         
         if sold_trade:
             # Adiciona ao limite diário (apenas se venda total)
@@ -653,6 +696,9 @@ def mark_trade_sold():
 @app.route('/api/bot/state', methods=['GET'])
 def get_bot_control_state():
     """Retorna estado do bot (ativado/desativado)"""
+    get_bus_client()
+    if live_view.synced and live_view.bot_enabled is not None:
+        return jsonify({'enabled': live_view.bot_enabled})
     return jsonify({'enabled': get_bot_state()})
 
 @app.route('/api/bot/toggle', methods=['POST'])
@@ -660,7 +706,9 @@ def toggle_bot():
     """Ativa/desativa o bot"""
     data = request.json
     enabled = data.get('enabled', True)
-    set_bot_state(enabled)
+    # Bot rodando: muda na hora pelo canal de eventos (ele grava o arquivo); senão grava aqui
+    if not _bot_command_ok('set_bot_state', {'enabled': enabled}):
+        set_bot_state(enabled)
     return jsonify({'enabled': get_bot_state(), 'message': 'Bot ' + ('ativado' if enabled else 'desativado') + ' com sucesso!'})
 
 @app.route('/api/last-token')
@@ -708,21 +756,13 @@ def update_detected_token_price(ca):
                 'skip': True  # Flag para o frontend ignorar silenciosamente
             }), 200  # Retorna 200 para não aparecer como erro no console
         
-        from detected_tokens_tracker import update_token_price
-        import asyncio
-        from price_monitor import PriceMonitor
-        
         # Busca preço atual automaticamente
-        monitor = PriceMonitor()
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            current_price = loop.run_until_complete(monitor.get_token_price(ca))
-        finally:
-            loop.close()
+        worker = get_async_worker()
+        current_price = worker.run(worker.price_monitor.get_token_price(ca))
         
         if current_price and current_price > 0:
-            token = update_token_price(ca, current_price)
+            tokens = apply_detected_token_prices({ca: current_price})
+            token = tokens[0] if tokens else None
             if token:
                 return jsonify({'success': True, 'token': token, 'price': current_price})
             else:
@@ -748,11 +788,143 @@ def update_detected_token_price(ca):
             'skip': True
         }), 200  # 200 para não aparecer como erro no console
 
+def _is_refreshable_ca(ca) -> bool:
+    """Ignora tokens de teste e endereços inválidos (não têm preço em lugar nenhum)"""
+    return isinstance(ca, str) and bool(ca) and not ca.startswith('CA_TEST') and len(ca) >= 32 and ca.replace('_', '').isalnum()
+
+def apply_detected_token_prices(prices: Dict[str, float]) -> List[Dict]:
+    """Grava preços de tokens detectados: com o bot rodando vão para o registro residente dele
+    (o bot é o único que grava detected_tokens.json); sem bot, a interface grava o arquivo
+    Returns: cópias dos tokens atualizados
+    Raises: RuntimeError se o bot recusou; TimeoutError se ele não respondeu (a interface não grava
+            o arquivo nesses casos - o bot continua sendo o único a gravar)
+    """
+    from detected_tokens_tracker import update_token_prices_batch
+    prices = {ca: price for ca, price in prices.items() if price and price > 0}
+    if not prices:
+        return []
+    reply = bot_command('update_detected_prices', {'prices': prices}, timeout=30.0, idempotent=False)
+    if reply is None:
+        return update_token_prices_batch(prices)  # Bot não conectado
+    if not reply.get('ok'):
+        raise RuntimeError(f"Bot recusou a atualização de preços: {reply.get('error')}")
+    return reply['result']['tokens']
+
+def refresh_detected_token_prices(mints: List[str]) -> Dict:
+    """Busca os preços de vários tokens detectados juntos e grava tudo de uma vez"""
+    import time
+    
+    started_at = time.perf_counter()
+    mints = list(dict.fromkeys(ca for ca in mints if _is_refreshable_ca(ca)))  # Filtra antes: itens não-string quebrariam o dict
+    worker = get_async_worker()
+    prices, timings = worker.run(worker.price_monitor.get_token_prices_timed(mints)) if mints else ({}, {})
+    tokens = apply_detected_token_prices(prices)
+    return {
+        'success': True,
+        'updated': len(tokens),
+        'total': len(mints),
+        'elapsed_ms': round((time.perf_counter() - started_at) * 1000, 1),
+        'prices': {token['contract_address']: token['current_price'] for token in tokens},
+        'timings': timings,  # {mint: {'ms', 'via': 'batch'|'single'|None}}
+        'message': f'{len(tokens)} de {len(mints)} preços atualizados'
+    }
+
+# Atualizações em segundo plano: {job_id: estado} (só as mais recentes ficam guardadas)
+REFRESH_JOBS_KEPT = 20
+_refresh_jobs: Dict[str, Dict] = {}
+_refresh_jobs_lock = threading.Lock()
+
+def _run_refresh_job(job_id: str, mints: List[str]):
+    try:
+        result = refresh_detected_token_prices(mints)
+    except Exception as e:
+        print(f"⚠️ Erro ao atualizar preços de tokens detectados: {e}")
+        result = {'success': False, 'error': str(e)}
+    with _refresh_jobs_lock:
+        job = _refresh_jobs.get(job_id)
+        if job is None:
+            return  # Descartado por jobs mais novos enquanto rodava - ninguém mais consulta
+        job.update(result, status='done', finished_at=datetime.now(timezone.utc).isoformat())
+
+def start_refresh_job(mints: List[str]) -> Dict:
+    """Dispara refresh_detected_token_prices numa thread e devolve o estado inicial do job"""
+    import uuid
+    job_id = uuid.uuid4().hex[:12]
+    job = {'job_id': job_id, 'status': 'running', 'total': len(mints),
+           'started_at': datetime.now(timezone.utc).isoformat()}
+    with _refresh_jobs_lock:
+        _refresh_jobs[job_id] = job
+        while len(_refresh_jobs) > REFRESH_JOBS_KEPT:
+            _refresh_jobs.pop(next(iter(_refresh_jobs)))
+    threading.Thread(target=_run_refresh_job, args=(job_id, mints), name=f'refresh-{job_id}', daemon=True).start()
+    return dict(job)
+
+@app.route('/api/detected-tokens/refresh', methods=['POST'])
+def refresh_detected_tokens():
+    """Atualiza preços de vários tokens detectados numa requisição
+    Body: {"mints": [...] | "all", "limit": 200, "background": false}
+    "all" = os limit tokens detectados mais recentes. Com background=true responde na hora com
+    um job_id (acompanhar em GET /api/detected-tokens/refresh/<job_id>).
+    """
+    try:
+        from detected_tokens_tracker import get_all_detected_tokens
+        data = request.get_json(silent=True) or {}
+        mints = data.get('mints', 'all')
+        if mints == 'all':
+            limit = int(data.get('limit', 200))
+            mints = [token.get('contract_address') for token in get_all_detected_tokens(limit=limit)]
+        elif not isinstance(mints, list):
+            return jsonify({'success': False, 'error': 'mints deve ser uma lista ou "all"'}), 400
+        
+        if data.get('background'):
+            return jsonify({'success': True, **start_refresh_job(mints)}), 202
+        return jsonify(refresh_detected_token_prices(mints))
+    except Exception as e:
+        import traceback
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
+@app.route('/api/detected-tokens/refresh/<job_id>')
+def get_refresh_job(job_id):
+    """Estado de uma atualização em segundo plano"""
+    with _refresh_jobs_lock:
+        job = _refresh_jobs.get(job_id)
+        job = dict(job) if job else None
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job não encontrado'}), 404
+    return jsonify(job)
+
+@app.route('/api/latency')
+def get_latency_stats_api():
+    """Retorna histogramas de latência do caminho de compra (p50/p95/p99 por estágio)"""
+    from latency_tracker import load_latency_summary
+    summary = load_latency_summary()
+    return jsonify(summary if summary else {'traces_count': 0, 'stages': {}, 'recent': []})
+
+@app.route('/api/http-stats')
+def get_http_stats_api():
+    """Retorna contadores de conexões HTTP do processo web (reuso vs novas)"""
+    return jsonify(get_http_stats())
+
+@app.route('/api/price-stats')
+def get_price_stats_api():
+    """Retorna cache de preços (hits/misses/buscas compartilhadas) e latência por fonte do processo web"""
+    from price_monitor import get_price_stats
+    return jsonify(get_price_stats())
+
 @app.route('/api/wallet-balance')
 def get_wallet_balance_api():
-    """Retorna saldos da carteira"""
+    """Retorna saldos da carteira (valor em memória, com a idade em age_seconds)"""
     try:
-        balance = get_wallet_balance_sync()
+        service = get_wallet_balance_service()
+        # Serviço roda no loop do worker; depois da primeira leitura responde sem RPC
+        get_async_worker().run(service.ensure_started())
+        balance = service.get()
+        if balance is None:
+            raise RuntimeError('Saldo da carteira ainda não foi lido')
         return jsonify(balance)
     except Exception as e:
         return jsonify({
@@ -791,7 +963,8 @@ def add_to_blacklist_api():
         ca = data.get('contract_address', '').strip()
         if not ca:
             return jsonify({'error': 'Contract address não fornecido'}), 400
-        add_to_blacklist(ca)
+        if not _bot_command_ok('blacklist_add', {'contract_address': ca}):
+            add_to_blacklist(ca)
         refresh_blacklist_cache()
         return jsonify({'success': True, 'message': f'Token {ca} adicionado à blacklist'})
     except Exception as e:
@@ -802,7 +975,8 @@ def remove_from_blacklist_api(address):
     """Remove token da blacklist"""
     try:
         from token_blacklist import remove_from_blacklist, refresh_blacklist_cache
-        remove_from_blacklist(address)
+        if not _bot_command_ok('blacklist_remove', {'contract_address': address}):
+            remove_from_blacklist(address)
         refresh_blacklist_cache()
         return jsonify({'success': True, 'message': f'Token {address} removido da blacklist'})
     except Exception as e:
@@ -822,51 +996,71 @@ def manual_buy_token():
         if amount_sol <= 0:
             return jsonify({'success': False, 'error': 'Quantidade em SOL inválida'}), 400
         
-        # Importa aqui para evitar import circular
-        from jupiter_client import JupiterClient
-        from price_monitor import PriceMonitor
-        import asyncio
+        import config
+        from capital_ledger import CapitalReservationError, get_capital_ledger
+        worker = get_async_worker()
+        
+        # Reserva o capital antes de enviar (barra clique duplo e compra acima do saldo livre)
+        # O serviço de saldo da interface pode não ter feito a primeira leitura ainda: espera por ela
+        # e recusa a compra se o saldo continuar desconhecido
+        try:
+            worker.run(get_wallet_balance_service().ensure_started())
+        except TimeoutError:
+            pass
+        ledger = get_capital_ledger()
+        try:
+            reservation = ledger.reserve(contract_address, amount_sol, require_balance=True)
+        except CapitalReservationError as e:
+            return jsonify({'success': False, 'error': str(e)}), 409
         
         async def execute_buy():
-            jupiter = JupiterClient()
+            # JupiterClient do worker: conexões RPC/HTTP já abertas (não fecha no final)
+            jupiter = worker.jupiter
+            
+            # Compra real na blockchain
             try:
-                # Compra real na blockchain
                 tx_signature, quote = await jupiter.buy_token(contract_address, amount_sol)
-                
-                # Obtém valores reais
-                amount_tokens = int(quote.get('outAmount', 0))
-                real_amount_sol = quote.get('real_in_amount_sol', amount_sol)
-                
-                # Busca preço atual do token para salvar no histórico
-                monitor = PriceMonitor()
-                current_price = await monitor.get_token_price(contract_address)
-                entry_price = current_price if current_price and current_price > 0 else 0.0001
-                
-                # Salva no histórico (como o bot faz)
-                from trade_tracker_integration import log_trade_bought
-                log_trade_bought(
-                    symbol=contract_address[:8],  # Usa primeiros 8 chars como símbolo
-                    ca=contract_address,
-                    entry_price=entry_price,
-                    amount_sol=real_amount_sol,
-                    score=0,  # Score 0 para compras manuais
-                    tx=tx_signature,
-                    amount_tokens=amount_tokens
-                )
-                
-                await jupiter.close()
-                return {
-                    'success': True,
-                    'tx_signature': tx_signature,
-                    'amount_tokens': amount_tokens,
-                    'amount_sol': real_amount_sol,
-                    'entry_price': entry_price
-                }
-            except Exception as e:
-                await jupiter.close()
-                raise e
+            except Exception:
+                ledger.release(reservation)
+                raise
+            ledger.settle(reservation, balance_updated=quote.get('from_balance', False))
+            
+            # Obtém valores reais
+            amount_tokens = int(quote.get('outAmount', 0))
+            real_amount_sol = quote.get('real_in_amount_sol', amount_sol)
+            
+            # Busca preço atual do token para salvar no histórico
+            current_price = await worker.price_monitor.get_token_price(contract_address)
+            entry_price = current_price if current_price and current_price > 0 else 0.0001
+            
+            # Salva no histórico (como o bot faz)
+            from trade_tracker_integration import log_trade_bought
+            log_trade_bought(
+                symbol=contract_address[:8],  # Usa primeiros 8 chars como símbolo
+                ca=contract_address,
+                entry_price=entry_price,
+                amount_sol=real_amount_sol,
+                score=0,  # Score 0 para compras manuais
+                tx=tx_signature,
+                amount_tokens=amount_tokens
+            )
+            
+            return {
+                'success': True,
+                'tx_signature': tx_signature,
+                'amount_tokens': amount_tokens,
+                'amount_sol': real_amount_sol,
+                'entry_price': entry_price
+            }
         
-        result = asyncio.run(execute_buy())
+        # Sem resposta a tempo a compra continua no worker (e vai para o histórico) - não é cancelada
+        try:
+            result = worker.run(execute_buy(), timeout=config.WEB_TRADE_TIMEOUT_SECONDS, cancel_on_timeout=False)
+        except TimeoutError:
+            return jsonify({
+                'success': False,
+                'error': 'Compra ainda em andamento - confira o histórico de trades antes de tentar de novo'
+            }), 504
         
         if result['success']:
             return jsonify({
@@ -898,158 +1092,159 @@ def manual_sell_token():
         if sell_percent <= 0 or sell_percent > 100:
             return jsonify({'success': False, 'error': 'Porcentagem inválida (deve ser entre 1 e 100)'}), 400
         
+        # Posição monitorada pelo bot: vende por lá (não concorre com TP/stop loss da mesma posição)
+        # Sem resposta a tempo dá erro em vez de vender de novo por aqui
+        reply = bot_command('manual_sell', {'contract_address': contract_address, 'sell_percent': sell_percent},
+                            timeout=90.0, idempotent=False)
+        if reply is not None:
+            if not reply.get('ok'):
+                return jsonify({'success': False, 'error': reply.get('error')}), 500
+            if not reply['result'].get('not_monitored'):
+                return _manual_sell_response(reply['result'])
+        
         # Busca trade ativo para obter quantidade de tokens
         tracker.load_trades()
-        trade = None
-        for t in tracker.trades['active']:
-            if t['contract_address'] == contract_address:
-                trade = t
-                break
+        trade = tracker.get_active_trade(contract_address)
         
         if not trade:
             return jsonify({'success': False, 'error': 'Token não encontrado nos trades ativos'}), 404
         
-        # Importa aqui para evitar import circular
-        from jupiter_client import JupiterClient
-        from solana.rpc.async_api import AsyncClient
-        from solders.keypair import Keypair
-        import base58
         import config
-        import asyncio
+        worker = get_async_worker()
         
         async def execute_sell():
-            # Conecta à blockchain para obter saldo de tokens
-            client = AsyncClient(config.RPC_URL)
-            keypair = Keypair.from_base58_string(config.SOLANA_PRIVATE_KEY)
+            # Conexão RPC e keypair do JupiterClient do worker (já abertos/decodificados)
+            jupiter = worker.jupiter
+            client = jupiter.client
+            keypair = jupiter.keypair
             
-            try:
-                # Obtém saldo de tokens da carteira
-                from spl.token.async_client import AsyncToken
-                from spl.token.constants import TOKEN_PROGRAM_ID
-                
-                # Busca contas de token do usuário
-                token_accounts = await client.get_token_accounts_by_owner(
-                    keypair.pubkey(),
-                    {"mint": contract_address},
-                    commitment="confirmed"
+            # Obtém saldo de tokens da carteira
+            from spl.token.async_client import AsyncToken
+            from spl.token.constants import TOKEN_PROGRAM_ID
+            
+            # Busca contas de token do usuário
+            token_accounts = await client.get_token_accounts_by_owner(
+                keypair.pubkey(),
+                {"mint": contract_address},
+                commitment="confirmed"
+            )
+            
+            if not token_accounts.value:
+                raise Exception(f"Nenhum token encontrado na carteira para {contract_address}")
+            
+            # Pega a primeira conta de token (geralmente é a única)
+            token_account = token_accounts.value[0]
+            account_info = await client.get_account_info(token_account.pubkey, commitment="confirmed")
+            
+            if not account_info.value:
+                raise Exception("Conta de token não encontrada")
+            
+            # Decodifica dados da conta para obter saldo
+            from spl.token.core import Account
+            account_data = Account.decode(account_info.value.data)
+            current_balance = account_data.amount
+            
+            # Calcula quantidade a vender
+            amount_to_sell = int((current_balance * sell_percent) / 100)
+            
+            if amount_to_sell <= 0:
+                raise Exception("Quantidade a vender é zero ou negativa")
+            
+            # Vende usando Jupiter
+            tx_signature, quote = await jupiter.sell_token(
+                contract_address,
+                amount_to_sell
+            )
+            
+            # Obtém valores reais
+            real_sol_received = quote.get('real_out_amount_sol', 0)
+            tokens_sold = quote.get('real_in_amount_tokens', amount_to_sell)
+            sell_price = quote.get('calculated_price', 0)
+            
+            # Calcula novo saldo restante
+            remaining_tokens = current_balance - tokens_sold
+            remaining_percent = (remaining_tokens / current_balance * 100) if current_balance > 0 else 0
+            
+            # Atualiza trade no histórico
+            from trade_tracker_integration import log_trade_update, log_trade_sold
+            
+            if remaining_percent <= 0.1:  # Vendeu tudo (ou quase tudo)
+                # Marca como vendido completamente
+                log_trade_sold(
+                    ca=contract_address,
+                    final_price=sell_price if sell_price > 0 else trade.get('current_price', trade.get('entry_price', 0)),
+                    total_sold_percent=100.0,
+                    reason='manual',
+                    real_sol_received=real_sol_received
                 )
+            else:
+                # Venda parcial - atualiza trade
+                new_remaining_percent = remaining_percent
                 
-                if not token_accounts.value:
-                    raise Exception(f"Nenhum token encontrado na carteira para {contract_address}")
-                
-                # Pega a primeira conta de token (geralmente é a única)
-                token_account = token_accounts.value[0]
-                account_info = await client.get_account_info(token_account.pubkey, commitment="confirmed")
-                
-                if not account_info.value:
-                    raise Exception("Conta de token não encontrada")
-                
-                # Decodifica dados da conta para obter saldo
-                from spl.token.core import Account
-                account_data = Account.decode(account_info.value.data)
-                current_balance = account_data.amount
-                
-                # Calcula quantidade a vender
-                amount_to_sell = int((current_balance * sell_percent) / 100)
-                
-                if amount_to_sell <= 0:
-                    raise Exception("Quantidade a vender é zero ou negativa")
+                # Cria objeto completo da venda manual
+                manual_sale_info = {
+                    'type': 'manual_sell',
+                    'percent': (tokens_sold / current_balance * 100) if current_balance > 0 else sell_percent,
+                    'price': sell_price if sell_price > 0 else trade.get('current_price', trade.get('entry_price', 0)),
+                    'timestamp': datetime.now(timezone.utc).isoformat(),
+                    'tx': tx_signature,
+                    'sol_received': real_sol_received
+                }
                 
-                # Vende usando Jupiter
-                jupiter = JupiterClient()
-                try:
-                    tx_signature, quote = await jupiter.sell_token(
-                        contract_address,
-                        amount_to_sell
-                    )
-                    
-                    # Obtém valores reais
-                    real_sol_received = quote.get('real_out_amount_sol', 0)
-                    tokens_sold = quote.get('real_in_amount_tokens', amount_to_sell)
-                    sell_price = quote.get('calculated_price', 0)
-                    
-                    # Calcula novo saldo restante
-                    remaining_tokens = current_balance - tokens_sold
-                    remaining_percent = (remaining_tokens / current_balance * 100) if current_balance > 0 else 0
-                    
-                    # Atualiza trade no histórico
-                    from trade_tracker_integration import log_trade_update, log_trade_sold
-                    
-                    if remaining_percent <= 0.1:  # Vendeu tudo (ou quase tudo)
-                        # Marca como vendido completamente
-                        log_trade_sold(
-                            ca=contract_address,
-                            final_price=sell_price if sell_price > 0 else trade.get('current_price', trade.get('entry_price', 0)),
-                            total_sold_percent=100.0,
-                            reason='manual',
-                            real_sol_received=real_sol_received
-                        )
-                    else:
-                        # Venda parcial - atualiza trade
-                        new_remaining_percent = remaining_percent
-                        
-                        # Cria objeto completo da venda manual
-                        manual_sale_info = {
-                            'type': 'manual_sell',
-                            'percent': (tokens_sold / current_balance * 100) if current_balance > 0 else sell_percent,
-                            'price': sell_price if sell_price > 0 else trade.get('current_price', trade.get('entry_price', 0)),
-                            'timestamp': datetime.now(timezone.utc).isoformat(),
-                            'tx': tx_signature,
-                            'sol_received': real_sol_received
-                        }
-                        
-                        log_trade_update(
-                            ca=contract_address,
-                            current_price=sell_price if sell_price > 0 else trade.get('current_price', 0),
-                            remaining_percent=new_remaining_percent,
-                            tps_executed=trade.get('tps_executed', []) + [manual_sale_info]
-                        )
-                    
-                    await jupiter.close()
-                    await client.close()
-                    
-                    return {
-                        'success': True,
-                        'tx_signature': tx_signature,
-                        'tokens_sold': tokens_sold,
-                        'sol_received': real_sol_received,
-                        'sell_price': sell_price,
-                        'remaining_percent': remaining_percent,
-                        'is_full_sale': remaining_percent <= 0.1
-                    }
-                except Exception as e:
-                    await jupiter.close()
-                    raise e
-            except Exception as e:
-                await client.close()
-                raise e
-        
-        result = asyncio.run(execute_sell())
-        
-        if result['success']:
-            message = f"Venda de {result['tokens_sold']} tokens realizada! Recebido: {result['sol_received']:.6f} SOL"
-            if result['is_full_sale']:
-                message += " (venda completa)"
-            else:
-                message += f" (restam {result['remaining_percent']:.1f}%)"
+                log_trade_update(
+                    ca=contract_address,
+                    current_price=sell_price if sell_price > 0 else trade.get('current_price', 0),
+                    remaining_percent=new_remaining_percent,
+                    tps_executed=trade.get('tps_executed', []) + [manual_sale_info]
+                )
             
-            return jsonify({
+            return {
                 'success': True,
-                'tx_signature': result['tx_signature'],
-                'tokens_sold': result['tokens_sold'],
-                'sol_received': result['sol_received'],
-                'sell_price': result['sell_price'],
-                'remaining_percent': result['remaining_percent'],
-                'is_full_sale': result['is_full_sale'],
-                'message': message
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Erro ao executar venda'}), 500
+                'tx_signature': tx_signature,
+                'tokens_sold': tokens_sold,
+                'sol_received': real_sol_received,
+                'sell_price': sell_price,
+                'remaining_percent': remaining_percent,
+                'is_full_sale': remaining_percent <= 0.1
+            }
+        
+        # Sem resposta a tempo a venda continua no worker (e vai para o histórico) - não é cancelada
+        try:
+            result = worker.run(execute_sell(), timeout=config.WEB_TRADE_TIMEOUT_SECONDS, cancel_on_timeout=False)
+        except TimeoutError:
+            return jsonify({
+                'success': False,
+                'error': 'Venda ainda em andamento - confira o histórico de trades antes de tentar de novo'
+            }), 504
+        resync_live_view()
+        return _manual_sell_response(result)
             
     except Exception as e:
         import traceback
         return jsonify({'success': False, 'error': str(e), 'traceback': traceback.format_exc()}), 500
 
+def _manual_sell_response(result: Dict):
+    """Resposta da venda manual (executada pelo bot ou por esta interface)"""
+    if result['success']:
+        message = f"Venda de {result['tokens_sold']} tokens realizada! Recebido: {result['sol_received']:.6f} SOL"
+        if result['is_full_sale']:
+            message += " (venda completa)"
+        else:
+            message += f" (restam {result['remaining_percent']:.1f}%)"
+        
+        return jsonify({
+            'success': True,
+            'tx_signature': result['tx_signature'],
+            'tokens_sold': result['tokens_sold'],
+            'sol_received': result['sol_received'],
+            'sell_price': result['sell_price'],
+            'remaining_percent': result['remaining_percent'],
+            'is_full_sale': result['is_full_sale'],
+            'message': message
+        })
+    else:
+        return jsonify({'success': False, 'error': 'Erro ao executar venda'}), 500
+
 @app.route('/api/trading-config', methods=['GET'])
 def get_trading_config():
     """Retorna configurações de trading (TP e Stop Loss)"""
@@ -1079,6 +1274,7 @@ def update_trading_config():
             config['stop_loss'] = {**config.get('stop_loss', {}), **data['stop_loss']}
         
         save_config(config)
+        bot_command('config_changed')  # Bot relê na hora (sem bot rodando, nada a fazer)
         return jsonify({'success': True, 'config': config})
     except Exception as e:
         import traceback
@@ -1163,6 +1359,7 @@ def update_buy_config():
         with open(env_file, 'w', encoding='utf-8') as f:
             for key, value in env_vars.items():
                 f.write(f'{key}={value}\n')
+        bot_command('config_changed')  # Bot relê na hora (sem bot rodando, nada a fazer)
         
         # Retorna configuração atualizada
         return jsonify({